@@ -1,120 +1,120 @@
-import re
 import os
-import time
-import json
+import glob
+import argparse
 from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright, Page
+import bc_daemon
+import bc_store
+from bc_evidence import record_failure, take_screenshot
+from bc_retry import begin, classify, spent
+from bc_selectors import PROCESS, SHOW_MORE, CONFIRM, FILE_DROP, UPLOAD, COMPLETE_ACTION
+from bc_trace import bind, step, unbind
+from bc_links import open_document
+from bc_session import launch_browser, open_session
+from bc_wait import timeout_for, wait_for_dialog, wait_until_idle
 
 load_dotenv()  # Load environment variables from .env file
 
-def take_screenshot(page: Page, step_name: str) -> str:
-    """Take a screenshot and save it with a specified step name."""
-    screenshot_dir = "screenshots"
-    os.makedirs(screenshot_dir, exist_ok=True)
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    screenshot_path = os.path.join(screenshot_dir, f"{step_name}_{timestamp}.png")
-    page.screenshot(path=screenshot_path)
-    print(f"Screenshot taken: {screenshot_path}")
-    return screenshot_path
-
-def save_extracted_data(new_data, filename="extracted_data.json"):
-    """Save extracted data into a JSON file, updating without erasing previous entries."""
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            try:
-                data = json.load(f)
-                if not isinstance(data, list):
-                    data = [data]  # Ensure data is stored as a list
-            except json.JSONDecodeError:
-                data = []
-    else:
-        data = []
-    
-    data.append(new_data)
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=4)
-    print(f"Extracted data updated in {filename}.")
-
-def get_latest_entry(filename="extracted_data.json"):
-    """Retrieve the latest entry from the JSON file."""
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            try:
-                data = json.load(f)
-                if isinstance(data, list) and data:
-                    return data[-1]  # Return the most recent entry
-            except json.JSONDecodeError:
-                print("Error reading JSON file.")
-    return None  # Return None if file doesn't exist or is empty
-
-def submit_form():
-    """Automate the RFQ process and retrieve the RFQ_no from extracted data."""
-    # Load extracted data
-    extracted_data = get_latest_entry()
-    
-    if not extracted_data:
-        print("No data found in extracted_data.json.")
+# Quotations are picked up from here as <RFQ_no>.<ext> when the RFQ has no quotation recorded
+QUOTATION_DIR = os.getenv("BC_QUOTATION_DIR", "quotations")
+
+def find_quotation(RFQ_no, quotation=None):
+    """Return the quotation file to attach: the given path, the one recorded for the RFQ, or <RFQ_no>.* in QUOTATION_DIR."""
+    if not quotation:
+        record = bc_store.get(RFQ_no)
+        quotation = record["data"].get("quotation") if record else None
+    if not quotation:
+        matches = sorted(glob.glob(os.path.join(QUOTATION_DIR, f"{glob.escape(RFQ_no)}.*")))
+        quotation = matches[0] if matches else None
+    if not quotation:
+        raise FileNotFoundError(f"No quotation for {RFQ_no}: pass one or put it in {QUOTATION_DIR}/{RFQ_no}.<ext>.")
+    if not os.path.isfile(quotation):
+        raise FileNotFoundError(f"Quotation file {quotation} for {RFQ_no} does not exist.")
+    return os.path.abspath(quotation)
+
+def upload_quotation(frame, quotation):
+    """Attach a file through the Doc. Links upload dialog and wait until BC has stored it."""
+    frame.get_by_role("button", name=FILE_DROP).click()
+    frame.get_by_role("menuitem", name=UPLOAD).locator("div").first.click()
+
+    # The dialog's file input takes the file directly, so no native file picker is opened
+    dialog = frame.get_by_role("dialog", name=UPLOAD)
+    dialog.locator("input[type='file']").set_input_files(quotation, timeout=timeout_for("dialog"))
+    dialog.wait_for(state="hidden", timeout=timeout_for("commit"))
+    wait_until_idle(frame)
+
+def run_stage(page: Page, RFQ_no, quotation=None):
+    """Attach the quotation and complete the action on an RFQ on an already logged-in page."""
+    # Check the file before touching the RFQ, so a missing quotation fails fast
+    quotation = find_quotation(RFQ_no, quotation)
+
+    # Open the RFQ card, straight from its cached link when there is one
+    bind(RFQ_no=RFQ_no)
+    with step("action.open"):
+        frame = open_document(page, RFQ_no)
+
+    with step("action.upload", file=os.path.basename(quotation)):
+        frame.get_by_label(SHOW_MORE).click()
+        upload_quotation(frame, quotation)
+
+    with step("action.complete_action"):
+        frame.get_by_role("menuitem", name=PROCESS).click()
+        frame.get_by_role("menuitem", name=COMPLETE_ACTION).click()
+
+        confirm = wait_for_dialog(frame, CONFIRM)
+        take_screenshot(page, f"page quated_{RFQ_no}")
+        confirm.click()
+        wait_until_idle(frame)
+
+    print(f"Navigated to RFQ page using RFQ_no: {RFQ_no}")
+    take_screenshot(page, f"RFQ_page_{RFQ_no}")
+
+    print(f"RFQ action performed successfully: {RFQ_no}")
+    bc_store.record("rfq", RFQ_no, "actioned", quotation=quotation)
+    unbind("RFQ_no")
+    return RFQ_no
+
+def submit_form(quotation=None):
+    """Automate the RFQ process for the latest pending RFQ_no in the transaction store."""
+    # Load the latest RFQ sent to procurement; earlier stages are still being created
+    ready = bc_store.at_stage("rfq", "sent_to_procurement")
+
+    if not ready:
+        print("No RFQ sent to procurement found in the transaction store.")
         return
-    
-    RFQ_no = extracted_data.get("RFQ_no")
-    
-    if not RFQ_no:
-        print("RFQ number not found in the extracted data.")
-        return
-    
-    print(f"Using RFQ_no from extracted data: {RFQ_no}")
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        page = browser.new_page()
-
-        try:
-            # Login to the platform
-            page.goto("https://login.microsoftonline.com/dayliffCloud.onmicrosoft.com/wsfed?wa=wsignin1.0&wtrealm=https%3a%2f%2fdayliffCloud.onmicrosoft.com%2fbusinesscentral&wreply=https%3a%2f%2fbctest.dayliff.com%2fBC160%2fSignIn%3fReturnUrl%3d%252fBC160%252f")
-            page.get_by_placeholder("someone@example.com").fill(os.getenv("EMAIL"))
-            page.get_by_role("button", name="Next").click()
-            page.get_by_placeholder("Password").fill(os.getenv("PASSWORD"))
-            page.get_by_role("button", name="Sign in").click()
-            page.get_by_role("button", name="No").click()
-            page.goto("https://bctest.dayliff.com/BC160/")
-
-            # Example of utilizing the RFQ_no in the automation process
-            frame = page.frame_locator("iframe[title='Main Content']").first
-            page.goto("https://bctest.dayliff.com/BC160/?company=KENYA&bookmark=29%3busMAAAJ7%2f1AAUgAwADAAMAAyADUAMwA3&page=50152&dc=0")
-
-            frame.get_by_text("Search").click()
-            frame.get_by_placeholder("Search").fill(RFQ_no)
 
-            frame.get_by_role("button", name=f"No., {RFQ_no}").click()
-            
-            frame.get_by_label("General, Show more").click()
+    RFQ_no = ready[0]["number"]
+    print(f"Using RFQ_no from the transaction store: {RFQ_no}")
 
-            frame.get_by_role("button", name="Doc. Links File Drop").click()
-            frame.get_by_role("menuitem", name="Upload").locator("div").first.click() 
-            frame.get_by_role("textbox").click()
-
-            #time for human to select file
-            time.sleep(100)
-
-            frame.get_by_role("menuitem", name="Process").click()
-            frame.get_by_role("menuitem", name="Complete Action").click()
+    try:
+        quotation = find_quotation(RFQ_no, quotation)
+    except FileNotFoundError as e:
+        print(f"An error occurred: {str(e)}")
+        return
 
-            frame.get_by_role("button", name="Yes").click()
+    # Hand the job to the warm browser daemon when one is running; it may run from another directory
+    reply = bc_daemon.run_or_none("action", RFQ_no=RFQ_no, quotation=quotation)
+    if reply is not None:
+        return reply.get("result")
 
-            take_screenshot(page, f"page quated_{RFQ_no}")  
-            time.sleep(10)
-            
-            print(f"Navigated to RFQ page using RFQ_no: {RFQ_no}")
-            take_screenshot(page, f"RFQ_page_{RFQ_no}")
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        page = None
 
-            print(f"RFQ action performed successfully: {RFQ_no}")
+        try:
+            # Login to the platform, reusing the cached session when possible
+            begin()
+            context, page = open_session(browser, os.getenv("EMAIL"), os.getenv("PASSWORD"))
+            return run_stage(page, RFQ_no, quotation)
 
         except Exception as e:
-            error_screenshot = take_screenshot(page, "Error")
-            print(f"An error occurred: {str(e)}. Screenshot saved at {error_screenshot}.")
+            error_screenshot = record_failure(page) if page else None
+            print(f"An error occurred ({classify(e)}, after {spent()} retries): {str(e)}. Screenshot saved at {error_screenshot}.")
 
         finally:
             browser.close()
 
 if __name__ == "__main__":
-    submit_form()
+    parser = argparse.ArgumentParser(description="Attach the quotation to the latest pending RFQ and complete its action.")
+    parser.add_argument("--quotation", help=f"Quotation file (defaults to the one recorded for the RFQ, then {QUOTATION_DIR}/<RFQ_no>.*)")
+    submit_form(parser.parse_args().quotation)
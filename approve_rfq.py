@@ -1,110 +1,76 @@
-import re
 import os
-import time
-import json
 from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright, Page
+import bc_daemon
+import bc_store
+from bc_evidence import record_failure, take_screenshot
+from bc_retry import begin, classify, spent
+from bc_selectors import (
+    SHOW_MORE, TOGGLE_FACTBOX, REQUEST_APPROVAL, SEND_APPROVAL_REQUEST, LOOK_UP_VALUE, APPROVER, OK
+)
+from bc_trace import bind, step, unbind
+from bc_links import open_document
+from bc_session import launch_browser, open_session
+from bc_wait import wait_until_idle
 
 load_dotenv()  # Load environment variables from .env file
 
-def take_screenshot(page: Page, step_name: str) -> str:
-    """Take a screenshot and save it with a specified step name."""
-    screenshot_dir = "screenshots"
-    os.makedirs(screenshot_dir, exist_ok=True)
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    screenshot_path = os.path.join(screenshot_dir, f"{step_name}_{timestamp}.png")
-    page.screenshot(path=screenshot_path)
-    print(f"Screenshot taken: {screenshot_path}")
-    return screenshot_path
+def run_stage(page: Page, RFQ_no):
+    """Send an approval request for an RFQ on an already logged-in page."""
+    # Open the RFQ card, straight from its cached link when there is one
+    bind(RFQ_no=RFQ_no)
+    with step("approve.open"):
+        frame = open_document(page, RFQ_no)
 
-def save_extracted_data(new_data, filename="extracted_data.json"):
-    """Save extracted data into a JSON file, updating without erasing previous entries."""
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            try:
-                data = json.load(f)
-                if not isinstance(data, list):
-                    data = [data]  # Ensure data is stored as a list
-            except json.JSONDecodeError:
-                data = []
-    else:
-        data = []
-    
-    data.append(new_data)
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=4)
-    print(f"Extracted data updated in {filename}.")
+    with step("approve.send_approval_request"):
+        frame.get_by_label(SHOW_MORE).click()
+        frame.get_by_role("button", name=TOGGLE_FACTBOX).click()
 
-def get_latest_entry(filename="extracted_data.json"):
-    """Retrieve the latest entry from the JSON file."""
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            try:
-                data = json.load(f)
-                if isinstance(data, list) and data:
-                    return data[-1]  # Return the most recent entry
-            except json.JSONDecodeError:
-                print("Error reading JSON file.")
-    return None  # Return None if file doesn't exist or is empty
+        frame.get_by_role("menuitem", name=REQUEST_APPROVAL).click()
+        frame.get_by_role("menuitem", name=SEND_APPROVAL_REQUEST).click()
 
-def submit_form():
-    """Automate the RFQ process and retrieve the RFQ_no from extracted data."""
-    # Load extracted data
-    extracted_data = get_latest_entry()
-    
-    if not extracted_data:
-        print("No data found in extracted_data.json.")
-        return
-    
-    RFQ_no = extracted_data.get("RFQ_no")
-    
-    if not RFQ_no:
-        print("RFQ number not found in the extracted data.")
-        return
-    
-    print(f"Using RFQ_no from extracted data: {RFQ_no}")
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        page = browser.new_page()
+        frame.get_by_label(LOOK_UP_VALUE).click()
+        frame.get_by_label(APPROVER).click()
+        frame.get_by_role("button", name=OK).click()
+        wait_until_idle(frame)
 
-        try:
-            # Login to the platform
-            page.goto("https://login.microsoftonline.com/dayliffCloud.onmicrosoft.com/wsfed?wa=wsignin1.0&wtrealm=https%3a%2f%2fdayliffCloud.onmicrosoft.com%2fbusinesscentral&wreply=https%3a%2f%2fbctest.dayliff.com%2fBC160%2fSignIn%3fReturnUrl%3d%252fBC160%252f")
-            page.get_by_placeholder("someone@example.com").fill(os.getenv("EMAIL"))
-            page.get_by_role("button", name="Next").click()
-            page.get_by_placeholder("Password").fill(os.getenv("PASSWORD"))
-            page.get_by_role("button", name="Sign in").click()
-            page.get_by_role("button", name="No").click()
-            page.goto("https://bctest.dayliff.com/BC160/")
+    take_screenshot(page, f"RFQ_page_{RFQ_no}")
 
-            # Example of utilizing the RFQ_no in the automation process
-            frame = page.frame_locator("iframe[title='Main Content']").first
-            page.goto("https://bctest.dayliff.com/BC160/?company=KENYA&bookmark=29%3busMAAAJ7%2f1AAUgAwADAAMAAyADUAMwA3&page=50152&dc=0")
+    print(f"send RFQ approval request performed successfully: {RFQ_no}")
+    bc_store.record("rfq", RFQ_no, "approval_requested")
+    unbind("RFQ_no")
+    return RFQ_no
+
+def submit_form():
+    """Automate the RFQ process for the latest pending RFQ_no in the transaction store."""
+    # Load the latest actioned RFQ; earlier stages are not ready to be sent for approval
+    actioned = bc_store.at_stage("rfq", "actioned")
 
-            frame.get_by_text("Search").click()
-            frame.get_by_placeholder("Search").fill(RFQ_no)
+    if not actioned:
+        print("No actioned RFQ found in the transaction store.")
+        return
 
-            frame.get_by_role("button", name=f"No., {RFQ_no}").click()
-            
-            frame.get_by_label("General, Show more").click()
-            frame.get_by_role("button", name="Toggle FactBox").click()
-            
-            frame.get_by_role("menuitem", name="Request Approval").click()
-            frame.get_by_role("menuitem", name="Send Approval Request").click()
-            
-            frame.get_by_label("Look up value").click()
-            frame.get_by_label("User ID, ICTTEST").click()
-            frame.get_by_role("button", name="OK").click()
-            time.sleep(5)
+    RFQ_no = actioned[0]["number"]
+    print(f"Using RFQ_no from the transaction store: {RFQ_no}")
+    
+    # Hand the job to the warm browser daemon when one is running
+    reply = bc_daemon.run_or_none("approve", RFQ_no=RFQ_no)
+    if reply is not None:
+        return reply.get("result")
 
-            take_screenshot(page, f"RFQ_page_{RFQ_no}")
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        page = None
 
-            print(f"send RFQ approval request performed successfully: {RFQ_no}")
+        try:
+            # Login to the platform, reusing the cached session when possible
+            begin()
+            context, page = open_session(browser, os.getenv("EMAIL"), os.getenv("PASSWORD"))
+            return run_stage(page, RFQ_no)
 
         except Exception as e:
-            error_screenshot = take_screenshot(page, "Error")
-            print(f"An error occurred: {str(e)}. Screenshot saved at {error_screenshot}.")
+            error_screenshot = record_failure(page) if page else None
+            print(f"An error occurred ({classify(e)}, after {spent()} retries): {str(e)}. Screenshot saved at {error_screenshot}.")
 
         finally:
             browser.close()
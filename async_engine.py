@@ -0,0 +1,613 @@
+import os
+import re
+import time
+import asyncio
+import argparse
+from dotenv import load_dotenv
+from playwright.async_api import async_playwright, expect, Page, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+import bc_store
+import bc_session
+import bc_evidence
+import bc_vendors
+from action_RFQ import find_quotation
+from bc_lines import DEFAULT_DESCRIPTION, DEFAULT_LINES, LINE_FIELDS, LINE_LABELS, line_cell, load_lines
+from bc_links import LIST_URLS, remember
+from bc_recycle import ContextLife, heap_and_nodes
+from bc_retry import DIALOG_SELECTOR, STEP_RETRIES, TransientError, begin, charge, classify, spent
+from bc_session import BC_URL, LOGIN_URL, RFQ_LIST_URL, VENDOR_LIST_URL, MAIN_FRAME, HEADLESS, main_frame
+from bc_selectors import (
+    VENDOR_NO_PATTERN, RFQ_NO_PATTERN, EMAIL_BOX, PASSWORD_BOX, NEXT, SIGN_IN, STAY_SIGNED_IN_NO, SEARCH,
+    SEARCH_RESULT, NEW, PROCESS, SHOW_MORE, TOGGLE_FACTBOX, CONFIRM, VENDOR_NEW_FOCUS, VENDOR_NAME,
+    REGISTRATION, PIN_NO, REQUISITION_TYPE, REQUISITION_TYPE_RFQ, NEW_DESCRIPTION, DESCRIPTION, LINE_ROW,
+    SEND_TO_PROCUREMENT, FILE_DROP, UPLOAD, COMPLETE_ACTION, REQUEST_APPROVAL, SEND_APPROVAL_REQUEST,
+    LOOK_UP_VALUE, APPROVER, OK
+)
+from bc_trace import bind, step, unbind
+from bc_wait import BUSY_SELECTOR, HEADER_SELECTOR, timeout_for
+
+load_dotenv()  # Load environment variables from .env file
+
+# Async counterparts of the stage scripts. Every document runs as a task on one event
+# loop, so a single process can keep many BC pages busy at once. URLs, selectors, line specs,
+# bookmarks, retry budgets and recycling ceilings come from the same modules as the sync scripts;
+# keep the steps below in step with the scripts they mirror (tests/test_engines.py checks them).
+
+async def take_screenshot(page: Page, step_name: str):
+    """Take a success screenshot if the mode and sampling allow it. Returns its path or None."""
+    if not bc_evidence.should_capture():
+        return None
+    return bc_evidence.store_screenshot(await page.screenshot(type="jpeg", quality=bc_evidence.JPEG_QUALITY), step_name)
+
+async def record_failure(page: Page, step_name: str = "Error"):
+    """Capture a failure screenshot and keep the page's trace. Returns the screenshot path."""
+    if bc_evidence.TRACE_ON_FAILURE:
+        path = bc_evidence.trace_path(step_name)
+        try:
+            await page.context.tracing.stop_chunk(path=path)
+            await page.context.tracing.start_chunk()
+            print(f"Trace saved: {path}")
+        except Exception as e:
+            print(f"Could not save trace: {str(e)}")
+    try:
+        data = await page.screenshot(type="jpeg", quality=bc_evidence.JPEG_QUALITY)
+    except Exception as e:
+        print(f"Could not take failure screenshot: {str(e)}")
+        return None
+    return bc_evidence.store_screenshot(data, step_name)
+
+async def drop_trace(context):
+    """Discard the trace recorded since the last chunk after a successful job."""
+    if bc_evidence.TRACE_ON_FAILURE:
+        try:
+            await context.tracing.stop_chunk()
+            await context.tracing.start_chunk()
+        except Exception:
+            pass
+
+# Retries (see bc_retry; the budget is per task)
+
+async def dialog_text(scope):
+    """Return the text of the dialog BC is showing on a page or frame, or ""."""
+    if scope is None:
+        return ""
+    try:
+        dialog = scope.locator(DIALOG_SELECTOR).last
+        return await dialog.inner_text(timeout=500) if await dialog.is_visible() else ""
+    except PlaywrightError:
+        return ""
+
+async def dismiss_dialog(scope):
+    """Close a BC error dialog so the retried step starts from the card again."""
+    if scope is None:
+        return
+    try:
+        dialog = scope.locator(DIALOG_SELECTOR).last
+        if not await dialog.is_visible():
+            return
+        for name in ("OK", "Close"):
+            button = dialog.get_by_role("button", name=name, exact=True)
+            if await button.count():
+                await button.first.click(timeout=2000)
+                return
+    except PlaywrightError:
+        pass
+
+async def retry(name, action, *args, scope=None, attempts=None, **kwargs):
+    """Await an idempotent step, retrying transient failures with jittered backoff within the task's budget."""
+    attempts = STEP_RETRIES if attempts is None else attempts
+    attempt = 0
+    while True:
+        try:
+            return await action(*args, **kwargs)
+        except Exception as e:
+            delay = charge(name, e, attempt, attempts, classify(e, dialog=await dialog_text(scope)))
+            if delay is None:
+                raise
+            attempt += 1
+            with step("retry", of=name, attempt=attempt, delay=round(delay, 2), error=str(e)[:200]):
+                await dismiss_dialog(scope)
+                await asyncio.sleep(delay)
+
+# Session
+
+async def configure_context(context, block=None):
+    """Install request routing that drops non-essential resources and start failure tracing on a new context."""
+    if bc_session.BLOCK_RESOURCES if block is None else block:
+        async def handle(route):
+            if bc_session.is_blocked(route.request):
+                await route.abort()
+            else:
+                await route.continue_()
+        await context.route("**/*", handle)
+    if bc_evidence.TRACE_ON_FAILURE:
+        await context.tracing.start(screenshots=True, snapshots=True)
+    return context
+
+async def login(page: Page, email: str, password: str):
+    """Sign in to Business Central through the Microsoft wsfed flow and open BC160."""
+    await page.goto(LOGIN_URL)
+    await page.get_by_placeholder(EMAIL_BOX).fill(email)
+    await page.get_by_role("button", name=NEXT).click()
+    await page.get_by_placeholder(PASSWORD_BOX).fill(password)
+    await page.get_by_role("button", name=SIGN_IN).click()
+    await page.get_by_role("button", name=STAY_SIGNED_IN_NO).click()
+    await page.goto(BC_URL)
+
+async def is_logged_in(page: Page) -> bool:
+    """Check that the page reached BC160 instead of being redirected to the sign-in page."""
+    if not page.url.startswith(BC_URL):
+        return False
+    try:
+        await page.wait_for_selector(MAIN_FRAME, state="attached", timeout=15000)
+    except Exception:
+        return False
+    return True
+
+async def open_session(browser, email: str, password: str, block=None):
+    """Return a (context, page) pair logged in to BC160, reusing the cached session when it is still valid."""
+    cached = bc_session.load_cached_session(email)
+    if cached:
+        context = await configure_context(await browser.new_context(storage_state=cached), block)
+        page = await context.new_page()
+        with step("session.restore") as event:
+            await page.goto(BC_URL)
+            event["valid"] = await is_logged_in(page)
+        if event["valid"]:
+            print(f"Reusing cached session for {email.strip()}.")
+            return context, page
+
+        # Session expired or was redirected to sign in, log in again once
+        print(f"Cached session for {email.strip()} is no longer valid. Logging in again.")
+        await context.close()
+        bc_session.clear_session(email)
+
+    context = await configure_context(await browser.new_context(), block)
+    page = await context.new_page()
+    with step("login"):
+        await retry("login", login, page, email, password, scope=page)
+    os.makedirs(bc_session.SESSION_DIR, exist_ok=True)
+    path = bc_session.session_path(email)
+    await context.storage_state(path=path)
+    print(f"Session saved to {path}.")
+    return context, page
+
+# Recycling (see bc_recycle)
+
+async def memory(page: Page):
+    """Return the page's JS heap in MB and DOM node count from the CDP performance metrics."""
+    cdp = await page.context.new_cdp_session(page)
+    try:
+        await cdp.send("Performance.enable")
+        return heap_and_nodes(await cdp.send("Performance.getMetrics"))
+    finally:
+        await cdp.detach()
+
+async def job_done(life, page: Page):
+    """Count a finished job and return why the context should be recycled now, or None."""
+    if not life.count():
+        return life.worn()
+    try:
+        life.last = await memory(page)
+    except Exception as e:
+        # A page that cannot report its metrics is not worth keeping either
+        return f"no memory metrics ({str(e)})"
+    return life.worn()
+
+async def recycle(browser, context, email, password, life, reason):
+    """Close a worn context and return a fresh (context, page) from the account's cached login."""
+    with step("context.recycle", reason=reason, jobs=life.jobs, **life.last):
+        try:
+            await context.close()
+        except Exception:
+            pass
+        life.recycled()
+        return await open_session(browser, email, password)
+
+# Waits
+
+async def wait_until_idle(frame, timeout=None):
+    """Wait until the BC busy indicator has cleared in the frame."""
+    await frame.locator(BUSY_SELECTOR).first.wait_for(state="hidden", timeout=timeout or timeout_for("idle"))
+
+async def wait_for_page(page: Page, frame, menu_item="New", timeout=None):
+    """Wait until a BC page has rendered its action bar inside the main content frame."""
+    timeout = timeout or timeout_for("page")
+    await page.wait_for_load_state("domcontentloaded", timeout=timeout)
+    await frame.get_by_role("menuitem", name=menu_item, exact=True).first.wait_for(state="visible", timeout=timeout)
+
+async def wait_for_header(frame, pattern: str, timeout=None) -> str:
+    """Wait until the card heading contains a document number matching pattern and return its text."""
+    header = frame.locator(HEADER_SELECTOR).first
+    await expect(header).to_have_text(re.compile(pattern), timeout=timeout or timeout_for("header"))
+    return await header.text_content()
+
+async def wait_for_committed(frame, field: str, value: str, timeout=None):
+    """Wait until BC has accepted a field value, which it reflects in the field's aria label."""
+    await frame.get_by_label(f"{field}, {value}".strip()).first.wait_for(state="attached", timeout=timeout or timeout_for("commit"))
+    await wait_until_idle(frame)
+
+async def wait_for_dialog(frame, button="Yes", timeout=None):
+    """Wait until a confirmation dialog with the given button is shown and return the button."""
+    locator = frame.get_by_role("button", name=button)
+    await locator.wait_for(state="visible", timeout=timeout or timeout_for("dialog"))
+    return locator
+
+# Navigation (see bc_links)
+
+async def open_list(page: Page, frame, url):
+    """Load a list page and wait for its action bar, retrying a slow or failed load."""
+    async def load():
+        await page.goto(url)
+        await wait_for_page(page, frame)
+    await retry("open_list", load, scope=frame)
+
+async def open_by_bookmark(page: Page, frame, number, url) -> bool:
+    """Open a card from its cached URL and check it shows the expected document."""
+    await page.goto(url)
+    # wait_for_header is built on expect(), which raises AssertionError when the heading never shows the number
+    try:
+        await wait_for_header(frame, re.escape(number))
+        return True
+    except (PlaywrightTimeoutError, AssertionError):
+        return False
+
+async def open_by_search(page: Page, frame, number, kind):
+    """Open a card by searching for its number on the list page."""
+    await page.goto(LIST_URLS[kind])
+    await frame.get_by_text(SEARCH).click()
+    await frame.get_by_placeholder(SEARCH).fill(number)
+    await frame.get_by_role("button", name=SEARCH_RESULT.format(number)).click()
+    await wait_for_header(frame, re.escape(number))
+
+async def open_document(page: Page, number, kind="rfq"):
+    """Navigate to the card for an RFQ or vendor number, using the cached link when there is one."""
+    frame = main_frame(page)
+    url = bc_store.get_bookmark(number)
+    if url:
+        if await open_by_bookmark(page, frame, number, url):
+            return frame
+        print(f"Cached link for {number} no longer opens it. Searching instead.")
+        bc_store.forget_bookmark(number)
+
+    await retry("open_document", open_by_search, page, frame, number, kind, scope=frame)
+    remember(page, number)
+    return frame
+
+# Stages
+
+async def create_vendor(page: Page, vendor_name, pin_no):
+    """Create a vendor card and return its vendor number."""
+    frame = main_frame(page)
+    with step("vendor.navigate"):
+        await open_list(page, frame, VENDOR_LIST_URL)
+
+    with step("vendor.new"):
+        await frame.get_by_role("menuitem", name=NEW, exact=True).click()
+        await frame.get_by_label(VENDOR_NEW_FOCUS).click()
+
+    with step("vendor.header") as event:
+        match = re.search(VENDOR_NO_PATTERN, await wait_for_header(frame, VENDOR_NO_PATTERN))
+        vendor_no = event["vendor_no"] = match.group(0) if match else None
+    if not vendor_no:
+        raise RuntimeError("Vendor number not found.")
+    bind(vendor_no=vendor_no)
+    remember(page, vendor_no)
+    bc_store.record("vendor", vendor_no, "created", vendor_name=vendor_name, pin_no=pin_no)
+
+    with step("vendor.name"):
+        name = frame.get_by_label(VENDOR_NAME)
+        await name.click()
+        await name.fill(vendor_name)
+        await name.press("Enter")
+        await wait_for_committed(frame, "Name", vendor_name)
+
+        await frame.get_by_label(SHOW_MORE).click()
+        await frame.get_by_role("button", name=TOGGLE_FACTBOX).click()
+        await wait_until_idle(frame)
+    bc_store.record("vendor", vendor_no, "name_entered")
+
+    with step("vendor.registration"):
+        await frame.get_by_role("button", name=REGISTRATION).click()
+        pin = frame.get_by_role("textbox", name=PIN_NO)
+        await pin.click()
+        await pin.fill(pin_no)
+        await pin.press("Enter")
+        await wait_for_committed(frame, "PIN No.", pin_no)
+    bc_store.record("vendor", vendor_no, "registered")
+    bc_vendors.remember(vendor_no, vendor_name, pin_no)
+
+    with step("vendor.screenshot"):
+        await take_screenshot(page, "Vendor_Creation_Success")
+    print(f"Vendor created successfully: {vendor_no}")
+    unbind("vendor_no")
+    return vendor_no
+
+async def enter_line(frame, row, line):
+    """Fill one line row, committing each value with Tab."""
+    location = line_cell(row, "location_code")
+    if await location.count() and await location.input_value() != line["location_code"]:
+        await location.fill(line["location_code"])
+        await location.press("Tab")
+
+    await line_cell(row, "type").select_option(line["type"])
+    await wait_until_idle(frame)
+
+    await line_cell(row, "no").fill(line["no"])
+    await line_cell(row, "no").press("Tab")
+    await wait_for_committed(row, "No.", line["no"])
+    await wait_until_idle(frame)
+
+    await line_cell(row, "quantity").fill(line["quantity"])
+    await line_cell(row, "quantity").press("Tab")
+    if line["source_doc_type"]:
+        await line_cell(row, "source_doc_type").select_option(line["source_doc_type"])
+    for field in ("source_no", "source_line_no"):
+        if line[field]:
+            await line_cell(row, field).fill(line[field])
+            await line_cell(row, field).press("Tab")
+    await wait_until_idle(frame)
+
+async def check_line(row, line, number):
+    """Raise if a row does not show every value of its line once BC has processed it."""
+    for field in LINE_FIELDS:
+        cell = line_cell(row, field)
+        if not line[field] or (field == "location_code" and not await cell.count()):
+            continue
+        try:
+            await expect(cell).to_have_value(line[field], timeout=timeout_for("commit"))
+        except AssertionError:
+            # A lost commit is worth entering again; a rejected value also shows a BC error dialog
+            raise TransientError(f"Line {number} was not committed: {LINE_LABELS[field]} is '{await cell.input_value()}', expected '{line[field]}'.")
+
+async def create_rfq(page: Page, vendor_no=None, lines=None, description=None):
+    """Create an RFQ with the given lines (default: the single default line), send it to procurement and return its RFQ number."""
+    lines = lines or DEFAULT_LINES
+    description = description or DEFAULT_DESCRIPTION
+    frame = main_frame(page)
+    bind(vendor_no=vendor_no)
+    with step("rfq.navigate"):
+        await open_list(page, frame, RFQ_LIST_URL)
+
+    with step("rfq.new"):
+        await frame.get_by_role("menuitem", name=NEW).click()
+        await frame.get_by_label(REQUISITION_TYPE).select_option(REQUISITION_TYPE_RFQ)
+        await wait_until_idle(frame)
+
+        await frame.get_by_label(SHOW_MORE).click()
+        await frame.get_by_role("button", name=TOGGLE_FACTBOX).click()
+        await wait_until_idle(frame)
+
+    with step("rfq.header") as event:
+        await frame.get_by_role("textbox", name=NEW_DESCRIPTION).click()
+        match = re.search(RFQ_NO_PATTERN, await wait_for_header(frame, RFQ_NO_PATTERN))
+        RFQ_no = event["RFQ_no"] = match.group(0) if match else None
+    if not RFQ_no:
+        raise RuntimeError("RFQ number not found.")
+    bind(RFQ_no=RFQ_no)
+    remember(page, RFQ_no)
+    bc_store.record("rfq", RFQ_no, "created", parent=vendor_no, lines=lines, description=description, lines_done=0)
+
+    with step("rfq.description"):
+        description_box = frame.get_by_role("textbox", name=DESCRIPTION)
+        if await description_box.input_value() != description:
+            await description_box.fill(description)
+            await description_box.press("Tab")
+            await wait_until_idle(frame)
+
+    # BC keeps one blank row under the entered lines; each line is filled into it and a new one appears
+    rows = frame.get_by_role("row", name=LINE_ROW)
+    await rows.last.wait_for(state="visible", timeout=timeout_for("page"))
+    first_row = await rows.count() - 1
+    for number, line in enumerate(lines, start=1):
+        with step("rfq.line", line=number, item=line["no"]):
+            row = rows.nth(first_row + number - 1)
+            await row.wait_for(state="attached", timeout=timeout_for("commit"))
+
+            async def enter():
+                await enter_line(frame, row, line)
+                await check_line(row, line, number)
+            # Filling a row again is harmless, so a slow or conflicting commit only repeats this line
+            await retry("rfq.line", enter, scope=frame)
+        bc_store.annotate(RFQ_no, lines_done=number)
+    bc_store.record("rfq", RFQ_no, "lines_entered")
+
+    with step("rfq.send_to_procurement"):
+        await frame.get_by_role("menuitem", name=PROCESS).click()
+        await frame.get_by_role("menuitem", name=SEND_TO_PROCUREMENT).click()
+        confirm = await wait_for_dialog(frame, CONFIRM)
+        await take_screenshot(page, "RFQ_created")
+        await confirm.click()
+        await wait_until_idle(frame)
+
+    bc_store.record("rfq", RFQ_no, "sent_to_procurement")
+    print(f"RFQ created successfully: {RFQ_no}")
+    unbind("vendor_no", "RFQ_no")
+    return RFQ_no
+
+async def upload_quotation(frame, quotation):
+    """Attach a file through the Doc. Links upload dialog and wait until BC has stored it."""
+    await frame.get_by_role("button", name=FILE_DROP).click()
+    await frame.get_by_role("menuitem", name=UPLOAD).locator("div").first.click()
+    dialog = frame.get_by_role("dialog", name=UPLOAD)
+    await dialog.locator("input[type='file']").set_input_files(quotation, timeout=timeout_for("dialog"))
+    await dialog.wait_for(state="hidden", timeout=timeout_for("commit"))
+    await wait_until_idle(frame)
+
+async def action_rfq(page: Page, RFQ_no, quotation=None):
+    """Attach the quotation and complete the action on an RFQ."""
+    quotation = find_quotation(RFQ_no, quotation)
+    bind(RFQ_no=RFQ_no)
+    with step("action.open"):
+        frame = await open_document(page, RFQ_no)
+
+    with step("action.upload", file=os.path.basename(quotation)):
+        await frame.get_by_label(SHOW_MORE).click()
+        await upload_quotation(frame, quotation)
+
+    with step("action.complete_action"):
+        await frame.get_by_role("menuitem", name=PROCESS).click()
+        await frame.get_by_role("menuitem", name=COMPLETE_ACTION).click()
+        confirm = await wait_for_dialog(frame, CONFIRM)
+        await take_screenshot(page, f"page quated_{RFQ_no}")
+        await confirm.click()
+        await wait_until_idle(frame)
+
+    await take_screenshot(page, f"RFQ_page_{RFQ_no}")
+    bc_store.record("rfq", RFQ_no, "actioned", quotation=quotation)
+    print(f"RFQ action performed successfully: {RFQ_no}")
+    unbind("RFQ_no")
+    return RFQ_no
+
+async def approve_rfq(page: Page, RFQ_no):
+    """Send an approval request for an RFQ."""
+    bind(RFQ_no=RFQ_no)
+    with step("approve.open"):
+        frame = await open_document(page, RFQ_no)
+
+    with step("approve.send_approval_request"):
+        await frame.get_by_label(SHOW_MORE).click()
+        await frame.get_by_role("button", name=TOGGLE_FACTBOX).click()
+        await frame.get_by_role("menuitem", name=REQUEST_APPROVAL).click()
+        await frame.get_by_role("menuitem", name=SEND_APPROVAL_REQUEST).click()
+        await frame.get_by_label(LOOK_UP_VALUE).click()
+        await frame.get_by_label(APPROVER).click()
+        await frame.get_by_role("button", name=OK).click()
+        await wait_until_idle(frame)
+
+    await take_screenshot(page, f"RFQ_page_{RFQ_no}")
+    bc_store.record("rfq", RFQ_no, "approval_requested")
+    print(f"send RFQ approval request performed successfully: {RFQ_no}")
+    unbind("RFQ_no")
+    return RFQ_no
+
+async def rfq_to_po(page: Page, RFQ_no):
+    """Request approval to convert an RFQ to a purchase order."""
+    bind(RFQ_no=RFQ_no)
+    with step("po.open"):
+        frame = await open_document(page, RFQ_no)
+
+    with step("po.request_approval"):
+        await frame.get_by_label(SHOW_MORE).click()
+        await frame.get_by_role("button", name=TOGGLE_FACTBOX).click()
+        await frame.get_by_role("menuitem", name=REQUEST_APPROVAL).click()
+
+    await take_screenshot(page, f"RFQ_page_{RFQ_no}")
+    bc_store.record("rfq", RFQ_no, "po_requested")
+    print(f"RFQ approved performed successfully: {RFQ_no}")
+    unbind("RFQ_no")
+    return RFQ_no
+
+# Engine
+
+async def run_many(jobs, handler, email, password, concurrency=8, headless=None):
+    """Run handler(page, job) for every job on one event loop, at most `concurrency` at a time.
+
+    Each in-flight job gets its own logged-in page and retry budget; pages are reused once a job finishes
+    and their context is replaced past the bc_recycle ceilings. Returns one result dict per job, in input order.
+    """
+    jobs = list(jobs)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=HEADLESS if headless is None else headless)
+        try:
+            # Log in once up front so every page starts from the cached session
+            context, _ = await open_session(browser, email, password)
+            await context.close()
+
+            sessions = await asyncio.gather(*(open_session(browser, email, password) for _ in range(min(concurrency, len(jobs)))))
+            slots = asyncio.Queue()
+            for worker_id, (context, page) in enumerate(sessions):
+                slots.put_nowait({"worker": worker_id, "context": context, "page": page, "life": ContextLife()})
+
+            async def run_job(index, job):
+                # Each job is its own task, so its bound trace fields and retry budget are its own too
+                slot = await slots.get()
+                page = slot["page"]
+                bind(worker=slot["worker"], job=index)
+                begin()
+                try:
+                    result = {"status": "ok", "result": await handler(page, job)}
+                    await drop_trace(page.context)
+                except Exception as e:
+                    print(f"[worker {slot['worker']}] Job {index} failed: {str(e)}")
+                    result = {"status": "error", "error": str(e), "error_kind": classify(e),
+                              "screenshot": await record_failure(page, f"job_{index}")}
+                result["retries"] = spent()
+                result["worker"] = slot["worker"]
+
+                try:
+                    reason = await job_done(slot["life"], page)
+                    if reason:
+                        print(f"[worker {slot['worker']}] Recycling its browser context: {reason}.")
+                        slot["context"], slot["page"] = await recycle(browser, slot["context"], email, password, slot["life"], reason)
+                except Exception as e:
+                    print(f"[worker {slot['worker']}] Could not recycle its browser context: {str(e)}")
+                finally:
+                    slots.put_nowait(slot)
+                return result
+
+            return await asyncio.gather(*(run_job(index, job) for index, job in enumerate(jobs)))
+        finally:
+            await browser.close()
+
+STAGES = {
+    "rfq": create_rfq,
+    "action": action_rfq,
+    "approve": approve_rfq,
+    "po": rfq_to_po,
+}
+
+# Stage an RFQ must be at to be picked up by --pending, as in the sync scripts
+READY_AT = {"action": "sent_to_procurement", "approve": "actioned", "po": "approval_requested"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run workflow stages for many documents concurrently on one event loop.")
+    parser.add_argument("stage", choices=["vendors", *STAGES])
+    parser.add_argument("items", nargs="*", help="RFQ numbers, vendor numbers for 'rfq', or a CSV/JSONL vendor file for 'vendors'")
+    parser.add_argument("--pending", action="store_true", help="Use every RFQ in the store ready for this stage (action, approve, po)")
+    parser.add_argument("--lines", help="CSV, JSON or JSONL line spec for every RFQ of the 'rfq' stage (default: one default line)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    email, password = os.getenv("EMAIL"), os.getenv("PASSWORD")
+    if not email or not password:
+        parser.error("EMAIL and PASSWORD must be set in .env.")
+    if args.pending and args.stage not in READY_AT:
+        parser.error(f"--pending works with {', '.join(READY_AT)}.")
+
+    if args.stage == "vendors":
+        from batch_vendors import load_rows, precheck
+        rows = [row for filename in args.items for row in load_rows(filename)]
+        # Skip vendors the local index already has, or that repeat an earlier row, before they use up a vendor number
+        skipped, todo = precheck(rows, bc_vendors.load_index())
+        for position, result in sorted(skipped.items()):
+            row = rows[position]
+            reason = f"already exists as {result['vendor_no']}" if result["status"] == "ok" else result["error"]
+            print(f"Skipping {row['vendor_name']} ({row['pin_no']}): {reason}.")
+        jobs = [rows[position] for position in todo]
+        handler = lambda page, row: create_vendor(page, row["vendor_name"], row["pin_no"])
+    elif args.stage == "rfq":
+        jobs = list(args.items)
+        try:
+            description, lines = load_lines(args.lines) if args.lines else (None, None)
+        except (OSError, ValueError) as e:
+            parser.error(f"could not read the RFQ lines: {str(e)}")
+        handler = lambda page, vendor_no: create_rfq(page, vendor_no, lines, description)
+    else:
+        jobs = list(args.items)
+        if args.pending:
+            jobs += [record["number"] for record in reversed(bc_store.at_stage("rfq", READY_AT[args.stage]))]
+        handler = STAGES[args.stage]
+
+    if not jobs:
+        print("Nothing to do.")
+        return
+
+    started = time.perf_counter()
+    results = asyncio.run(run_many(jobs, handler, email.strip(), password.strip(), args.concurrency))
+    elapsed = time.perf_counter() - started
+    succeeded = sum(1 for result in results if result["status"] == "ok")
+    print(f"{succeeded}/{len(jobs)} succeeded in {elapsed:.1f} s.")
+
+if __name__ == "__main__":
+    main()
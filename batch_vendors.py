@@ -0,0 +1,108 @@
+import os
+import csv
+import json
+import argparse
+from dotenv import load_dotenv
+from playwright.sync_api import sync_playwright
+
+import bc_api
+import bc_vendors
+import create_vendor
+from bc_accounts import load_accounts
+from bc_pool import run_pool
+
+load_dotenv()  # Load environment variables from .env file
+
+def load_rows(filename):
+    """Load (vendor_name, pin_no) rows from a CSV file with a header or from a JSONL file."""
+    rows = []
+    with open(filename, "r", newline="") as f:
+        if filename.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    rows.append(json.loads(line))
+        else:
+            rows = list(csv.DictReader(f))
+
+    for number, row in enumerate(rows, start=1):
+        if not row.get("vendor_name") or not row.get("pin_no"):
+            raise ValueError(f"Row {number} in {filename} needs vendor_name and pin_no.")
+    return [{"vendor_name": row["vendor_name"].strip(), "pin_no": str(row["pin_no"]).strip()} for row in rows]
+
+def create_vendor_job(page, row):
+    """Create one vendor on a worker page and return its vendor number, or the existing one's when BC already has the PIN."""
+    if bc_api.USE_API:
+        existing = bc_api.find_vendor(bc_api.for_page(page), row["pin_no"])
+        if existing:
+            print(f"{row['vendor_name']} already exists as {existing}, skipping.")
+            bc_vendors.remember(existing, row["vendor_name"], row["pin_no"], source="api")
+            return {"vendor_no": existing, "existing": True}
+    vendor_no = create_vendor.run_stage(page, row["vendor_name"], row["pin_no"])
+    if not vendor_no:
+        raise RuntimeError("Vendor number not found.")
+    return {"vendor_no": vendor_no}
+
+def precheck(rows, index, by_name=True):
+    """Match every row against the vendor index and the rows before it, in memory, before any browser work.
+
+    Returns the results of the duplicates by row position and the positions of the rows still to create.
+    """
+    results, todo = {}, []
+    for position, row in enumerate(rows):
+        vendor_no, reason = index.match(row["vendor_name"], row["pin_no"], by_name)
+        if vendor_no is None:
+            index.add(f"row {position + 1}", row["vendor_name"], row["pin_no"])
+            todo.append(position)
+        elif vendor_no.startswith("row "):
+            results[position] = {"status": "error", "error": f"same {'PIN No.' if reason == 'pin' else 'name'} as {vendor_no} of this batch"}
+        else:
+            results[position] = {"status": "ok", "vendor_no": vendor_no, "existing": True, "matched_on": reason}
+    return results, todo
+
+def save_results(rows, results, filename):
+    """Write one JSON line per input row with the vendor number or error recorded against it."""
+    with open(filename, "w") as f:
+        for row, result in zip(rows, results):
+            f.write(json.dumps({**row, **result}) + "\n")
+    print(f"Batch results saved to {filename}.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Create vendors in bulk from a CSV or JSONL file.")
+    parser.add_argument("input", help="CSV (vendor_name,pin_no header) or JSONL file of vendors")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent browser contexts per account without their own max_concurrency")
+    parser.add_argument("--accounts", help="JSON file with the service accounts to spread vendors over (default: accounts.json, else --email)")
+    parser.add_argument("--output", help="Results file (defaults to <input>.results.jsonl)")
+    parser.add_argument("--email", default=os.getenv("EMAIL"))
+    parser.add_argument("--password", default=os.getenv("PASSWORD"))
+    parser.add_argument("--headed", action="store_true", help="Show the browser windows")
+    parser.add_argument("--refresh-index", action="store_true", help="Reload the vendor index from BC's OData vendor list first")
+    parser.add_argument("--allow-same-name", action="store_true", help="Only treat a matching PIN No. as a duplicate, not a matching name")
+    args = parser.parse_args()
+
+    try:
+        accounts = load_accounts(args.accounts, args.email, args.password, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    rows = load_rows(args.input)
+    if args.refresh_index:
+        with sync_playwright() as p, bc_api.open_api(p, accounts[0].email, accounts[0].password) as api:
+            print(f"Indexed {bc_vendors.refresh_from_api(api)} vendors from BC.")
+
+    # Duplicates are settled from the local index, so they never open a card or use up a vendor number
+    results, todo = precheck(rows, bc_vendors.load_index(), by_name=not args.allow_same_name)
+    print(f"{len(rows) - len(todo)} of {len(rows)} vendors already exist or repeat an earlier row.")
+    print(f"Creating {len(todo)} vendors with {len(accounts)} account(s).")
+    if todo:
+        created = run_pool([rows[position] for position in todo], create_vendor_job, workers=args.workers,
+                           headless=False if args.headed else None, accounts=accounts)
+        results.update(zip(todo, created))
+    results = [results[position] for position in range(len(rows))]
+
+    output = args.output or os.path.splitext(args.input)[0] + ".results.jsonl"
+    save_results(rows, results, output)
+    created = sum(1 for result in results if result["status"] == "ok" and not result.get("existing"))
+    print(f"{created}/{len(rows)} vendors created.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import re
+import json
+import time
+import threading
+from dotenv import load_dotenv
+
+from bc_session import main_frame
+
+load_dotenv()  # Load environment variables from .env file
+
+# JSON list of {"email", "password", "max_concurrency", "rate_per_min"}; without it EMAIL/PASSWORD is the only account
+ACCOUNTS_FILE = os.getenv("BC_ACCOUNTS_FILE", "accounts.json")
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_PER_MIN = float(os.getenv("BC_RATE_PER_MIN", "0"))  # Jobs started per minute per account, 0 for no limit
+
+# Pause applied to an account after BC throttles it, doubled on each strike in a row
+BACKOFF_BASE = float(os.getenv("BC_BACKOFF_BASE", "5"))
+BACKOFF_MAX = float(os.getenv("BC_BACKOFF_MAX", "120"))
+
+# Messages BC shows when a user session is throttled or a record is held by another session
+THROTTLE_PATTERN = re.compile(
+    r"record is locked|locked by another user|another user has (modified|changed)|"
+    r"too many requests|being throttled|try again later",
+    re.IGNORECASE,
+)
+
+class Account:
+    """A service account with its own cached session, concurrency cap, rate limit and throttling backoff."""
+
+    def __init__(self, email, password, max_concurrency=DEFAULT_CONCURRENCY, rate_per_min=DEFAULT_RATE_PER_MIN):
+        self.email = email.strip()
+        self.password = password.strip()
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.rate_per_min = float(rate_per_min or 0)
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+        self.paused_until = 0.0
+        self.strikes = 0
+
+    def __repr__(self):
+        return f"Account({self.email!r}, max_concurrency={self.max_concurrency}, rate_per_min={self.rate_per_min})"
+
+    def wait_turn(self):
+        """Block until this account may start another job under its rate limit and any backoff."""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start, self.paused_until)
+            if self.rate_per_min:
+                self.next_start = start + 60.0 / self.rate_per_min
+        if start > now:
+            time.sleep(start - now)
+
+    def throttled(self):
+        """Pause the account after BC throttled it and return the pause in seconds."""
+        with self.lock:
+            self.strikes += 1
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.strikes - 1))
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        return delay
+
+    def succeeded(self):
+        """Reset the backoff once a job goes through."""
+        with self.lock:
+            self.strikes = 0
+
+def load_accounts(filename=None, email=None, password=None, max_concurrency=DEFAULT_CONCURRENCY):
+    """Return the account pool from the accounts file, or a single account from the given or .env credentials."""
+    filename = filename or ACCOUNTS_FILE
+    if os.path.exists(filename):
+        with open(filename, "r") as f:
+            entries = json.load(f)
+        for number, entry in enumerate(entries, start=1):
+            if not entry.get("email") or not entry.get("password"):
+                raise ValueError(f"Account {number} in {filename} needs an email and a password.")
+        return [
+            Account(
+                entry["email"],
+                entry["password"],
+                entry.get("max_concurrency", max_concurrency),
+                entry.get("rate_per_min", DEFAULT_RATE_PER_MIN),
+            )
+            for entry in entries
+        ]
+
+    email = email or os.getenv("EMAIL")
+    password = password or os.getenv("PASSWORD")
+    if not email or not password:
+        raise ValueError(f"No accounts: create {filename} or set EMAIL and PASSWORD in .env.")
+    return [Account(email, password, max_concurrency)]
+
+def is_throttled(page, error) -> bool:
+    """Check whether a failed job was throttled or hit a locked record, from the error or a BC dialog."""
+    if THROTTLE_PATTERN.search(str(error)):
+        return True
+    try:
+        dialogs = main_frame(page).get_by_role("dialog").all_text_contents()
+    except Exception:
+        return False
+    return any(THROTTLE_PATTERN.search(text) for text in dialogs)
@@ -0,0 +1,172 @@
+import os
+import argparse
+from contextlib import contextmanager
+from urllib.parse import quote, urlencode
+from dotenv import load_dotenv
+from playwright.sync_api import sync_playwright
+
+from bc_retry import TRANSIENT_STATUSES, TransientError, retry
+from bc_session import BC_URL, launch_browser, load_cached_session, open_session
+from bc_trace import step
+
+load_dotenv()  # Load environment variables from .env file
+
+# BC's OData v4 web services on the same server. The web client's session cookies authenticate them,
+# so reads and status checks run without rendering a page. Set BC_USE_API=1 to use them in the stages.
+ODATA_URL = os.getenv("BC_ODATA_URL", BC_URL + "ODataV4/Company('KENYA')/")
+USE_API = os.getenv("BC_USE_API", "0") != "0"
+
+# Published web service (entity set) per document kind
+ENTITY_SETS = {
+    "vendor": os.getenv("BC_ODATA_VENDORS", "Vendor_Card"),
+    "rfq": os.getenv("BC_ODATA_RFQS", "Purchase_Requisition_Card"),
+    "po": os.getenv("BC_ODATA_ORDERS", "Purchase_Order"),
+    "return": os.getenv("BC_ODATA_RETURNS", "Purchase_Return_Order"),
+}
+
+# RFQ statuses that mean the approval request has already been sent
+APPROVAL_STATUSES = set(os.getenv("BC_APPROVAL_STATUSES", "Pending Approval,Released").split(","))
+
+# PO statuses that mean the order has been posted, so its receipt lines can be returned
+POSTED_STATUSES = set(os.getenv("BC_POSTED_STATUSES", "Posted").split(","))
+
+FILTER_CHUNK = 20  # Numbers per "No eq ... or ..." filter, to keep URLs short
+
+def literal(value) -> str:
+    """Quote a value as an OData string literal."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def query(api, kind, filters=None, any_of=None, select=None, top=None):
+    """Return the entities of a kind where every `filters` field equals its value (or any `any_of` value matches).
+
+    any_of is a (field, values) pair. Server-side paging (@odata.nextLink) is followed.
+    """
+    clauses = [f"{field} eq {literal(value)}" for field, value in (filters or {}).items()]
+    if any_of:
+        field, values = any_of
+        clauses.append("(" + " or ".join(f"{field} eq {literal(value)}" for value in values) + ")")
+    params = {}
+    if clauses:
+        params["$filter"] = " and ".join(clauses)
+    if select:
+        params["$select"] = ",".join(select)
+    if top:
+        params["$top"] = top
+
+    url = ODATA_URL + ENTITY_SETS[kind] + ("?" + urlencode(params, quote_via=quote) if params else "")
+    rows = []
+
+    def fetch(url):
+        response = api.get(url, headers={"Accept": "application/json"})
+        if response.status in TRANSIENT_STATUSES:
+            raise TransientError(f"OData query on {ENTITY_SETS[kind]} failed: {response.status}", response.status)
+        return response
+
+    with step("api.query", kind=kind) as event:
+        while url:
+            response = retry("api.query", fetch, url)
+            if response.status == 401:
+                raise RuntimeError("The BC session is no longer valid for OData. Log in again.")
+            if not response.ok:
+                raise RuntimeError(f"OData query on {ENTITY_SETS[kind]} failed: {response.status} {response.text()[:200]}")
+            data = response.json()
+            rows += data.get("value", [])
+            url = data.get("@odata.nextLink")
+            if top and len(rows) >= top:
+                break
+        event["rows"] = len(rows)
+    return rows[:top] if top else rows
+
+def get_document(api, kind, number):
+    """Return one vendor, RFQ, PO or return by number, or None."""
+    rows = query(api, kind, {"No": number}, top=1)
+    return rows[0] if rows else None
+
+def statuses(api, kind, numbers):
+    """Return number -> Status for many documents, a few OData calls instead of one page load each."""
+    numbers = list(numbers)
+    result = {}
+    for start in range(0, len(numbers), FILTER_CHUNK):
+        rows = query(api, kind, any_of=("No", numbers[start:start + FILTER_CHUNK]), select=["No", "Status"])
+        result.update({row["No"]: row.get("Status") for row in rows})
+    return result
+
+def is_approval_requested(api, RFQ_no) -> bool:
+    """Check in BC whether an RFQ's approval request has been sent (pending or already approved)."""
+    document = get_document(api, "rfq", RFQ_no)
+    return document is not None and document.get("Status") in APPROVAL_STATUSES
+
+def posted_order(api, PO_no):
+    """Return a purchase order from BC if it has been posted (e.g. by hand, outside these scripts), else None."""
+    document = get_document(api, "po", PO_no)
+    return document if document is not None and document.get("Status") in POSTED_STATUSES else None
+
+def find_vendor(api, pin_no=None, name=None):
+    """Return the number of an existing vendor with this PIN No. (or exact name), or None."""
+    filters = {"PIN_No": pin_no} if pin_no else {"Name": name}
+    rows = query(api, "vendor", filters, select=["No"], top=1)
+    return rows[0]["No"] if rows else None
+
+def find_order(api, RFQ_no):
+    """Return the number of the purchase order raised from an RFQ, or None."""
+    rows = query(api, "po", {"Requisition_No": RFQ_no}, select=["No"], top=1)
+    return rows[0]["No"] if rows else None
+
+def pending_rfqs(api, status):
+    """Return the numbers of RFQs in BC currently at a status, e.g. every RFQ pending approval."""
+    return [row["No"] for row in query(api, "rfq", {"Status": status}, select=["No"])]
+
+def for_page(page):
+    """Return an API client that shares a logged-in page's cookies."""
+    return page.context.request
+
+@contextmanager
+def open_api(p, email, password):
+    """Yield an API client for an account from its cached session, logging in through the browser only if needed."""
+    cached = load_cached_session(email)
+    if not cached:
+        browser = launch_browser(p)
+        try:
+            open_session(browser, email, password)
+        finally:
+            browser.close()
+        cached = load_cached_session(email)
+    api = p.request.new_context(storage_state=cached)
+    try:
+        yield api
+    finally:
+        api.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Read documents and statuses from BC's OData web services.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    status_parser = subparsers.add_parser("status", help="Show the BC status of documents")
+    status_parser.add_argument("numbers", nargs="+")
+    status_parser.add_argument("--kind", default="rfq", choices=list(ENTITY_SETS))
+    pending_parser = subparsers.add_parser("pending", help="List RFQs at a status")
+    pending_parser.add_argument("--status", default="Pending Approval")
+    vendor_parser = subparsers.add_parser("vendor", help="Check whether a vendor exists")
+    vendor_parser.add_argument("--pin", help="PIN No.")
+    vendor_parser.add_argument("--name", help="Exact vendor name")
+    args = parser.parse_args()
+
+    if args.command == "vendor" and not (args.pin or args.name):
+        parser.error("give --pin or --name.")
+    email, password = os.getenv("EMAIL"), os.getenv("PASSWORD")
+    if not email or not password:
+        parser.error("EMAIL and PASSWORD must be set in .env.")
+
+    with sync_playwright() as p, open_api(p, email, password) as api:
+        if args.command == "status":
+            found = statuses(api, args.kind, args.numbers)
+            for number in args.numbers:
+                print(f"{number}: {found.get(number, 'not found')}")
+        elif args.command == "pending":
+            numbers = pending_rfqs(api, args.status)
+            print(f"{len(numbers)} RFQs at '{args.status}': {', '.join(numbers)}")
+        else:
+            vendor_no = find_vendor(api, args.pin, args.name)
+            print(f"Vendor exists: {vendor_no}" if vendor_no else "No such vendor.")
+
+if __name__ == "__main__":
+    main()
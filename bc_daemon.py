@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import socket
+import secrets
+import argparse
+import importlib
+
+# This module imports only the standard library up front, so status/stop and the client calls add next
+# to nothing. The stage scripts that call run_or_none() still import Playwright themselves: a client saves
+# the browser launch and login, not its own imports. The daemon side (the stage scripts) is imported in serve().
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = int(os.getenv("BC_DAEMON_PORT", "8777"))
+DAEMON_FILE = os.getenv("BC_DAEMON_FILE", os.path.join(os.getenv("BC_SESSION_DIR", ".sessions"), "daemon.json"))
+WORKERS = int(os.getenv("BC_DAEMON_WORKERS", "2"))
+JOB_TIMEOUT = float(os.getenv("BC_DAEMON_TIMEOUT", "600"))  # Seconds a client waits for its job
+
+# Stage name -> (module, function) run as function(page, **args) on a warm page
+STAGES = {
+    "vendor": ("create_vendor", "run_stage"),
+    "rfq": ("request_RFQ", "run_stage"),
+    "action": ("action_RFQ", "run_stage"),
+    "approve": ("approve_rfq", "run_stage"),
+    "po": ("RFQ-to-PO", "run_stage"),
+    "post": ("post-PO", "post_job"),
+    "return": ("purchase_return", "return_job"),
+    "resume": ("resume", "resume_document"),
+}
+
+def read_info():
+    """Return the running daemon's port and token, or None."""
+    try:
+        with open(DAEMON_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def request(message, timeout=None):
+    """Send one JSON request to the daemon and return its JSON reply, or None when no daemon is listening."""
+    info = read_info()
+    if not info:
+        return None
+    try:
+        connection = socket.create_connection((DAEMON_HOST, info["port"]), timeout=0.5)
+    except OSError:
+        return None
+    with connection:
+        connection.settimeout(timeout)
+        connection.sendall((json.dumps({"token": info["token"], **message}) + "\n").encode())
+        reply = connection.makefile("r", encoding="utf-8").readline()
+    return json.loads(reply) if reply else None
+
+def submit(stage, email=None, password=None, timeout=JOB_TIMEOUT, **args):
+    """Run a stage on the daemon and return its reply ({"status": "done", "result": ...} or "failed"), or None if it is not running."""
+    message = {"stage": stage, "args": args}
+    if email and password:
+        message.update(email=email, password=password)
+    return request(message, timeout)
+
+def run_or_none(stage, **args):
+    """Run a stage on the daemon for a script's submit_form, printing the outcome; None means run it locally."""
+    started = time.perf_counter()
+    reply = submit(stage, **args)
+    if reply is None:
+        return None
+    if reply["status"] != "done":
+        print(f"An error occurred: {reply.get('error')}. Screenshot saved at {reply.get('screenshot')}.")
+        return reply
+    print(f"Done on the warm browser daemon in {time.perf_counter() - started:.1f} s: {reply['result']}")
+    return reply
+
+def run_job(page, job):
+    """Daemon-side handler: run the job's stage on a warm page."""
+    module_name, function_name = STAGES[job["stage"]]
+    result = getattr(importlib.import_module(module_name), function_name)(page, **job["args"])
+    return {"result": result}
+
+def serve(workers=WORKERS, headless=None, port=DAEMON_PORT):
+    """Keep Chromium and logged-in pages warm and run stage jobs sent over a local socket until stopped."""
+    import socketserver
+    from dotenv import load_dotenv
+    from bc_jobs import JobQueue
+
+    load_dotenv()  # Load environment variables from .env file
+    email, password = os.getenv("EMAIL"), os.getenv("PASSWORD")
+    if not email or not password:
+        raise SystemExit("EMAIL and PASSWORD must be set in .env for the daemon's default account.")
+
+    # Import every stage once, now, instead of in each job
+    for module_name, _ in STAGES.values():
+        importlib.import_module(module_name)
+
+    jobs = JobQueue(run_job, workers, headless, warm=(email, password))
+    token = secrets.token_hex(16)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                message = json.loads(self.rfile.readline())
+            except json.JSONDecodeError:
+                return
+            if message.get("token") != token:
+                return self.reply({"status": "failed", "error": "bad token"})
+            if message.get("command") == "ping":
+                return self.reply({"status": "done", "result": {"workers": workers, "busy": jobs.busy()}})
+            if message.get("command") == "stop":
+                self.reply({"status": "done", "result": "stopping"})
+                return server.shutdown()
+            if message.get("stage") not in STAGES:
+                return self.reply({"status": "failed", "error": f"unknown stage {message.get('stage')}"})
+
+            job_id = jobs.submit(message.get("email") or email, message.get("password") or password,
+                                 stage=message["stage"], args=message.get("args", {}))
+            job = jobs.wait(job_id, JOB_TIMEOUT)
+            jobs.forget(job_id)
+            print(f"Job {job_id} ({job['stage']}) {job['status']}")
+            self.reply({key: job.get(key) for key in ("status", "result", "error", "error_kind", "retries", "screenshot", "started_at", "finished_at")})
+
+        def reply(self, message):
+            self.wfile.write((json.dumps(message, default=str) + "\n").encode())
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer((DAEMON_HOST, port), Handler)
+    server.daemon_threads = True
+    os.makedirs(os.path.dirname(DAEMON_FILE) or ".", exist_ok=True)
+    with open(DAEMON_FILE, "w") as f:
+        json.dump({"port": port, "token": token, "pid": os.getpid()}, f)
+    print(f"Browser daemon listening on {DAEMON_HOST}:{port} with {workers} warm workers. Stop it with: python bc_daemon.py stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.stop()
+        for thread in jobs.threads:
+            thread.join(timeout=30)
+        if os.path.exists(DAEMON_FILE):
+            os.remove(DAEMON_FILE)
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm browser daemon: keeps Chromium and BC sessions open for the workflow scripts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Start the daemon in the foreground")
+    serve_parser.add_argument("--workers", type=int, default=WORKERS)
+    serve_parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    serve_parser.add_argument("--headed", action="store_true")
+    subparsers.add_parser("status", help="Check whether the daemon is running")
+    subparsers.add_parser("stop", help="Stop the daemon")
+    run_parser = subparsers.add_parser("run", help="Run a stage on the daemon, e.g. run approve RFQ_no=RFQ009448")
+    run_parser.add_argument("stage", choices=list(STAGES))
+    run_parser.add_argument("args", nargs="*", help="name=value arguments for the stage")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        return serve(args.workers, False if args.headed else None, args.port)
+
+    if args.command == "run":
+        stage_args = dict(arg.split("=", 1) for arg in args.args)
+        reply = submit(args.stage, **stage_args)
+    else:
+        reply = request({"command": "ping" if args.command == "status" else "stop"}, timeout=5)
+
+    if reply is None:
+        print("The browser daemon is not running. Start it with: python bc_daemon.py serve")
+        sys.exit(1)
+    print(json.dumps(reply, indent=4, default=str))
+    sys.exit(0 if reply["status"] == "done" else 1)
+
+if __name__ == "__main__":
+    main()
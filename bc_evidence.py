@@ -0,0 +1,185 @@
+import os
+import re
+import time
+import queue
+import atexit
+import random
+import hashlib
+import argparse
+import threading
+
+SCREENSHOT_DIR = os.getenv("BC_SCREENSHOT_DIR", "screenshots")
+FAILURE_TRACE_DIR = os.getenv("BC_FAILURE_TRACE_DIR", os.path.join("traces", "failures"))
+
+# Success screenshots: "all", "sample" (BC_SCREENSHOT_SAMPLE of them) or "off". Failures are always captured.
+SCREENSHOT_MODE = os.getenv("BC_SCREENSHOTS", "sample")
+SAMPLE_RATE = float(os.getenv("BC_SCREENSHOT_SAMPLE", "0.1"))
+JPEG_QUALITY = int(os.getenv("BC_SCREENSHOT_QUALITY", "60"))
+
+# Playwright traces are recorded per context and only written out when a step fails
+TRACE_ON_FAILURE = os.getenv("BC_TRACE_ON_FAILURE", "1") != "0"
+
+# Retention for files written by this module
+MAX_FILES = int(os.getenv("BC_EVIDENCE_MAX_FILES", "500"))
+MAX_AGE_DAYS = float(os.getenv("BC_EVIDENCE_MAX_AGE_DAYS", "14"))
+PRUNE_EVERY = 50  # Writes between retention passes
+
+# Only files named by this module are ever pruned, never older hand-kept screenshots
+MANAGED_FILE = re.compile(r".+_\d{8}-\d{6}_[0-9a-f]{16}\.(jpg|zip)$")
+
+_lock = threading.Lock()
+_pending = queue.Queue()
+_writer = None
+_seen = None
+_writes = 0
+
+def _known_digests():
+    """Return digest -> path for screenshots already on disk, loaded once."""
+    global _seen
+    if _seen is None:
+        _seen = {}
+        if os.path.isdir(SCREENSHOT_DIR):
+            for name in os.listdir(SCREENSHOT_DIR):
+                if MANAGED_FILE.match(name):
+                    _seen[name.rsplit("_", 1)[1].split(".")[0]] = os.path.join(SCREENSHOT_DIR, name)
+    return _seen
+
+def _write_loop():
+    """Write queued files in the background so capture stays off the workflow's critical path."""
+    global _writes
+    while True:
+        path, data = _pending.get()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            _writes += 1
+            if _writes % PRUNE_EVERY == 0:
+                prune()
+        except OSError as e:
+            print(f"Could not write {path}: {str(e)}")
+        finally:
+            _pending.task_done()
+
+def _ensure_writer():
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="evidence-writer", daemon=True)
+            _writer.start()
+
+def flush():
+    """Wait until every queued screenshot has been written."""
+    if _writer is not None:
+        _pending.join()
+
+atexit.register(flush)
+
+def store_screenshot(data: bytes, step_name: str) -> str:
+    """Queue screenshot bytes for writing, reusing the existing file when the image is identical."""
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    with _lock:
+        seen = _known_digests()
+        if digest in seen:
+            print(f"Screenshot unchanged, reusing: {seen[digest]}")
+            return seen[digest]
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(SCREENSHOT_DIR, f"{step_name}_{timestamp}_{digest}.jpg")
+        seen[digest] = path
+    _ensure_writer()
+    _pending.put((path, data))
+    print(f"Screenshot taken: {path}")
+    return path
+
+def should_capture() -> bool:
+    """Decide whether to keep a success screenshot under the configured mode."""
+    if SCREENSHOT_MODE == "all":
+        return True
+    if SCREENSHOT_MODE == "sample":
+        return random.random() < SAMPLE_RATE
+    return False
+
+def take_screenshot(page, step_name: str):
+    """Take a success screenshot if the mode and sampling allow it. Returns its path or None."""
+    if not should_capture():
+        return None
+    return store_screenshot(page.screenshot(type="jpeg", quality=JPEG_QUALITY), step_name)
+
+def start_tracing(context):
+    """Start recording a Playwright trace on a context; chunks are only written when a step fails."""
+    if TRACE_ON_FAILURE:
+        context.tracing.start(screenshots=True, snapshots=True)
+
+def trace_path(name: str) -> str:
+    """Return a new managed file name for a failure trace."""
+    os.makedirs(FAILURE_TRACE_DIR, exist_ok=True)
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    suffix = hashlib.sha256(f"{name}{time.time_ns()}".encode()).hexdigest()[:16]
+    return os.path.join(FAILURE_TRACE_DIR, f"{name}_{timestamp}_{suffix}.zip")
+
+def keep_trace(context, name: str):
+    """Write the trace recorded since the last chunk to disk and start a new chunk."""
+    if not TRACE_ON_FAILURE:
+        return None
+    path = trace_path(name)
+    try:
+        context.tracing.stop_chunk(path=path)
+        context.tracing.start_chunk()
+    except Exception as e:
+        print(f"Could not save trace: {str(e)}")
+        return None
+    print(f"Trace saved: {path}")
+    return path
+
+def drop_trace(context):
+    """Discard the trace recorded since the last chunk after a successful transaction."""
+    if not TRACE_ON_FAILURE:
+        return
+    try:
+        context.tracing.stop_chunk()
+        context.tracing.start_chunk()
+    except Exception:
+        pass
+
+def record_failure(page, step_name: str = "Error"):
+    """Capture a failure screenshot and keep the page's trace. Returns the screenshot path."""
+    keep_trace(page.context, step_name)
+    try:
+        data = page.screenshot(type="jpeg", quality=JPEG_QUALITY)
+    except Exception as e:
+        print(f"Could not take failure screenshot: {str(e)}")
+        return None
+    return store_screenshot(data, step_name)
+
+def prune(max_files=None, max_age_days=None):
+    """Delete managed screenshots and traces that are too old or beyond the newest max_files of each."""
+    max_files = MAX_FILES if max_files is None else max_files
+    max_age_days = MAX_AGE_DAYS if max_age_days is None else max_age_days
+    cutoff = time.time() - max_age_days * 24 * 60 * 60
+    removed = 0
+    for directory in (SCREENSHOT_DIR, FAILURE_TRACE_DIR):
+        if not os.path.isdir(directory):
+            continue
+        paths = [os.path.join(directory, name) for name in os.listdir(directory) if MANAGED_FILE.match(name)]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for index, path in enumerate(paths):
+            if index >= max_files or os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+    if removed:
+        with _lock:
+            if _seen is not None:
+                for digest, path in list(_seen.items()):
+                    if not os.path.exists(path):
+                        del _seen[digest]
+    return removed
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the retention policy to captured screenshots and traces.")
+    parser.add_argument("--max-files", type=int, default=MAX_FILES)
+    parser.add_argument("--max-age-days", type=float, default=MAX_AGE_DAYS)
+    args = parser.parse_args()
+    print(f"Removed {prune(args.max_files, args.max_age_days)} files.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import json
+import base64
+import threading
+
+from bc_session import is_blocked
+
+# Recorded BC traffic, one HAR file per workflow stage plus manifest.json
+HAR_DIR = os.getenv("BC_HAR_DIR", os.path.join("fixtures", "har"))
+
+# Request and response headers that carry credentials and never go into a fixture
+SECRET_HEADERS = {"cookie", "set-cookie", "authorization", "x-ms-refreshtokencredential"}
+
+def har_path(name, directory=None):
+    """Return the HAR fixture file of a stage."""
+    return os.path.join(directory or HAR_DIR, f"{name}.har")
+
+def record_options(name, bc_url, directory=None):
+    """Return new_context() options that record a stage's BC traffic to its fixture when the context closes."""
+    os.makedirs(directory or HAR_DIR, exist_ok=True)
+    return {
+        "record_har_path": har_path(name, directory),
+        "record_har_content": "embed",
+        "record_har_mode": "minimal",
+        "record_har_url_filter": bc_url + "**",
+    }
+
+def sanitize(path):
+    """Strip cookies and auth headers from a recorded HAR so fixtures hold no credentials."""
+    with open(path, "r", encoding="utf-8") as f:
+        har = json.load(f)
+    for entry in har["log"]["entries"]:
+        for message in (entry["request"], entry["response"]):
+            message["headers"] = [header for header in message.get("headers", []) if header["name"].lower() not in SECRET_HEADERS]
+            message["cookies"] = []
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(har, f)
+    return len(har["log"]["entries"])
+
+class HarReplay:
+    """Serve a stage's recorded responses to a context, in the order they were recorded.
+
+    Playwright's route_from_har answers every repeat of a URL with the same entry, but the web client
+    requests the same record again as it changes, so each (method, URL) here has a queue of responses.
+    A request body equal to a recorded one picks that entry; otherwise the next unused one is served.
+    """
+
+    def __init__(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)["log"]["entries"]
+        self.entries = {}
+        for entry in entries:
+            self.entries.setdefault((entry["request"]["method"], entry["request"]["url"]), []).append(entry)
+        self.used = set()
+        self.misses = []
+        self.lock = threading.Lock()
+
+    def find(self, method, url, body):
+        """Return the recorded entry to answer a request with, or None."""
+        candidates = self.entries.get((method, url), [])
+        with self.lock:
+            unused = [entry for entry in candidates if id(entry) not in self.used]
+            entry = next((entry for entry in unused if entry["request"].get("postData", {}).get("text") == body), None)
+            entry = entry or (unused[0] if unused else candidates[-1] if candidates else None)
+            if entry is not None:
+                self.used.add(id(entry))
+        return entry
+
+    def handle(self, route):
+        request = route.request
+        if is_blocked(request):
+            return route.abort()
+        entry = self.find(request.method, request.url, request.post_data)
+        if entry is None:
+            # Something the recorded run never requested: a changed flow or selector, worth failing on
+            self.misses.append(f"{request.method} {request.url}")
+            return route.abort()
+
+        response = entry["response"]
+        content = response.get("content", {})
+        body = content.get("text", "")
+        body = base64.b64decode(body) if content.get("encoding") == "base64" else body.encode("utf-8")
+        headers = {header["name"]: header["value"] for header in response.get("headers", [])
+                   if header["name"].lower() not in ("content-length", "content-encoding", "transfer-encoding")}
+        route.fulfill(status=response["status"], headers=headers, body=body)
+
+    def install(self, context):
+        """Answer every request of the context from the fixture; nothing reaches the network."""
+        context.route("**/*", self.handle)
+        return self
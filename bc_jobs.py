@@ -0,0 +1,150 @@
+import os
+import time
+import queue
+import itertools
+import threading
+from playwright.sync_api import sync_playwright
+
+from bc_evidence import drop_trace, record_failure
+from bc_recycle import ContextLife
+from bc_retry import begin, classify, spent
+from bc_session import launch_browser, open_session
+from bc_trace import bind, unbind
+
+WORKERS = int(os.getenv("BC_UI_WORKERS", "2"))
+
+class JobQueue:
+    """Run submitted jobs on background worker threads, each with its own browser and logged-in pages.
+
+    handler(page, job) does the work and returns a dict merged into the job, e.g. {"vendor_no": ...}.
+    remote(job, email, password), when given, is tried first: it runs the job elsewhere (the warm browser
+    daemon) and returns the same kind of dict, or None to run the job here. Browsers open on the first local job.
+    Jobs are plain dicts; snapshot() returns copies that are safe to read from the UI thread.
+    """
+
+    def __init__(self, handler, workers=WORKERS, headless=None, warm=None, remote=None):
+        self.handler = handler
+        self.remote = remote
+        self.headless = headless
+        self.warm = warm  # (email, password) to log every worker in before the first job arrives
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.jobs = []
+        self.ids = itertools.count(1)
+        self.threads = [
+            threading.Thread(target=self.worker_loop, args=(worker_id,), name=f"job-worker-{worker_id}", daemon=True)
+            for worker_id in range(max(1, workers))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, email, password, **fields):
+        """Queue a job and return its id straight away."""
+        job = {"id": next(self.ids), "status": "queued", "queued_at": time.time(), "started_at": None,
+               "finished_at": None, "error": None, **fields}
+        with self.lock:
+            self.jobs.append(job)
+        self.pending.put((job, email.strip(), password.strip()))
+        return job["id"]
+
+    def snapshot(self):
+        """Return a copy of every job, oldest first."""
+        with self.lock:
+            return [dict(job) for job in self.jobs]
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job has finished and return a copy of it (still running if the timeout passed first)."""
+        deadline = time.monotonic() + timeout if timeout else None
+        with self.changed:
+            job = next(job for job in self.jobs if job["id"] == job_id)
+            while job["status"] in ("queued", "running"):
+                remaining = deadline - time.monotonic() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self.changed.wait(remaining)
+            return dict(job)
+
+    def forget(self, job_id):
+        """Drop a finished job once its result has been handed over, so a long-running queue does not grow."""
+        with self.lock:
+            self.jobs = [job for job in self.jobs if job["id"] != job_id]
+
+    def busy(self):
+        """Return True while any job is queued or running."""
+        with self.lock:
+            return any(job["status"] in ("queued", "running") for job in self.jobs)
+
+    def stop(self):
+        """Let the workers finish their current job and close their browsers."""
+        for _ in self.threads:
+            self.pending.put(None)
+
+    def update(self, job, **changes):
+        with self.changed:
+            job.update(changes)
+            self.changed.notify_all()
+
+    def worker_loop(self, worker_id):
+        """Take jobs off the queue and run them, keeping one logged-in page per account between jobs."""
+        bind(worker=worker_id)
+        with sync_playwright() as p:
+            browser = None
+            pages = {}
+            lives = {}
+            try:
+                if self.warm:
+                    email = self.warm[0].strip()
+                    try:
+                        browser = launch_browser(p, self.headless)
+                        pages[email] = open_session(browser, email, self.warm[1].strip())[1]
+                    except Exception as e:
+                        print(f"[worker {worker_id}] Could not log in ahead of time: {str(e)}")
+                while True:
+                    item = self.pending.get()
+                    if item is None:
+                        break
+                    job, email, password = item
+                    self.update(job, status="running", started_at=time.time(), worker=worker_id)
+                    bind(job=job["id"])
+                    begin()
+                    page = pages.get(email)
+                    local = False
+                    try:
+                        result = self.remote(job, email, password) if self.remote else None
+                        if result is None:
+                            local = True
+                            if page is None:
+                                browser = browser or launch_browser(p, self.headless)
+                                page = pages[email] = open_session(browser, email, password)[1]
+                            result = self.handler(page, job) or {}
+                        self.update(job, status="done", finished_at=time.time(), retries=spent(), **result)
+                        # Keep failure traces to the job that failed, as the pool does
+                        if local:
+                            drop_trace(page.context)
+                    except Exception as e:
+                        screenshot = record_failure(page) if local and page else None
+                        self.update(job, status="failed", finished_at=time.time(), error=str(e), error_kind=classify(e),
+                                    retries=spent(), screenshot=screenshot)
+                        # Start the next job for this account from a fresh context
+                        if local:
+                            lives.pop(email, None)
+                            if pages.pop(email, None) is not None:
+                                try:
+                                    page.context.close()
+                                except Exception:
+                                    pass
+                    finally:
+                        unbind("job")
+
+                    # Past a job or memory ceiling, close the context; the next job reopens it from the cached login
+                    if local and email in pages:
+                        life = lives.setdefault(email, ContextLife())
+                        reason = life.job_done(page)
+                        if reason:
+                            print(f"[worker {worker_id}] Recycling the browser context of {email}: {reason}.")
+                            pages.pop(email).context.close()
+                            life.recycled()
+            finally:
+                if browser:
+                    browser.close()
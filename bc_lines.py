@@ -0,0 +1,76 @@
+import csv
+import json
+import re
+
+# RFQ line fields in the order they are entered on a line row
+LINE_FIELDS = ["location_code", "type", "no", "quantity", "source_doc_type", "source_no", "source_line_no"]
+
+# Aria label prefix of the line cell each field is entered in ("<label>, <value>" once committed)
+LINE_LABELS = {
+    "location_code": "Location Code",
+    "type": "Type",
+    "no": "No.",
+    "quantity": "Quantity",
+    "source_doc_type": "Source Doc Type",
+    "source_no": "Source No.",
+    "source_line_no": "Source Line No.",
+}
+
+# Values used for fields a line spec leaves out (the line request_RFQ.py used to hardcode)
+LINE_DEFAULTS = {"location_code": "22010", "type": "20", "source_doc_type": "4"}
+
+# The line request_RFQ.py enters when no line spec is given
+DEFAULT_LINES = [{**LINE_DEFAULTS, "no": "20928", "quantity": "1", "source_no": "J066872", "source_line_no": "1010"}]
+
+DEFAULT_DESCRIPTION = "testing rfq proceess"
+
+def line_cell(row, field):
+    """Return the cell of a line row that a line spec field is entered in, whatever value it shows."""
+    return row.get_by_label(re.compile(rf"^{re.escape(LINE_LABELS[field])},")).first
+
+def normalize_line(line, number=1, source="line spec"):
+    """Return a line with every field as a stripped string and defaults filled in, or raise ValueError."""
+    unknown = set(line) - set(LINE_FIELDS)
+    if unknown:
+        raise ValueError(f"Line {number} in {source} has unknown fields: {', '.join(sorted(unknown))}.")
+
+    values = {field: str(line.get(field) if line.get(field) is not None else "").strip() for field in LINE_FIELDS}
+    for field, default in LINE_DEFAULTS.items():
+        values[field] = values[field] or default
+
+    if not values["no"]:
+        raise ValueError(f"Line {number} in {source} needs an item no.")
+    if not re.fullmatch(r"\d+(\.\d+)?", values["quantity"]) or float(values["quantity"]) <= 0:
+        raise ValueError(f"Line {number} in {source} needs a positive quantity, got '{values['quantity']}'.")
+    if values["source_line_no"] and not values["source_line_no"].isdigit():
+        raise ValueError(f"Line {number} in {source} has a non-numeric source_line_no '{values['source_line_no']}'.")
+    return values
+
+def load_lines(filename):
+    """Load RFQ lines from a CSV file with a header, a JSONL file, or a JSON file.
+
+    A JSON file holds either a list of lines or {"description": ..., "lines": [...]}.
+    Returns (description or None, lines).
+    """
+    description = None
+    with open(filename, "r", newline="") as f:
+        if filename.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        elif filename.endswith(".json"):
+            data = json.load(f)
+            if isinstance(data, dict):
+                description = data.get("description")
+                rows = data.get("lines", [])
+            else:
+                rows = data
+        else:
+            reader, rows = csv.DictReader(f), []
+            for row in reader:
+                # DictReader puts values past the header's columns under a None key
+                if None in row:
+                    raise ValueError(f"Line {reader.line_num} of {filename} has more values than the header has columns.")
+                rows.append(row)
+
+    if not rows:
+        raise ValueError(f"{filename} has no RFQ lines.")
+    return description, [normalize_line(row, number, filename) for number, row in enumerate(rows, start=1)]
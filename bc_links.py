@@ -0,0 +1,62 @@
+import re
+from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
+
+import bc_store
+from bc_retry import retry
+from bc_selectors import SEARCH, SEARCH_RESULT
+from bc_session import PO_LIST_URL, RETURN_LIST_URL, RFQ_LIST_URL, VENDOR_LIST_URL, main_frame
+from bc_wait import wait_for_header, wait_for_page
+
+LIST_URLS = {"rfq": RFQ_LIST_URL, "vendor": VENDOR_LIST_URL, "po": PO_LIST_URL, "return": RETURN_LIST_URL}
+
+def remember(page: Page, number):
+    """Cache the bookmark URL of the card currently open on the page so later stages can go straight to it."""
+    url = page.url
+    if "bookmark=" not in url or url in LIST_URLS.values():
+        return None
+    bc_store.save_bookmark(number, url)
+    return url
+
+def open_list(page: Page, frame, url):
+    """Load a list page and wait for its action bar, retrying a slow or failed load."""
+    def load():
+        page.goto(url)
+        wait_for_page(page, frame)
+    retry("open_list", load, scope=frame)
+
+def open_by_bookmark(page: Page, frame, number, url) -> bool:
+    """Open a card from its cached URL and check it shows the expected document."""
+    page.goto(url)
+    # wait_for_header is built on expect(), which raises AssertionError when the heading never shows the number
+    try:
+        wait_for_header(frame, re.escape(number))
+        return True
+    except (PlaywrightTimeoutError, AssertionError):
+        return False
+
+def open_by_search(page: Page, frame, number, kind):
+    """Open a card by searching for its number on the list page."""
+    page.goto(LIST_URLS[kind])
+
+    frame.get_by_text(SEARCH).click()
+    frame.get_by_placeholder(SEARCH).fill(number)
+
+    frame.get_by_role("button", name=SEARCH_RESULT.format(number)).click()
+    wait_for_header(frame, re.escape(number))
+
+def open_document(page: Page, number, kind="rfq"):
+    """Navigate to the card for an RFQ, vendor, PO or return number and return the main content frame.
+
+    Uses the cached bookmark when there is one, otherwise searches the list page and caches the bookmark it lands on.
+    """
+    frame = main_frame(page)
+    url = bc_store.get_bookmark(number)
+    if url:
+        if open_by_bookmark(page, frame, number, url):
+            return frame
+        print(f"Cached link for {number} no longer opens it. Searching instead.")
+        bc_store.forget_bookmark(number)
+
+    retry("open_document", open_by_search, page, frame, number, kind, scope=frame)
+    remember(page, number)
+    return frame
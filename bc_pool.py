@@ -0,0 +1,122 @@
+import os
+import queue
+import socket
+import threading
+from playwright.sync_api import sync_playwright
+
+from bc_accounts import Account, is_throttled
+from bc_evidence import drop_trace, record_failure
+from bc_recycle import ContextLife, recycle
+from bc_retry import begin, classify, spent
+from bc_session import launch_browser, open_session
+from bc_trace import bind
+
+CDP_PORT = int(os.getenv("BC_CDP_PORT", "0"))  # 0 picks a free port per run, so concurrent pools never share a browser
+
+def free_port():
+    """Return a local TCP port nothing is listening on."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def worker_loop(worker_id, account, jobs, results, lock, handler, cdp_url, errors=None):
+    """Pull jobs from the queue and run them on this worker's own context, logged in as its account.
+
+    A worker that cannot connect or log in adds its error to `errors` and leaves the jobs to the other workers.
+    """
+    # The sync API is bound to its thread, so each worker opens its own connection to the shared Chromium
+    bind(worker=worker_id, account=account.email)
+    context = None
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.connect_over_cdp(cdp_url)
+            context, page = open_session(browser, account.email, account.password)
+            life = ContextLife()
+            while True:
+                try:
+                    index, job = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                account.wait_turn()
+                begin()
+                try:
+                    result = {"status": "ok", **(handler(page, job) or {})}
+                    account.succeeded()
+                    drop_trace(context)
+                except Exception as e:
+                    # Locks and throttling were already retried step by step (bc_retry); the job is not run again,
+                    # but the account is paused so its other jobs do not make it worse
+                    if is_throttled(page, e):
+                        delay = account.throttled()
+                        print(f"[worker {worker_id}] {account.email} throttled, pausing it for {delay:.0f} s: {str(e)}")
+                    print(f"[worker {worker_id}] Job {index} failed: {str(e)}")
+                    result = {"status": "error", "error": str(e), "error_kind": classify(e),
+                              "screenshot": record_failure(page, f"job_{index}")}
+                result["retries"] = spent()
+                result["worker"] = worker_id
+                result["account"] = account.email
+                with lock:
+                    results[index] = result
+
+                reason = life.job_done(page)
+                if reason:
+                    print(f"[worker {worker_id}] Recycling its browser context: {reason}.")
+                    context, page = recycle(browser, context, account.email, account.password, life, reason)
+        except Exception as e:
+            print(f"[worker {worker_id}] Stopped: {str(e)}")
+            if errors is not None:
+                with lock:
+                    errors.append(f"{account.email}: {str(e)}")
+        finally:
+            if context is not None:
+                context.close()
+
+def run_pool(jobs, handler, email=None, password=None, workers=4, headless=None, accounts=None):
+    """Run handler(page, job) for every job across a pool of browser contexts sharing one Chromium.
+
+    Jobs are spread over the accounts (default: one account, email/password, with `workers` contexts);
+    each account runs up to its max_concurrency contexts, and a throttled account is paused while the
+    others continue. Returns one result dict per job, in input order.
+    """
+    jobs = list(jobs)
+    accounts = accounts or [Account(email, password, workers)]
+    results = [None] * len(jobs)
+    job_queue = queue.Queue()
+    for index, job in enumerate(jobs):
+        job_queue.put((index, job))
+
+    # One slot per context, interleaving accounts so a small batch still spreads across them
+    slots = []
+    for round_index in range(max(account.max_concurrency for account in accounts)):
+        slots += [account for account in accounts if account.max_concurrency > round_index]
+    slots = slots[:len(jobs)]
+
+    with sync_playwright() as p:
+        port = CDP_PORT or free_port()
+        browser = launch_browser(p, headless, args=[f"--remote-debugging-port={port}"])
+        try:
+            # Log in once per account up front so every worker starts from a cached session
+            for account in {account.email: account for account in slots}.values():
+                context, _ = open_session(browser, account.email, account.password)
+                context.close()
+
+            cdp_url = f"http://127.0.0.1:{port}"
+            lock, errors = threading.Lock(), []
+            threads = [
+                threading.Thread(
+                    target=worker_loop,
+                    args=(worker_id, account, job_queue, results, lock, handler, cdp_url, errors),
+                    daemon=True,
+                )
+                for worker_id, account in enumerate(slots)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            browser.close()
+
+    # Jobs left unprocessed, e.g. when every worker failed to log in
+    error = "not processed" + (f": {'; '.join(errors)}" if errors else "")
+    return [result or {"status": "error", "error": error} for result in results]
@@ -0,0 +1,76 @@
+import os
+
+from bc_session import open_session
+from bc_trace import step
+
+# The BC web client leaks DOM nodes and JS heap over hundreds of navigations, so long-running workers
+# replace their context past these ceilings. Set a ceiling to 0 to switch it off.
+MAX_JOBS = int(os.getenv("BC_RECYCLE_JOBS", "200"))               # Jobs per context
+MAX_HEAP_MB = float(os.getenv("BC_RECYCLE_HEAP_MB", "400"))        # JS heap in use, per page
+MAX_NODES = int(os.getenv("BC_RECYCLE_NODES", "150000"))           # Live DOM nodes, per page
+CHECK_EVERY = max(1, int(os.getenv("BC_RECYCLE_CHECK_EVERY", "10")))  # Jobs between memory checks
+
+def heap_and_nodes(response):
+    """Return the JS heap in MB and DOM node count from a Performance.getMetrics response."""
+    metrics = {metric["name"]: metric["value"] for metric in response["metrics"]}
+    return {"heap_mb": round(metrics.get("JSHeapUsedSize", 0) / 1024 / 1024, 1), "nodes": int(metrics.get("Nodes", 0))}
+
+def memory(page):
+    """Return the page's JS heap in MB and DOM node count from the CDP performance metrics."""
+    cdp = page.context.new_cdp_session(page)
+    try:
+        cdp.send("Performance.enable")
+        return heap_and_nodes(cdp.send("Performance.getMetrics"))
+    finally:
+        cdp.detach()
+
+class ContextLife:
+    """Track the jobs a worker context has run and its memory, and say when it is due to be replaced."""
+
+    def __init__(self, max_jobs=MAX_JOBS, max_heap_mb=MAX_HEAP_MB, max_nodes=MAX_NODES, check_every=CHECK_EVERY):
+        self.max_jobs = max_jobs
+        self.max_heap_mb = max_heap_mb
+        self.max_nodes = max_nodes
+        self.check_every = check_every
+        self.jobs = 0
+        self.last = {}
+
+    def count(self):
+        """Count a finished job and return True when its memory should be checked now."""
+        self.jobs += 1
+        return bool(self.max_heap_mb or self.max_nodes) and not self.jobs % self.check_every
+
+    def job_done(self, page):
+        """Count a finished job and return why the context should be recycled now, or None."""
+        if not self.count():
+            return self.worn()
+        try:
+            self.last = memory(page)
+        except Exception as e:
+            # A page that cannot report its metrics is not worth keeping either
+            return f"no memory metrics ({str(e)})"
+        return self.worn()
+
+    def worn(self):
+        """Return why the context is past a ceiling, from its job count and last memory check, or None."""
+        if self.max_jobs and self.jobs >= self.max_jobs:
+            return f"{self.jobs} jobs"
+        if self.max_heap_mb and self.last.get("heap_mb", 0) > self.max_heap_mb:
+            return f"JS heap {self.last['heap_mb']} MB"
+        if self.max_nodes and self.last.get("nodes", 0) > self.max_nodes:
+            return f"{self.last['nodes']} DOM nodes"
+        return None
+
+    def recycled(self):
+        self.jobs = 0
+        self.last = {}
+
+def recycle(browser, context, email, password, life, reason):
+    """Close a worn context and return a fresh (context, page) from the account's cached login."""
+    with step("context.recycle", reason=reason, jobs=life.jobs, **life.last):
+        try:
+            context.close()
+        except Exception:
+            pass
+        life.recycled()
+        return open_session(browser, email, password)
@@ -0,0 +1,142 @@
+import os
+import re
+import time
+import random
+import contextvars
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from bc_trace import step
+
+# Extra attempts for one step, and retries one transaction may spend across all its steps
+STEP_RETRIES = int(os.getenv("BC_STEP_RETRIES", "2"))
+TRANSACTION_BUDGET = int(os.getenv("BC_RETRY_BUDGET", "6"))
+
+# Full-jitter exponential backoff: a random pause between 0 and min(MAX, BASE * 2^attempt) seconds
+BACKOFF_BASE = float(os.getenv("BC_RETRY_BASE", "1"))
+BACKOFF_MAX = float(os.getenv("BC_RETRY_MAX", "15"))
+
+# HTTP statuses worth another try: timeouts, throttling and gateway/service errors
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# BC dialog and browser messages of passing trouble: concurrent edits, locks, throttling, lost connections
+TRANSIENT_PATTERN = re.compile(
+    r"changed by another user|another user has (modified|changed)|record is locked|locked by another user|"
+    r"too many requests|being throttled|try again later|connection (to the server )?(was|has been) lost|"
+    r"session (has )?expired|something went wrong|service unavailable|net::ERR_|Target crashed",
+    re.IGNORECASE,
+)
+
+# BC validation messages: the data is wrong and the same input will fail again
+PERMANENT_PATTERN = re.compile(
+    r"does not exist|must have a value|is not valid|cannot be found|there is no .* within the filter|"
+    r"you do not have permission|already exists",
+    re.IGNORECASE,
+)
+
+DIALOG_SELECTOR = "[role='dialog'], [role='alertdialog']"
+
+# The running transaction's {"budget", "spent"}, per thread or asyncio task
+_transaction = contextvars.ContextVar("bc_retry_transaction", default=None)
+
+class TransientError(RuntimeError):
+    """A failure known to pass on its own, e.g. an HTTP 503 from BC."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+def begin(budget=TRANSACTION_BUDGET):
+    """Start a transaction on this thread or task with a fresh retry budget."""
+    _transaction.set({"budget": budget, "spent": 0})
+
+def current():
+    """Return the running transaction, starting one when none was begun."""
+    transaction = _transaction.get()
+    if transaction is None:
+        begin()
+        transaction = _transaction.get()
+    return transaction
+
+def spent():
+    """Return how many retries the current transaction has used."""
+    return current()["spent"]
+
+def dialog_text(scope):
+    """Return the text of the dialog BC is showing on a page or frame, or ""."""
+    if scope is None:
+        return ""
+    try:
+        dialog = scope.locator(DIALOG_SELECTOR).last
+        return dialog.inner_text(timeout=500) if dialog.is_visible() else ""
+    except PlaywrightError:
+        return ""
+
+def classify(error, scope=None, dialog=None) -> str:
+    """Return "transient" for failures worth retrying (timeouts, BC concurrency dialogs, 5xx/429) or "permanent".
+
+    dialog is the text of the dialog on the page when the caller has already read it, e.g. from an async page.
+    """
+    if isinstance(error, (ValueError, KeyError, TypeError, FileNotFoundError)):
+        return "permanent"
+    text = f"{error}\n{dialog_text(scope) if dialog is None else dialog}"
+    if PERMANENT_PATTERN.search(text):
+        return "permanent"
+    if isinstance(error, TransientError) or getattr(error, "status", None) in TRANSIENT_STATUSES:
+        return "transient"
+    # expect() raises AssertionError when a value or element did not show up in time
+    if isinstance(error, (PlaywrightTimeoutError, AssertionError)) or TRANSIENT_PATTERN.search(text):
+        return "transient"
+    return "permanent"
+
+def dismiss_dialog(scope):
+    """Close a BC error dialog so the retried step starts from the card again."""
+    if scope is None:
+        return
+    try:
+        dialog = scope.locator(DIALOG_SELECTOR).last
+        if not dialog.is_visible():
+            return
+        for name in ("OK", "Close"):
+            button = dialog.get_by_role("button", name=name, exact=True)
+            if button.count():
+                button.first.click(timeout=2000)
+                return
+    except PlaywrightError:
+        pass
+
+def backoff(attempt):
+    """Return the pause before retry number attempt + 1."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def charge(name, error, attempt, attempts, kind):
+    """Take a retry of a failed step from the transaction's budget and return the pause before it.
+
+    Returns None when the step should fail instead: the error is permanent, or its attempts or the budget are used up.
+    """
+    transaction = current()
+    if attempt >= attempts or transaction["budget"] <= 0 or kind != "transient":
+        return None
+    transaction["budget"] -= 1
+    transaction["spent"] += 1
+    delay = backoff(attempt)
+    print(f"{name} failed, retrying in {delay:.1f} s ({attempt + 1}/{attempts}): {str(error).splitlines()[0]}")
+    return delay
+
+def retry(name, action, *args, scope=None, attempts=None, **kwargs):
+    """Run an idempotent step, retrying transient failures with jittered backoff within the transaction's budget.
+
+    scope is the page or frame whose dialogs explain a failure; permanent failures are raised straight away.
+    """
+    attempts = STEP_RETRIES if attempts is None else attempts
+    attempt = 0
+    while True:
+        try:
+            return action(*args, **kwargs)
+        except Exception as e:
+            delay = charge(name, e, attempt, attempts, classify(e, scope))
+            if delay is None:
+                raise
+            attempt += 1
+            with step("retry", of=name, attempt=attempt, delay=round(delay, 2), error=str(e)[:200]):
+                dismiss_dialog(scope)
+                time.sleep(delay)
@@ -0,0 +1,52 @@
+import re
+
+# Names of the BC elements the stage scripts click and fill, shared by the sync scripts and async_engine.py
+# so both engines drive the same steps. Field labels are BC's accessible names, "<caption>, <value>".
+
+# Document numbers as they appear in the card heading
+VENDOR_NO_PATTERN = r"V\d+"
+RFQ_NO_PATTERN = r"RFQ\d+"
+
+# Sign-in pages
+EMAIL_BOX = "someone@example.com"
+PASSWORD_BOX = "Password"
+NEXT = "Next"
+SIGN_IN = "Sign in"
+STAY_SIGNED_IN_NO = "No"
+
+# List pages
+SEARCH = "Search"
+SEARCH_RESULT = "No., {}"  # The number cell of a search result, formatted with the document number
+
+# Card actions
+NEW = "New"
+PROCESS = "Process"
+SHOW_MORE = "General, Show more"
+TOGGLE_FACTBOX = "Toggle FactBox"
+CONFIRM = "Yes"
+
+# Vendor card
+VENDOR_NEW_FOCUS = "Description, Vendor LOCAL"
+VENDOR_NAME = "Name, (Blank)"
+REGISTRATION = "Registration"
+PIN_NO = "PIN No., (Blank)"
+
+# RFQ card
+REQUISITION_TYPE = "Requisition Type, (Blank)"
+REQUISITION_TYPE_RFQ = "1"
+NEW_DESCRIPTION = "Description, (Blank)"
+DESCRIPTION = re.compile(r"^Description,")
+LINE_ROW = re.compile(r"Location Code,")
+SEND_TO_PROCUREMENT = "Send to Procurement"
+
+# Quotation upload and the RFQ action
+FILE_DROP = "Doc. Links File Drop"
+UPLOAD = "Upload"  # Both the menu item and the dialog it opens
+COMPLETE_ACTION = "Complete Action"
+
+# Approval requests
+REQUEST_APPROVAL = "Request Approval"
+SEND_APPROVAL_REQUEST = "Send Approval Request"
+LOOK_UP_VALUE = "Look up value"
+APPROVER = "User ID, ICTTEST"
+OK = "OK"
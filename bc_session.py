@@ -0,0 +1,138 @@
+import os
+import re
+import time
+from dotenv import load_dotenv
+from playwright.sync_api import Browser, Page
+
+from bc_evidence import start_tracing
+from bc_retry import retry
+from bc_selectors import EMAIL_BOX, PASSWORD_BOX, NEXT, SIGN_IN, STAY_SIGNED_IN_NO
+from bc_trace import step
+
+load_dotenv()  # Load environment variables from .env file
+
+# Point these at mock_bc.py (or another tenant) through the environment
+LOGIN_URL = os.getenv("BC_LOGIN_URL", "https://login.microsoftonline.com/dayliffCloud.onmicrosoft.com/wsfed?wa=wsignin1.0&wtrealm=https%3a%2f%2fdayliffCloud.onmicrosoft.com%2fbusinesscentral&wreply=https%3a%2f%2fbctest.dayliff.com%2fBC160%2fSignIn%3fReturnUrl%3d%252fBC160%252f")
+BC_URL = os.getenv("BC_URL", "https://bctest.dayliff.com/BC160/")
+
+# List pages used by the workflow stages
+VENDOR_LIST_URL = BC_URL + "?company=KENYA&bookmark=21%3bFwAAAAJ7%2f0QAIABIACAATA%3d%3d&page=27&dc=0"
+RFQ_LIST_URL = BC_URL + "?company=KENYA&bookmark=29%3busMAAAJ7%2f1AAUgAwADAAMAAyADUAMwA3&page=50152&dc=0"
+PO_LIST_URL = BC_URL + "?company=KENYA&page=9307&dc=0"
+RETURN_LIST_URL = BC_URL + "?company=KENYA&page=9311&dc=0"
+
+MAIN_FRAME = "iframe[title='Main Content']"
+
+# Cached authenticated storage state, one file per account
+SESSION_DIR = os.getenv("BC_SESSION_DIR", ".sessions")
+SESSION_MAX_AGE = int(os.getenv("BC_SESSION_MAX_AGE", 8 * 60 * 60))  # Seconds before a cached login is discarded
+
+# Runtime configuration. Set BC_HEADLESS=0 to watch the browser, BC_BLOCK_RESOURCES=0 to load everything
+HEADLESS = os.getenv("BC_HEADLESS", "1") != "0"
+BLOCK_RESOURCES = os.getenv("BC_BLOCK_RESOURCES", "1") != "0"
+BLOCKED_TYPES = set(os.getenv("BC_BLOCKED_TYPES", "image,media,font").split(","))
+# Telemetry and analytics requests BC and the sign-in page make that the workflow never needs
+BLOCKED_URL_PARTS = (
+    "dc.services.visualstudio.com",
+    "applicationinsights",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "clarity.ms",
+    "browser.events.data.microsoft.com",
+    "/telemetry",
+)
+
+def login(page: Page, email: str, password: str):
+    """Sign in to Business Central through the Microsoft wsfed flow and open BC160."""
+    page.goto(LOGIN_URL)
+    page.get_by_placeholder(EMAIL_BOX).fill(email)
+    page.get_by_role("button", name=NEXT).click()
+    page.get_by_placeholder(PASSWORD_BOX).fill(password)
+    page.get_by_role("button", name=SIGN_IN).click()
+    page.get_by_role("button", name=STAY_SIGNED_IN_NO).click()
+    page.goto(BC_URL)
+
+def launch_browser(p, headless=None, **kwargs) -> Browser:
+    """Launch Chromium with the configured headless mode."""
+    return p.chromium.launch(headless=HEADLESS if headless is None else headless, **kwargs)
+
+def is_blocked(request) -> bool:
+    """Return True for requests the workflow can do without: images, fonts, media and analytics."""
+    if request.resource_type in BLOCKED_TYPES:
+        return True
+    return any(part in request.url for part in BLOCKED_URL_PARTS)
+
+def configure_context(context, block=None):
+    """Install request routing that drops non-essential resources and start failure tracing on a new context."""
+    if BLOCK_RESOURCES if block is None else block:
+        context.route("**/*", lambda route: route.abort() if is_blocked(route.request) else route.continue_())
+    start_tracing(context)
+    return context
+
+def main_frame(page: Page):
+    """Return the BC web client's main content frame."""
+    return page.frame_locator(MAIN_FRAME).first
+
+def session_path(email: str) -> str:
+    """Return the storage state file used to cache the login for an account."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", email.strip().lower())
+    return os.path.join(SESSION_DIR, f"{safe_name}.json")
+
+def load_cached_session(email: str):
+    """Return the cached storage state path for an account, or None if missing or expired."""
+    path = session_path(email)
+    if not os.path.exists(path):
+        return None
+    if time.time() - os.path.getmtime(path) > SESSION_MAX_AGE:
+        print(f"Cached session for {email.strip()} has expired.")
+        return None
+    return path
+
+def save_session(context, email: str) -> str:
+    """Save the authenticated storage state of a context for later runs."""
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    path = session_path(email)
+    context.storage_state(path=path)
+    print(f"Session saved to {path}.")
+    return path
+
+def clear_session(email: str):
+    """Remove the cached storage state for an account."""
+    path = session_path(email)
+    if os.path.exists(path):
+        os.remove(path)
+
+def is_logged_in(page: Page) -> bool:
+    """Check that the page reached BC160 instead of being redirected to the sign-in page."""
+    if not page.url.startswith(BC_URL):
+        return False
+    try:
+        page.wait_for_selector(MAIN_FRAME, state="attached", timeout=15000)
+    except Exception:
+        return False
+    return True
+
+def open_session(browser: Browser, email: str, password: str, block=None):
+    """Return a (context, page) pair logged in to BC160, reusing the cached session when it is still valid."""
+    cached = load_cached_session(email)
+    if cached:
+        context = configure_context(browser.new_context(storage_state=cached), block)
+        page = context.new_page()
+        with step("session.restore") as event:
+            page.goto(BC_URL)
+            event["valid"] = is_logged_in(page)
+        if event["valid"]:
+            print(f"Reusing cached session for {email.strip()}.")
+            return context, page
+
+        # Session expired or was redirected to sign in, log in again once
+        print(f"Cached session for {email.strip()} is no longer valid. Logging in again.")
+        context.close()
+        clear_session(email)
+
+    context = configure_context(browser.new_context(), block)
+    page = context.new_page()
+    with step("login"):
+        retry("login", login, page, email, password, scope=page)
+    save_session(context, email)
+    return context, page
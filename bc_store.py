@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+STORE_PATH = os.getenv("BC_STORE_PATH", "transactions.db")
+LEGACY_FILE = "extracted_data.json"
+
+# Stages each document kind moves through, in order
+STAGES = {
+    "vendor": ["created", "name_entered", "registered"],
+    "rfq": ["created", "lines_entered", "sent_to_procurement", "actioned", "approval_requested", "po_requested"],
+    "po": ["created", "posted"],
+    "return": ["created", "vendor_entered", "lines_copied", "posted"],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    number TEXT NOT NULL UNIQUE,
+    stage TEXT NOT NULL,
+    parent TEXT,
+    data TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_kind_stage ON transactions (kind, stage, id);
+CREATE INDEX IF NOT EXISTS idx_transactions_parent ON transactions (parent);
+CREATE TABLE IF NOT EXISTS stage_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    number TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_stage_history_number ON stage_history (number, id);
+CREATE TABLE IF NOT EXISTS bookmarks (
+    number TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vendor_index (
+    vendor_no TEXT PRIMARY KEY,
+    name TEXT,
+    name_key TEXT,
+    pin_no TEXT,
+    source TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vendor_index_pin ON vendor_index (pin_no);
+CREATE INDEX IF NOT EXISTS idx_vendor_index_name ON vendor_index (name_key);
+"""
+
+_local = threading.local()
+
+def connect(path=None):
+    """Return this thread's connection to the transaction store, creating the schema on first use."""
+    path = path or STORE_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    if path not in connections:
+        # Autocommit, WAL and a busy timeout let many workers and processes write at once
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        connections[path] = conn
+        if path == STORE_PATH:
+            import_legacy(conn)
+    return connections[path]
+
+def _to_dict(row):
+    """Convert a transactions row to a plain dict."""
+    if row is None:
+        return None
+    record = dict(row)
+    record["data"] = json.loads(record["data"])
+    return record
+
+def record(kind, number, stage, parent=None, path=None, **data):
+    """Insert or update a document and append the stage it reached to its history.
+
+    A document only moves forward along STAGES: a late or repeated record of an earlier stage keeps its stage.
+    """
+    conn = connect(path)
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        stages = STAGES.get(kind, [])
+        existing = conn.execute("SELECT stage FROM transactions WHERE number = ?", (number,)).fetchone()
+        current = existing["stage"] if existing else None
+        if current in stages and stage in stages and stages.index(current) > stages.index(stage):
+            stage_now = current
+        else:
+            stage_now = stage
+        conn.execute(
+            """
+            INSERT INTO transactions (kind, number, stage, parent, data, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (number) DO UPDATE SET
+                stage = excluded.stage,
+                parent = COALESCE(excluded.parent, transactions.parent),
+                data = json_patch(transactions.data, excluded.data),
+                updated_at = excluded.updated_at
+            """,
+            (kind, number, stage_now, parent, json.dumps(data), now, now),
+        )
+        conn.execute("INSERT INTO stage_history (number, stage, at) VALUES (?, ?, ?)", (number, stage, now))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if stage_now == stage:
+        print(f"Recorded {kind} {number} at stage '{stage}'.")
+    else:
+        print(f"Recorded {kind} {number} at stage '{stage}'; it stays at '{stage_now}'.")
+
+def annotate(number, path=None, **data):
+    """Merge data into a document's record without changing its stage or history, e.g. progress within a stage."""
+    connect(path).execute(
+        "UPDATE transactions SET data = json_patch(data, ?), updated_at = ? WHERE number = ?",
+        (json.dumps(data), time.time(), number),
+    )
+
+def get(number, path=None):
+    """Return the record for a vendor/RFQ number, or None."""
+    row = connect(path).execute("SELECT * FROM transactions WHERE number = ?", (number,)).fetchone()
+    return _to_dict(row)
+
+def history(number, path=None):
+    """Return the (stage, timestamp) history of a document, oldest first."""
+    rows = connect(path).execute("SELECT stage, at FROM stage_history WHERE number = ? ORDER BY id", (number,))
+    return [(row["stage"], row["at"]) for row in rows]
+
+def children(parent, path=None):
+    """Return the records linked to a parent document, e.g. the RFQs raised for a vendor."""
+    rows = connect(path).execute("SELECT * FROM transactions WHERE parent = ? ORDER BY id", (parent,))
+    return [_to_dict(row) for row in rows]
+
+def stages_before(kind, stage):
+    """Return the stages of a document kind that come before the given stage."""
+    stages = STAGES[kind]
+    return stages[:stages.index(stage)]
+
+def reached(number, stage, path=None):
+    """Return True if a document has already completed the given stage (its checkpoint)."""
+    existing = get(number, path) if number else None
+    if existing is None:
+        return False
+    stages = STAGES[existing["kind"]]
+    return existing["stage"] in stages and stages.index(existing["stage"]) >= stages.index(stage)
+
+def pending(kind, before, path=None, limit=None):
+    """Return documents of a kind that have not yet reached the given stage, newest first."""
+    stages = stages_before(kind, before)
+    if not stages:
+        return []
+    query = f"SELECT * FROM transactions WHERE kind = ? AND stage IN ({','.join('?' * len(stages))}) ORDER BY id DESC"
+    params = [kind, *stages]
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return [_to_dict(row) for row in connect(path).execute(query, params)]
+
+def at_stage(kind, stage, path=None):
+    """Return documents of a kind currently at the given stage, newest first."""
+    rows = connect(path).execute("SELECT * FROM transactions WHERE kind = ? AND stage = ? ORDER BY id DESC", (kind, stage))
+    return [_to_dict(row) for row in rows]
+
+def latest(kind, before=None, path=None):
+    """Return the newest document of a kind, optionally only one that has not yet reached a stage."""
+    if before:
+        records = pending(kind, before, path, limit=1)
+        return records[0] if records else None
+    row = connect(path).execute("SELECT * FROM transactions WHERE kind = ? ORDER BY id DESC LIMIT 1", (kind,)).fetchone()
+    return _to_dict(row)
+
+def save_bookmark(number, url, path=None):
+    """Cache the card-page URL (with its BC bookmark) for a document number."""
+    connect(path).execute(
+        "INSERT INTO bookmarks (number, url, updated_at) VALUES (?, ?, ?) ON CONFLICT (number) DO UPDATE SET url = excluded.url, updated_at = excluded.updated_at",
+        (number, url, time.time()),
+    )
+
+def get_bookmark(number, path=None):
+    """Return the cached card-page URL for a document number, or None."""
+    row = connect(path).execute("SELECT url FROM bookmarks WHERE number = ?", (number,)).fetchone()
+    return row["url"] if row else None
+
+def forget_bookmark(number, path=None):
+    """Drop a cached card-page URL that no longer opens the document."""
+    connect(path).execute("DELETE FROM bookmarks WHERE number = ?", (number,))
+
+def import_legacy(conn, filename=LEGACY_FILE):
+    """Import entries from the old extracted_data.json into an empty store."""
+    if not os.path.exists(filename):
+        return
+    if conn.execute("SELECT 1 FROM transactions LIMIT 1").fetchone():
+        return
+    try:
+        with open(filename, "r") as f:
+            entries = json.load(f)
+    except json.JSONDecodeError:
+        print(f"Error reading {filename}. Skipping import.")
+        return
+    if not isinstance(entries, list):
+        entries = [entries]
+
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    for entry in entries:
+        for key, kind in (("vendor_no", "vendor"), ("RFQ_no", "rfq")):
+            if entry.get(key):
+                # The old file has no stage information, so these never show up as pending work
+                conn.execute(
+                    "INSERT OR IGNORE INTO transactions (kind, number, stage, created_at, updated_at) VALUES (?, ?, 'imported', ?, ?)",
+                    (kind, entry[key], now, now),
+                )
+    conn.execute("COMMIT")
+    print(f"Imported {len(entries)} entries from {filename}.")
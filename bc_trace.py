@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+import contextvars
+from contextlib import contextmanager
+
+TRACE_FILE = os.getenv("BC_TRACE_FILE", os.path.join("traces", "steps.jsonl"))
+
+# Bound fields follow the thread, or the asyncio task, they were bound on. Each bind() sets a new dict,
+# so a task never changes the fields of the task that started it.
+_context = contextvars.ContextVar("bc_trace_context", default={})
+_write_lock = threading.Lock()
+
+def bind(**fields):
+    """Attach fields (worker id, vendor_no, RFQ_no...) to every step recorded later on this thread or task."""
+    _context.set({**_context.get(), **{key: value for key, value in fields.items() if value is not None}})
+
+def unbind(*keys):
+    """Remove bound fields from this thread or task, or all of them when no keys are given."""
+    _context.set({key: value for key, value in _context.get().items() if keys and key not in keys})
+
+def emit(event, filename=None):
+    """Append one event as a JSON line to the trace file."""
+    filename = filename or TRACE_FILE
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    line = json.dumps(event) + "\n"
+    with _write_lock:
+        with open(filename, "a") as f:
+            f.write(line)
+
+@contextmanager
+def step(name, **fields):
+    """Time a logical workflow step and record its outcome.
+
+    Yields the event dict so the caller can add fields found during the step, e.g. the RFQ number.
+    """
+    event = {
+        "step": name,
+        "worker": threading.current_thread().name,
+        "pid": os.getpid(),
+        **_context.get(),
+        **fields,
+    }
+    event["start"] = time.time()
+    started = time.perf_counter()
+    try:
+        yield event
+        event["outcome"] = "ok"
+    except BaseException as e:
+        event["outcome"] = "error"
+        event["error"] = f"{type(e).__name__}: {str(e)}"[:500]
+        raise
+    finally:
+        event["end"] = time.time()
+        event["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        emit(event)
+
+def load_events(filename=None):
+    """Read every event from a trace file, skipping lines that are cut short."""
+    events = []
+    with open(filename or TRACE_FILE, "r") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return events
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values (nearest rank)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(events, outcome=None):
+    """Return per-step count, error count and p50/p95/p99 duration in milliseconds."""
+    durations, errors = {}, {}
+    for event in events:
+        if outcome and event.get("outcome") != outcome:
+            continue
+        durations.setdefault(event["step"], []).append(event["duration_ms"])
+        if event.get("outcome") == "error":
+            errors[event["step"]] = errors.get(event["step"], 0) + 1
+
+    return {
+        name: {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(statistics.median(values), 1),
+            "p95_ms": round(percentile(values, 95), 1),
+            "p99_ms": round(percentile(values, 99), 1),
+        }
+        for name, values in durations.items()
+    }
+
+def print_summary(summary):
+    print(f"{'step':<32} {'count':>7} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    # Slowest steps first, since those are the bottlenecks
+    for name, stats in sorted(summary.items(), key=lambda item: item[1]["p95_ms"], reverse=True):
+        print(f"{name:<32} {stats['count']:>7} {stats['errors']:>7} {stats['p50_ms']:>10} {stats['p95_ms']:>10} {stats['p99_ms']:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize workflow step timings.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="Print p50/p95/p99 per step")
+    summary_parser.add_argument("file", nargs="?", default=TRACE_FILE)
+    summary_parser.add_argument("--outcome", choices=["ok", "error"], help="Only include steps with this outcome")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"No trace file found at {args.file}.")
+        sys.exit(1)
+    print_summary(summarize(load_events(args.file), args.outcome))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import re
+import csv
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+from playwright.sync_api import sync_playwright
+
+import bc_api
+import bc_store
+
+load_dotenv()  # Load environment variables from .env file
+
+# Legal-form words spelled several ways in vendor names, mapped to one spelling
+NAME_WORDS = {"limited": "ltd", "company": "co", "corporation": "corp", "incorporated": "inc", "and": "&"}
+
+# Column headings of the vendor list (page 27) when exported with Open in Excel and saved as CSV
+EXPORT_COLUMNS = {"vendor_no": ("No.", "No", "vendor_no"), "name": ("Name", "vendor_name"), "pin_no": ("PIN No.", "PIN_No", "pin_no")}
+
+def normalize_pin(pin_no):
+    """Return a PIN No. in the form it is compared in: upper case without spaces or dashes."""
+    return re.sub(r"[\s-]+", "", str(pin_no or "")).upper() or None
+
+def normalize_name(name):
+    """Return a vendor name in the form it is compared in, e.g. "Acme Supplies Limited." -> "acme supplies ltd"."""
+    words = re.sub(r"[^\w&]+", " ", str(name or "").casefold()).split()
+    return " ".join(NAME_WORDS.get(word, word) for word in words) or None
+
+class VendorIndex:
+    """In-memory copy of the vendor index for checking a whole batch before any browser work."""
+
+    def __init__(self, entries=()):
+        self.by_pin = {}
+        self.by_name = {}
+        for vendor_no, name, pin_no in entries:
+            self.add(vendor_no, name, pin_no)
+
+    def add(self, vendor_no, name, pin_no):
+        if normalize_pin(pin_no):
+            self.by_pin.setdefault(normalize_pin(pin_no), vendor_no)
+        if normalize_name(name):
+            self.by_name.setdefault(normalize_name(name), vendor_no)
+
+    def match(self, vendor_name, pin_no, by_name=True):
+        """Return (vendor_no, "pin" or "name") of an indexed vendor with the same PIN No. or name, or (None, None)."""
+        if normalize_pin(pin_no) in self.by_pin:
+            return self.by_pin[normalize_pin(pin_no)], "pin"
+        if by_name and normalize_name(vendor_name) in self.by_name:
+            return self.by_name[normalize_name(vendor_name)], "name"
+        return None, None
+
+    def __len__(self):
+        return len(set(self.by_pin.values()) | set(self.by_name.values()))
+
+def remember(vendor_no, name, pin_no, source="created", path=None):
+    """Add or update one vendor in the index, e.g. right after it is created."""
+    bc_store.connect(path).execute(
+        """
+        INSERT INTO vendor_index (vendor_no, name, name_key, pin_no, source, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (vendor_no) DO UPDATE SET
+            name = COALESCE(excluded.name, vendor_index.name),
+            name_key = COALESCE(excluded.name_key, vendor_index.name_key),
+            pin_no = COALESCE(excluded.pin_no, vendor_index.pin_no),
+            source = excluded.source,
+            updated_at = excluded.updated_at
+        """,
+        (vendor_no, name or None, normalize_name(name), normalize_pin(pin_no), source, time.time()),
+    )
+
+def remember_many(vendors, source, path=None):
+    """Add or update many (vendor_no, name, pin_no) entries in one transaction and return how many were written."""
+    conn = bc_store.connect(path)
+    now = time.time()
+    rows = [(vendor_no, name or None, normalize_name(name), normalize_pin(pin_no), source, now) for vendor_no, name, pin_no in vendors if vendor_no]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            """
+            INSERT INTO vendor_index (vendor_no, name, name_key, pin_no, source, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (vendor_no) DO UPDATE SET
+                name = excluded.name, name_key = excluded.name_key, pin_no = excluded.pin_no,
+                source = excluded.source, updated_at = excluded.updated_at
+            """,
+            rows,
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(rows)
+
+def load_index(path=None):
+    """Read the whole index into memory, vendors created by the workflow included."""
+    rows = bc_store.connect(path).execute("SELECT vendor_no, name, pin_no FROM vendor_index ORDER BY vendor_no")
+    index = VendorIndex((row["vendor_no"], row["name"], row["pin_no"]) for row in rows)
+    # Vendors in the transaction store that were created before the index existed
+    for record in bc_store.connect(path).execute("SELECT number, data FROM transactions WHERE kind = 'vendor'"):
+        data = json.loads(record["data"])
+        index.add(record["number"], data.get("vendor_name"), data.get("pin_no"))
+    return index
+
+def refresh_from_api(api, path=None):
+    """Rebuild the index from BC's vendor web service, a few paged OData calls for the whole vendor list."""
+    rows = bc_api.query(api, "vendor", select=["No", "Name", "PIN_No"])
+    return remember_many([(row["No"], row.get("Name"), row.get("PIN_No")) for row in rows], "api", path)
+
+def refresh_from_export(filename, path=None):
+    """Load the index from the vendor list (page 27) exported to Excel and saved as CSV."""
+    with open(filename, "r", newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    if rows:
+        missing = [key for key, headings in EXPORT_COLUMNS.items() if key != "name" and not any(heading in rows[0] for heading in headings)]
+        if missing:
+            raise ValueError(f"{filename} needs the columns {', '.join(EXPORT_COLUMNS[key][0] for key in missing)}.")
+
+    def column(row, key):
+        return next((row[heading].strip() for heading in EXPORT_COLUMNS[key] if row.get(heading)), None)
+    return remember_many([(column(row, "vendor_no"), column(row, "name"), column(row, "pin_no")) for row in rows], "export", path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local index of BC vendors by PIN No. and name, to catch duplicates before creating them.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    refresh_parser = subparsers.add_parser("refresh", help="Fill the index from BC's OData vendor list, or from an exported CSV")
+    refresh_parser.add_argument("--file", help="Vendor list (page 27) exported to CSV with No., Name and PIN No. columns")
+    lookup_parser = subparsers.add_parser("lookup", help="Check whether a vendor is indexed")
+    lookup_parser.add_argument("--pin", help="PIN No.")
+    lookup_parser.add_argument("--name", help="Vendor name")
+    subparsers.add_parser("stats", help="Show how many vendors are indexed and where they came from")
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        if args.file:
+            count = refresh_from_export(args.file)
+        else:
+            email, password = os.getenv("EMAIL"), os.getenv("PASSWORD")
+            if not email or not password:
+                parser.error("EMAIL and PASSWORD must be set in .env, or pass --file.")
+            with sync_playwright() as p, bc_api.open_api(p, email, password) as api:
+                count = refresh_from_api(api)
+        print(f"Indexed {count} vendors.")
+    elif args.command == "lookup":
+        if not (args.pin or args.name):
+            parser.error("give --pin or --name.")
+        vendor_no, reason = load_index().match(args.name, args.pin, by_name=bool(args.name))
+        print(f"Already exists as {vendor_no} (same {'PIN No.' if reason == 'pin' else 'name'})." if vendor_no else "Not in the index.")
+    else:
+        rows = bc_store.connect().execute("SELECT source, COUNT(*) AS count, MAX(updated_at) AS updated_at FROM vendor_index GROUP BY source")
+        for row in rows:
+            print(f"{row['source']}: {row['count']} vendors, last updated {time.strftime('%Y-%m-%d %H:%M', time.localtime(row['updated_at']))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+import re
+from playwright.sync_api import Page, expect
+
+# Default timeout per kind of step, in milliseconds. Override with BC_TIMEOUT_<STEP>, e.g. BC_TIMEOUT_HEADER=20000
+STEP_TIMEOUTS = {
+    "page": 30000,     # List or card page finished loading
+    "header": 10000,   # Card heading showing the document number
+    "commit": 10000,   # Field value accepted by the server
+    "idle": 15000,     # BC busy indicator cleared
+    "dialog": 10000,   # Confirmation dialog shown
+}
+
+# Elements BC shows while a server round-trip is in progress
+BUSY_SELECTOR = "[aria-busy='true'], div[class*='spinner'], div[class*='progress-indicator']"
+HEADER_SELECTOR = "div[role='heading'][class*='title---'][aria-level='2']"
+
+def timeout_for(step: str) -> int:
+    """Return the timeout in milliseconds configured for a step."""
+    value = os.getenv(f"BC_TIMEOUT_{step.upper()}")
+    return int(value) if value else STEP_TIMEOUTS[step]
+
+def wait_until_idle(frame, timeout=None):
+    """Wait until the BC busy indicator has cleared in the frame."""
+    frame.locator(BUSY_SELECTOR).first.wait_for(state="hidden", timeout=timeout or timeout_for("idle"))
+
+def wait_for_page(page: Page, frame, menu_item="New", timeout=None):
+    """Wait until a BC page has rendered its action bar inside the main content frame."""
+    timeout = timeout or timeout_for("page")
+    page.wait_for_load_state("domcontentloaded", timeout=timeout)
+    frame.get_by_role("menuitem", name=menu_item, exact=True).first.wait_for(state="visible", timeout=timeout)
+
+def wait_for_header(frame, pattern: str, timeout=None) -> str:
+    """Wait until the card heading contains a document number matching pattern and return its text."""
+    timeout = timeout or timeout_for("header")
+    header = frame.locator(HEADER_SELECTOR).first
+    expect(header).to_have_text(re.compile(pattern), timeout=timeout)
+    return header.text_content()
+
+def wait_for_committed(frame, field: str, value: str, timeout=None):
+    """Wait until BC has accepted a field value, which it reflects in the field's aria label."""
+    frame.get_by_label(f"{field}, {value}".strip()).first.wait_for(state="attached", timeout=timeout or timeout_for("commit"))
+    wait_until_idle(frame)
+
+def wait_for_dialog(frame, button="Yes", timeout=None):
+    """Wait until a confirmation dialog with the given button is shown and return the button."""
+    locator = frame.get_by_role("button", name=button)
+    locator.wait_for(state="visible", timeout=timeout or timeout_for("dialog"))
+    return locator
@@ -0,0 +1,188 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import statistics
+import tempfile
+
+import mock_bc
+import bc_trace
+from bc_trace import percentile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_STAGES = ["vendor", "rfq", "action", "approve", "po"]
+
+def configure(server, workdir):
+    """Point the workflow at the mock and keep screenshots, sessions and the store out of the repo."""
+    os.environ.update(mock_bc.env_for(server))
+    use_workdir(workdir)
+
+def use_workdir(workdir):
+    """Keep the store, sessions, traces and screenshots of a run in workdir, with a quotation to upload."""
+    os.environ["BC_STORE_PATH"] = os.path.join(workdir, "transactions.db")
+    os.environ["BC_SESSION_DIR"] = os.path.join(workdir, ".sessions")
+    os.environ["BC_TRACE_FILE"] = bc_trace.TRACE_FILE = os.path.join(workdir, "steps.jsonl")
+    os.environ.setdefault("EMAIL", "bench@example.com")
+    os.environ.setdefault("PASSWORD", "bench")
+    with open(os.path.join(workdir, "quotation.pdf"), "wb") as f:
+        f.write(b"%PDF-1.4\n% benchmark quotation\n")
+    sys.path.insert(0, REPO_DIR)
+    os.chdir(workdir)
+
+def load_stages(vendor_name=None):
+    """Import the stage scripts (after configure) and return stage name -> step(page, context) functions.
+
+    Vendors get a unique name unless vendor_name is given, e.g. for a run that must repeat the same requests.
+    """
+    create_vendor = importlib.import_module("create_vendor")
+    request_RFQ = importlib.import_module("request_RFQ")
+    action_RFQ = importlib.import_module("action_RFQ")
+    approve_rfq = importlib.import_module("approve_rfq")
+    rfq_to_po = importlib.import_module("RFQ-to-PO")
+
+    def vendor(page, ctx):
+        ctx["vendor_no"] = create_vendor.run_stage(page, vendor_name or f"Bench vendor {time.time_ns()}", "P000000000")
+
+    def rfq(page, ctx):
+        ctx["RFQ_no"] = request_RFQ.run_stage(page, ctx.get("vendor_no"))
+
+    return {
+        "vendor": vendor,
+        "rfq": rfq,
+        "action": lambda page, ctx: action_RFQ.run_stage(page, ctx["RFQ_no"], "quotation.pdf"),
+        "approve": lambda page, ctx: approve_rfq.run_stage(page, ctx["RFQ_no"]),
+        "po": lambda page, ctx: rfq_to_po.run_stage(page, ctx["RFQ_no"]),
+    }
+
+def run_transaction(page, stages, names):
+    """Run one vendor-to-PO transaction on a page and return the seconds spent in each stage."""
+    ctx, timings = {}, {}
+    for name in names:
+        started = time.perf_counter()
+        stages[name](page, ctx)
+        timings[name] = time.perf_counter() - started
+    return timings
+
+def summarize(samples):
+    """Return p50/p95/max in milliseconds for a list of durations in seconds."""
+    return {
+        "count": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 1),
+        "p95_ms": round(percentile(samples, 95) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+def bench_throughput(stages, names, workers, transactions, headless=True):
+    """Run transactions across a worker pool and return throughput and per-stage latency."""
+    from bc_pool import run_pool
+
+    started = time.perf_counter()
+    results = run_pool(
+        range(transactions),
+        lambda page, _: {"timings": run_transaction(page, stages, names)},
+        os.environ["EMAIL"],
+        os.environ["PASSWORD"],
+        workers,
+        headless,
+    )
+    elapsed = time.perf_counter() - started
+
+    ok = [result for result in results if result["status"] == "ok"]
+    per_stage = {name: summarize([result["timings"][name] for result in ok]) for name in names} if ok else {}
+    return {
+        "workers": workers,
+        "transactions": transactions,
+        "succeeded": len(ok),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_min": round(len(ok) / elapsed * 60, 2),
+        "stages": per_stage,
+    }
+
+def bench_page_load(blocking, samples, headless=True):
+    """Load the RFQ list in fresh contexts and return load time, JS heap and request count per context."""
+    from playwright.sync_api import sync_playwright
+    from bc_session import RFQ_LIST_URL, launch_browser, main_frame, open_session
+    from bc_wait import wait_for_page
+
+    load_times, heap_sizes, request_counts = [], [], []
+    with sync_playwright() as p:
+        browser = launch_browser(p, headless)
+        try:
+            for _ in range(samples):
+                context, page = open_session(browser, os.environ["EMAIL"], os.environ["PASSWORD"], block=blocking)
+                requests = []
+                page.on("requestfinished", requests.append)
+
+                started = time.perf_counter()
+                page.goto(RFQ_LIST_URL)
+                wait_for_page(page, main_frame(page))
+                page.wait_for_load_state("load")
+                load_times.append(time.perf_counter() - started)
+
+                cdp = context.new_cdp_session(page)
+                cdp.send("Performance.enable")
+                metrics = {metric["name"]: metric["value"] for metric in cdp.send("Performance.getMetrics")["metrics"]}
+                heap_sizes.append(metrics["JSHeapUsedSize"])
+                request_counts.append(len(requests))
+                context.close()
+        finally:
+            browser.close()
+
+    return {
+        "blocking": blocking,
+        "load": summarize(load_times),
+        "js_heap_mb": round(statistics.median(heap_sizes) / 1024 / 1024, 2),
+        "requests": statistics.median(request_counts),
+    }
+
+def print_report(report):
+    print(f"\nMock latency: {report['latency_ms']} ms, stages: {', '.join(report['stage_names'])}")
+    for run in report["runs"]:
+        print(f"\n{run['workers']} worker(s): {run['succeeded']}/{run['transactions']} ok in {run['elapsed_s']} s "
+              f"({run['throughput_per_min']} transactions/min)")
+        for name, stats in run["stages"].items():
+            print(f"  {name:<8} p50 {stats['p50_ms']:>8} ms   p95 {stats['p95_ms']:>8} ms   max {stats['max_ms']:>8} ms")
+    for run in report.get("page_load", []):
+        label = "with blocking" if run["blocking"] else "without blocking"
+        print(f"\nPage load {label}: p50 {run['load']['p50_ms']} ms, p95 {run['load']['p95_ms']} ms, "
+              f"JS heap {run['js_heap_mb']} MB per context, {run['requests']} requests")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the purchase workflow against the local BC mock.")
+    parser.add_argument("--workers", default="1,4,16", help="Comma-separated worker counts")
+    parser.add_argument("--transactions", type=int, default=16, help="Transactions per worker count")
+    parser.add_argument("--latency", type=float, default=50.0, help="Mock server delay per request, in milliseconds")
+    parser.add_argument("--stages", default=",".join(DEFAULT_STAGES), help="Comma-separated stages to run")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--compare-blocking", type=int, metavar="SAMPLES", help="Also compare page load with and without resource blocking")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    names = args.stages.split(",")
+    server = mock_bc.start_server(args.port, args.latency / 1000)
+    workdir = tempfile.mkdtemp(prefix="bc-bench-")
+    configure(server, workdir)
+    stages = load_stages()
+
+    report = {"latency_ms": args.latency, "stage_names": names, "runs": []}
+    try:
+        for workers in (int(count) for count in args.workers.split(",")):
+            report["runs"].append(bench_throughput(stages, names, workers, args.transactions, not args.headed))
+        if args.compare_blocking:
+            report["page_load"] = [bench_page_load(blocking, args.compare_blocking, not args.headed) for blocking in (False, True)]
+    finally:
+        server.shutdown()
+
+    print_report(report)
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Report saved to {output}.")
+
+if __name__ == "__main__":
+    main()
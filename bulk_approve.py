@@ -0,0 +1,96 @@
+import time
+import argparse
+from dotenv import load_dotenv
+
+import bc_api
+import bc_store
+import approve_rfq
+from bc_accounts import load_accounts
+from bc_pool import run_pool
+
+load_dotenv()  # Load environment variables from .env file
+
+APPROVED_STAGE = "approval_requested"
+
+def pending_approvals(limit=None):
+    """Return the RFQ numbers recorded in the store that are actioned but not sent for approval yet, oldest first."""
+    # Only actioned RFQs: earlier stages are half created or still with procurement
+    numbers = [record["number"] for record in reversed(bc_store.at_stage("rfq", "actioned"))]
+    return numbers[:limit] if limit else numbers
+
+def already_approved(RFQ_no, page=None):
+    """Check again right before acting, in case another run got there first: in BC itself when the API is on, else in the store."""
+    if bc_api.USE_API and page is not None and bc_api.is_approval_requested(bc_api.for_page(page), RFQ_no):
+        bc_store.record("rfq", RFQ_no, APPROVED_STAGE)
+        return True
+    record = bc_store.get(RFQ_no)
+    return record is not None and record["stage"] not in bc_store.stages_before("rfq", APPROVED_STAGE)
+
+def drop_requested(RFQ_nos, account):
+    """Remove RFQs whose approval request BC already shows, in a few OData calls, and catch the store up."""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p, bc_api.open_api(p, account.email, account.password) as api:
+        found = bc_api.statuses(api, "rfq", RFQ_nos)
+    requested = [RFQ_no for RFQ_no in RFQ_nos if found.get(RFQ_no) in bc_api.APPROVAL_STATUSES]
+    for RFQ_no in requested:
+        bc_store.record("rfq", RFQ_no, APPROVED_STAGE)
+    if requested:
+        print(f"Already requested in BC, skipping: {', '.join(requested)}")
+    return [RFQ_no for RFQ_no in RFQ_nos if RFQ_no not in requested]
+
+def approve_job(page, RFQ_no):
+    """Send one approval request on a worker page, skipping RFQs that are already approved."""
+    if already_approved(RFQ_no, page):
+        return {"RFQ_no": RFQ_no, "skipped": True}
+
+    started = time.perf_counter()
+    try:
+        approve_rfq.run_stage(page, RFQ_no)
+    except Exception as e:
+        # Keep the RFQ pending so the next run picks it up again
+        bc_store.annotate(RFQ_no, last_error=str(e)[:500])
+        raise
+    return {"RFQ_no": RFQ_no, "skipped": False, "seconds": round(time.perf_counter() - started, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Send approval requests for every pending RFQ in the transaction store.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent pages per account without their own max_concurrency")
+    parser.add_argument("--accounts", help="JSON file with the service accounts to spread approvals over (default: accounts.json, else .env)")
+    parser.add_argument("--limit", type=int, help="Only approve this many RFQs")
+    parser.add_argument("--dry-run", action="store_true", help="List the pending RFQs without approving them")
+    parser.add_argument("--headed", action="store_true", help="Show the browser windows")
+    args = parser.parse_args()
+
+    try:
+        accounts = load_accounts(args.accounts, max_concurrency=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    RFQ_nos = pending_approvals(args.limit)
+    if RFQ_nos and bc_api.USE_API:
+        RFQ_nos = drop_requested(RFQ_nos, accounts[0])
+    if not RFQ_nos:
+        print("No pending RFQs to approve.")
+        return
+
+    print(f"{len(RFQ_nos)} RFQs pending approval: {', '.join(RFQ_nos)}")
+    if args.dry_run:
+        return
+
+    results = run_pool(RFQ_nos, approve_job, headless=False if args.headed else None, accounts=accounts)
+
+    for RFQ_no, result in zip(RFQ_nos, results):
+        if result["status"] != "ok":
+            print(f"{RFQ_no}: failed ({result['error']})")
+        elif result["skipped"]:
+            print(f"{RFQ_no}: already approved, skipped")
+        else:
+            print(f"{RFQ_no}: approval requested in {result['seconds']} s")
+
+    approved = sum(1 for result in results if result["status"] == "ok" and not result["skipped"])
+    failed = sum(1 for result in results if result["status"] != "ok")
+    print(f"{approved} approved, {len(RFQ_nos) - approved - failed} skipped, {failed} failed.")
+
+if __name__ == "__main__":
+    main()
@@ -3,182 +3,285 @@ import os
 import time
 import json
 import tkinter as tk
-from tkinter import StringVar
+from tkinter import StringVar, messagebox, ttk
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright, Page
+from playwright.sync_api import Page
+import bc_daemon
+import bc_store
+import bc_vendors
+from bc_evidence import take_screenshot
+from bc_jobs import JobQueue
+from bc_selectors import (
+    VENDOR_NO_PATTERN, NEW, SHOW_MORE, TOGGLE_FACTBOX, VENDOR_NEW_FOCUS, VENDOR_NAME, REGISTRATION, PIN_NO
+)
+from bc_trace import bind, step, unbind
+from bc_links import open_document, open_list, remember
+from bc_session import VENDOR_LIST_URL, main_frame
+from bc_wait import wait_for_committed, wait_for_header, wait_until_idle
 
 load_dotenv()  # Load environment variables from .env file
 
-def take_screenshot(page: Page, step_name: str) -> str:
-    """Take a screenshot and save it with a specified step name."""
-    screenshot_dir = "screenshots"
-    os.makedirs(screenshot_dir, exist_ok=True)
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    screenshot_path = os.path.join(screenshot_dir, f"{step_name}_{timestamp}.png")
-    page.screenshot(path=screenshot_path)
-    print(f"Screenshot taken: {screenshot_path}")
-    return screenshot_path
-
 def save_inputs(data, filename="inputs.json"):
     """Save user inputs into a JSON file."""
     with open(filename, "w") as f:
         json.dump(data, f, indent=4)
     print(f"User inputs saved to {filename}.")
 
-def save_extracted_data(new_data, filename="extracted_data.json"):
-    """Save extracted data into a JSON file, updating without erasing previous entries."""
-    if os.path.exists(filename):
-        # Load existing data if the file exists
-        with open(filename, "r") as f:
-            try:
-                data = json.load(f)
-                # Ensure the data is a list
-                if not isinstance(data, list):
-                    data = [data]  # Convert dictionary or single entry to a list
-            except json.JSONDecodeError:
-                data = []
+def create_header(page: Page, frame, vendor_name, pin_no):
+    """Open a new vendor card and return the vendor number shown in its heading."""
+    # Navigate to vendor creation
+    with step("vendor.navigate"):
+        open_list(page, frame, VENDOR_LIST_URL)
+
+    with step("vendor.new"):
+        frame.get_by_role("menuitem", name=NEW, exact=True).click()
+        frame.get_by_label(VENDOR_NEW_FOCUS).click()
+
+    # Extract vendor number dynamically and save it
+    with step("vendor.header") as event:
+        # Wait for the header to show the new vendor number
+        text_content = wait_for_header(frame, VENDOR_NO_PATTERN)
+        print(f"Text content of the header: {text_content}")
+
+        # Use regex to find the pattern "V" followed by digits (e.g., V13691)
+        match = re.search(VENDOR_NO_PATTERN, text_content)
+        event["vendor_no"] = match.group(0) if match else None
+
+    if match:
+        vendor_no = match.group(0)  # Extract the vendor number (e.g., V13694)
+        print(f"Extracted vendor number: {vendor_no}")
+        bind(vendor_no=vendor_no)
+        remember(page, vendor_no)
+
+        # Record the vendor number in the transaction store
+        bc_store.record("vendor", vendor_no, "created", vendor_name=vendor_name, pin_no=pin_no)
+        print(f"Vendor number extracted and saved: {vendor_no}")
     else:
-        data = []
-    
-    # Append the new data
-    data.append(new_data)
+        print("Vendor number not found.")
+        vendor_no = None
+    return vendor_no
 
-    # Save the updated data
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=4)
-    print(f"Extracted data updated in {filename}.")
-
-def get_latest_entry(filename="extracted_data.json"):
-    """Retrieve the latest entry from the JSON file."""
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            try:
-                data = json.load(f)
-                if isinstance(data, list) and data:
-                    return data[-1]  # Return the last entry
-            except json.JSONDecodeError:
-                print("Error reading JSON file. Returning None.")
-    return None  # Return None if the file doesn't exist or is empty
-
-def submit_form(email, password, vendor_name, pin_no):
-    """Automate the vendor creation process and handle potential errors."""
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        page = browser.new_page()
+def enter_name(frame, vendor_name):
+    """Fill the vendor name on the open card."""
+    # Fill in vendor name
+    with step("vendor.name"):
+        frame.get_by_label(VENDOR_NAME).click()
+        frame.get_by_label(VENDOR_NAME).fill(vendor_name)
+        frame.get_by_label(VENDOR_NAME).press("Enter")
+        wait_for_committed(frame, "Name", vendor_name)
 
-        try:
-            # Login to the platform
-            page.goto("https://login.microsoftonline.com/dayliffCloud.onmicrosoft.com/wsfed?wa=wsignin1.0&wtrealm=https%3a%2f%2fdayliffCloud.onmicrosoft.com%2fbusinesscentral&wreply=https%3a%2f%2fbctest.dayliff.com%2fBC160%2fSignIn%3fReturnUrl%3d%252fBC160%252f")
-            page.get_by_placeholder("someone@example.com").fill(email)
-            page.get_by_role("button", name="Next").click()
-            page.get_by_placeholder("Password").fill(password)
-            page.get_by_role("button", name="Sign in").click()
-            page.get_by_role("button", name="No").click()
-            page.goto("https://bctest.dayliff.com/BC160/")
-
-            # Navigate to vendor creation
-            frame = page.frame_locator("iframe[title='Main Content']").first
-            page.goto("https://bctest.dayliff.com/BC160/?company=KENYA&bookmark=21%3bFwAAAAJ7%2f0QAIABIACAATA%3d%3d&page=27&dc=0")
-            time.sleep(5)
-
-            frame.get_by_role("menuitem", name="New", exact=True).click()
-            time.sleep(5)
-            frame.get_by_label("Description, Vendor LOCAL").click()
-            time.sleep(2)
-
-            # Extract vendor number dynamically and save it
-            header = frame.locator("div[role='heading'][class*='title---'][aria-level='2']").first
-
-            # Wait for up to 10 seconds for the header to appear
-            header.wait_for(timeout=10000)
-
-            # Extract the text content of the header
-            text_content = header.text_content()
-            print(f"Text content of the header: {text_content}")
-
-            # Use regex to find the pattern "V" followed by digits (e.g., V13691)
-            match = re.search(r"V\d+", text_content)
-    
-            if match:
-                vendor_no = match.group(0)  # Extract the vendor number (e.g., V13694)
-                print(f"Extracted vendor number: {vendor_no}")
-        
-            # Save the vendor number to JSON
-                extracted_data = {"vendor_no": vendor_no}
-                save_extracted_data(extracted_data)
-                print(f"Vendor number extracted and saved: {vendor_no}")
+        frame.get_by_label(SHOW_MORE).click()
+        frame.get_by_role("button", name=TOGGLE_FACTBOX).click()
+        wait_until_idle(frame)
+
+def enter_registration(frame, pin_no):
+    """Fill the PIN No. on the Registration tab of the open card."""
+    with step("vendor.registration"):
+        frame.get_by_role("button", name=REGISTRATION).click()
+        frame.get_by_role("textbox", name=PIN_NO).click()
+        frame.get_by_role("textbox", name=PIN_NO).fill(pin_no)
+        frame.get_by_role("textbox", name=PIN_NO).press("Enter")
+        wait_for_committed(frame, "PIN No.", pin_no)
+
+def run_stage(page: Page, vendor_name, pin_no, vendor_no=None):
+    """Create a vendor card on an already logged-in page and return its vendor number.
+
+    Pass the vendor_no of a partly created vendor to resume it after its last checkpoint instead of creating a new one.
+    """
+    frame = main_frame(page)
+    if vendor_no:
+        print(f"Resuming {vendor_no} after its last checkpoint.")
+        bind(vendor_no=vendor_no)
+        with step("vendor.open"):
+            frame = open_document(page, vendor_no, "vendor")
+    else:
+        vendor_no = create_header(page, frame, vendor_name, pin_no)
+
+    if not bc_store.reached(vendor_no, "name_entered"):
+        enter_name(frame, vendor_name)
+        if vendor_no:
+            bc_store.record("vendor", vendor_no, "name_entered")
+
+    if not bc_store.reached(vendor_no, "registered"):
+        enter_registration(frame, pin_no)
+        if vendor_no:
+            bc_store.record("vendor", vendor_no, "registered")
+            bc_vendors.remember(vendor_no, vendor_name, pin_no)
+
+    # Save success screenshot
+    with step("vendor.screenshot"):
+        take_screenshot(page, "Vendor_Creation_Success")
+
+    print("Vendor created successfully!")
+    unbind("vendor_no")
+    return vendor_no
+
+def parse_vendors(text):
+    """Parse pasted "vendor name<TAB>PIN No." lines (a comma also works) into rows, with a message per bad line."""
+    rows, errors = [], []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        # Names can contain commas, so only the last separator splits off the PIN
+        parts = line.rsplit("\t", 1) if "\t" in line else line.rsplit(",", 1)
+        if len(parts) != 2 or not parts[0].strip() or not parts[1].strip():
+            errors.append(f"Line {number}: expected vendor name and PIN No., got '{line.strip()}'")
+            continue
+        rows.append({"vendor_name": parts[0].strip(), "pin_no": parts[1].strip()})
+    return rows, errors
+
+def create_vendor_job(page, job):
+    """Create the vendor of a queued UI job and return its vendor number."""
+    vendor_no = run_stage(page, job["vendor_name"], job["pin_no"])
+    if not vendor_no:
+        raise RuntimeError("Vendor number not found.")
+    return {"vendor_no": vendor_no}
+
+def create_vendor_remote(job, email, password):
+    """Create a queued UI job's vendor on the warm browser daemon; None when no daemon is running."""
+    reply = bc_daemon.submit("vendor", email=email, password=password, vendor_name=job["vendor_name"], pin_no=job["pin_no"])
+    if reply is None:
+        return None
+    if reply["status"] != "done":
+        raise RuntimeError(f"{reply.get('error')} (on the daemon, screenshot {reply.get('screenshot')})")
+    if not reply.get("result"):
+        raise RuntimeError("Vendor number not found.")
+    return {"vendor_no": reply["result"]}
+
+def main():
+    """Show the vendor entry form; submissions run in the background while the queue shows their progress."""
+    jobs = JobQueue(create_vendor_job, remote=create_vendor_remote)
+
+    def credentials():
+        email, password = email_var.get().strip(), password_var.get()
+        if not email or not password:
+            messagebox.showerror("Vendor Entry", "Enter the email and password first.")
+            return None
+        return email, password
+
+    def enqueue(rows):
+        """Queue vendors without waiting for the browser and remember the last entry."""
+        login = credentials()
+        if not login:
+            return False
+        # Leave out vendors BC already has (by the local vendor index) before they use up a vendor number
+        index, fresh, duplicates = bc_vendors.load_index(), [], []
+        for job in jobs.snapshot():
+            if job["status"] != "failed":
+                index.add(job.get("vendor_no") or f"queued job {job['id']}", job["vendor_name"], job["pin_no"])
+        for row in rows:
+            vendor_no, reason = index.match(row["vendor_name"], row["pin_no"])
+            if vendor_no:
+                duplicates.append(f"{row['vendor_name']} ({row['pin_no']}): same {'PIN No.' if reason == 'pin' else 'name'} as {vendor_no}")
+                continue
+            index.add("an earlier line", row["vendor_name"], row["pin_no"])
+            fresh.append(row)
+        if duplicates:
+            message = "Already exist, not queued:\n" + "\n".join(duplicates[:10])
+            if not fresh:
+                messagebox.showinfo("Vendor Entry", message)
+                return True
+            if not messagebox.askyesno("Vendor Entry", message + "\n\nQueue the other vendors?"):
+                return False
+        rows = fresh
+        for row in rows:
+            jobs.submit(*login, **row)
+        save_inputs({"email": login[0], "password": login[1], **rows[-1]})
+        return True
+
+    def on_submit():
+        """Handle the form submission from the UI."""
+        vendor_name, pin_no = vendor_name_var.get().strip(), pin_no_var.get().strip()
+        if not vendor_name or not pin_no:
+            messagebox.showerror("Vendor Entry", "Enter the vendor name and PIN No.")
+            return
+        if enqueue([{"vendor_name": vendor_name, "pin_no": pin_no}]):
+            vendor_name_var.set("")
+            pin_no_var.set("")
+
+    def on_paste():
+        """Queue every vendor pasted in the bulk box."""
+        rows, errors = parse_vendors(paste_box.get("1.0", "end"))
+        if errors:
+            messagebox.showerror("Vendor Entry", "\n".join(errors[:10]))
+            return
+        if rows and enqueue(rows):
+            paste_box.delete("1.0", "end")
+
+    def refresh():
+        """Redraw the job table from the queue twice a second."""
+        now, snapshot = time.time(), jobs.snapshot()
+        for job in snapshot:
+            started = job["started_at"]
+            elapsed = f"{(job['finished_at'] or now) - started:.0f} s" if started else ""
+            values = (job["vendor_name"], job["pin_no"], job["status"], elapsed, job.get("vendor_no") or "", job["error"] or "")
+            item = str(job["id"])
+            if table.exists(item):
+                table.item(item, values=values, tags=(job["status"],))
             else:
-                print("Vendor number not found.")
-                vendor_no = None
-
-            # Fill in vendor name
-            frame.get_by_label("Name, (Blank)").click()
-            frame.get_by_label("Name, (Blank)").fill(vendor_name)
-            frame.get_by_label("Name, (Blank)").press("Enter")
-            time.sleep(2)
-
-            frame.get_by_label("General, Show more").click()
-            frame.get_by_role("button", name="Toggle FactBox").click()
-            time.sleep(2)
-
-            frame.get_by_role("button", name="Registration").click()
-            frame.get_by_role("textbox", name="PIN No., (Blank)").click()
-            frame.get_by_role("textbox", name="PIN No., (Blank)").fill(pin_no)
-            frame.get_by_role("textbox", name="PIN No., (Blank)").press("Enter")
-            time.sleep(2)
-
-            # Save success screenshot
-            take_screenshot(page, "Vendor_Creation_Success")
-
-            print("Vendor created successfully!")
-
-        except Exception as e:
-            error_screenshot = take_screenshot(page, "Error")
-            print(f"An error occurred: {str(e)}. Screenshot saved at {error_screenshot}.")
-
-        finally:
-            browser.close()
-
-def on_submit():
-    """Handle the form submission from the UI."""
-    email = email_var.get()
-    password = password_var.get()
-    vendor_name = vendor_name_var.get()
-    pin_no = pin_no_var.get()
-
-    # Save inputs to JSON
-    inputs = {
-        "email": email,
-        "password": password,
-        "vendor_name": vendor_name,
-        "pin_no": pin_no,
-    }
-    save_inputs(inputs)
-
-    # Run the automation process
-    submit_form(email, password, vendor_name, pin_no)
-
-# Tkinter UI setup
-root = tk.Tk()
-root.title("Vendor Entry")
-root.geometry("400x350")
-
-# Variables for user inputs
-email_var = StringVar()
-password_var = StringVar()
-vendor_name_var = StringVar()
-pin_no_var = StringVar()
-
-# Creating the form
-tk.Label(root, text="Email:").pack()
-tk.Entry(root, textvariable=email_var).pack()
-tk.Label(root, text="Password:").pack()
-tk.Entry(root, textvariable=password_var, show="*").pack()
-tk.Label(root, text="Vendor Name:").pack()
-tk.Entry(root, textvariable=vendor_name_var).pack()
-tk.Label(root, text="PIN No:").pack()
-tk.Entry(root, textvariable=pin_no_var).pack()
-
-tk.Button(root, text="Submit", command=on_submit).pack()
-
-root.mainloop()
+                table.insert("", "end", iid=item, values=values, tags=(job["status"],))
+        counts = {}
+        for job in snapshot:
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        status_var.set(", ".join(f"{count} {status}" for status, count in counts.items()) or "No vendors queued")
+        root.after(500, refresh)
+
+    def on_close():
+        if jobs.busy() and not messagebox.askyesno("Vendor Entry", "Vendors are still queued or running. Quit anyway?"):
+            return
+        jobs.stop()
+        root.destroy()
+
+    # Tkinter UI setup
+    root = tk.Tk()
+    root.title("Vendor Entry")
+    root.geometry("900x600")
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
+    # Variables for user inputs, starting from the last saved entry
+    saved = {}
+    if os.path.exists("inputs.json"):
+        try:
+            with open("inputs.json", "r") as f:
+                saved = json.load(f)
+        except json.JSONDecodeError:
+            print("Error reading inputs JSON file.")
+    email_var = StringVar(value=saved.get("email", ""))
+    password_var = StringVar(value=saved.get("password", ""))
+    vendor_name_var = StringVar()
+    pin_no_var = StringVar()
+    status_var = StringVar()
+
+    # Creating the form
+    form = tk.Frame(root)
+    form.pack(fill="x", padx=10, pady=5)
+    for row, (label, var, show) in enumerate([
+        ("Email:", email_var, None),
+        ("Password:", password_var, "*"),
+        ("Vendor Name:", vendor_name_var, None),
+        ("PIN No:", pin_no_var, None),
+    ]):
+        tk.Label(form, text=label).grid(row=row, column=0, sticky="w")
+        tk.Entry(form, textvariable=var, show=show, width=40).grid(row=row, column=1, sticky="w")
+    tk.Button(form, text="Add to queue", command=on_submit).grid(row=4, column=1, sticky="w")
+
+    tk.Label(root, text="Bulk paste, one vendor per line (name<TAB>PIN No. or name,PIN No.):").pack(anchor="w", padx=10)
+    paste_box = tk.Text(root, height=6)
+    paste_box.pack(fill="x", padx=10)
+    tk.Button(root, text="Add pasted vendors", command=on_paste).pack(anchor="w", padx=10, pady=5)
+
+    columns = ("vendor_name", "pin_no", "status", "elapsed", "vendor_no", "error")
+    table = ttk.Treeview(root, columns=columns, show="headings")
+    for column, heading, width in zip(columns, ("Vendor Name", "PIN No.", "Status", "Elapsed", "Vendor No.", "Error"), (200, 110, 70, 70, 90, 300)):
+        table.heading(column, text=heading)
+        table.column(column, width=width, anchor="w")
+    table.tag_configure("failed", foreground="red")
+    table.tag_configure("done", foreground="dark green")
+    table.pack(fill="both", expand=True, padx=10)
+    tk.Label(root, textvariable=status_var).pack(anchor="w", padx=10, pady=5)
+
+    refresh()
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
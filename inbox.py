@@ -0,0 +1,245 @@
+import os
+import re
+import csv
+import json
+import time
+import inspect
+import argparse
+import importlib
+from dotenv import load_dotenv
+
+import bc_vendors
+from bc_daemon import STAGES, run_job
+from bc_jobs import JobQueue
+from bc_lines import normalize_line
+
+load_dotenv()  # Load environment variables from .env file
+
+# Upstream systems drop JSONL or CSV job files here. Write them under another name (e.g. .tmp) and rename
+# when complete; a file is only read once it has not changed for SETTLE_SECONDS.
+INBOX_DIR = os.getenv("BC_INBOX_DIR", "inbox")
+POLL_SECONDS = float(os.getenv("BC_INBOX_POLL", "2"))
+SETTLE_SECONDS = float(os.getenv("BC_INBOX_SETTLE", "2"))
+MAX_IN_FLIGHT = int(os.getenv("BC_INBOX_MAX_IN_FLIGHT", "8"))  # Jobs queued or running at once; the rest stay on disk
+WORKERS = int(os.getenv("BC_INBOX_WORKERS", "2"))
+
+FILE_TYPES = (".jsonl", ".csv")
+
+# Stage of a file's rows by the first word of its name, e.g. vendors-2024-06-01.csv, approvals_batch7.jsonl.
+# A row's own "stage" field wins over the file name.
+STAGE_ALIASES = {"vendors": "vendor", "rfqs": "rfq", "approvals": "approve", "approval": "approve",
+                 "actions": "action", "orders": "po", "posts": "post", "returns": "return"}
+
+def folder(inbox, name):
+    return os.path.join(inbox, name)
+
+def stage_for(filename):
+    """Return the stage a job file's name asks for, or None."""
+    word = re.split(r"[-_.\s]", os.path.basename(filename).lower(), 1)[0]
+    word = STAGE_ALIASES.get(word, word)
+    return word if word in STAGES else None
+
+def read_rows(path):
+    """Yield (row number, row dict or None, error or None) from a JSONL or CSV job file, one row at a time."""
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        if path.endswith(".csv"):
+            for number, row in enumerate(csv.DictReader(f), start=1):
+                yield number, {key: value.strip() for key, value in row.items() if key and value and value.strip()}, None
+            return
+        number = 0
+        for line in f:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, None, f"not valid JSON ({str(e)})"
+                continue
+            yield (number, row, None) if isinstance(row, dict) else (number, None, "not a JSON object")
+
+def check_args(stage, args):
+    """Raise TypeError when the row's fields do not fit the stage's run function, before it takes up a worker."""
+    module_name, function_name = STAGES[stage]
+    inspect.signature(getattr(importlib.import_module(module_name), function_name)).bind(None, **args)
+
+class InboxFile:
+    """A job file being worked through from the processing folder, with its results file next to it."""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.results_path = path + ".results.jsonl"
+        self.stage = stage_for(path)
+        self.rows = read_rows(path)
+        self.outstanding = {}  # job id -> row number
+        self.submitted_all = False
+        self.failed = 0
+        self.finished = set()
+        self.index = None  # Vendor index, loaded at the file's first vendor row and kept up to date as vendors are created
+        # Rows finished before a restart are not run again
+        if os.path.exists(self.results_path):
+            with open(self.results_path, "r") as f:
+                for line in f:
+                    result = json.loads(line)
+                    self.finished.add(result["row"])
+                    self.failed += result["status"] != "done"
+
+    def write(self, row_number, **result):
+        self.finished.add(row_number)
+        self.failed += result["status"] != "done"
+        with open(self.results_path, "a") as f:
+            f.write(json.dumps({"row": row_number, **result}, default=str) + "\n")
+
+    def close(self, inbox):
+        """Move the file and its results to done/, or to failed/ when any row failed."""
+        target = folder(inbox, "failed" if self.failed else "done")
+        prefix = time.strftime("%Y%m%d-%H%M%S-")
+        os.replace(self.path, os.path.join(target, prefix + self.name))
+        if os.path.exists(self.results_path):
+            os.replace(self.results_path, os.path.join(target, prefix + self.name + ".results.jsonl"))
+        print(f"{self.name}: {len(self.finished)} rows, {self.failed} failed -> {target}")
+
+def pick_up(files, inbox):
+    """Move settled job files from the inbox into processing/ and start reading them, oldest first.
+
+    Files left in processing/ by an interrupted run are picked up first and continue after their last result.
+    """
+    known = {inbox_file.path for inbox_file in files}
+    processing = sorted(
+        os.path.join(folder(inbox, "processing"), name) for name in os.listdir(folder(inbox, "processing")) if name.endswith(FILE_TYPES)
+    )
+    now = time.time()
+    arrived = sorted(
+        (entry for entry in os.scandir(inbox)
+         if entry.is_file() and entry.name.endswith(FILE_TYPES) and now - entry.stat().st_mtime >= SETTLE_SECONDS),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in arrived:
+        path = os.path.join(folder(inbox, "processing"), entry.name)
+        if os.path.exists(path):
+            path = os.path.join(folder(inbox, "processing"), time.strftime("%Y%m%d-%H%M%S-") + entry.name)
+        os.replace(entry.path, path)
+        processing.append(path)
+
+    for path in processing:
+        if path not in known:
+            files.append(InboxFile(path))
+            print(f"Picked up {os.path.basename(path)}.")
+
+def job_index(jobs):
+    """Return an index of the vendors the queue's jobs are creating or created; failed jobs created nothing."""
+    index = bc_vendors.VendorIndex()
+    for job in jobs.snapshot():
+        if job["stage"] == "vendor" and job["status"] != "failed":
+            index.add(job.get("result") or f"queued job {job['id']}", job["args"].get("vendor_name"), job["args"].get("pin_no"))
+    return index
+
+def prepare(inbox_file, row, jobs):
+    """Return (stage, args) for a row, or a finished result dict when it needs no browser work."""
+    stage = row.pop("stage", None) or inbox_file.stage
+    if stage not in STAGES:
+        return {"status": "failed", "error": f"no stage for this row; name the file after one of {', '.join(STAGES)} or add a stage field"}
+    try:
+        check_args(stage, row)
+        if stage == "rfq" and row.get("lines"):
+            row["lines"] = [normalize_line(line, number, inbox_file.name) for number, line in enumerate(row["lines"], start=1)]
+    except (TypeError, ValueError) as e:
+        return {"status": "failed", "stage": stage, "error": f"bad fields: {str(e)}"}
+
+    if stage == "vendor" and not row.get("vendor_no"):
+        if inbox_file.index is None:
+            inbox_file.index = bc_vendors.load_index()
+        # Earlier rows of any file are jobs until they finish; a failed one leaves its PIN No. free for a later row
+        vendor_no, reason = inbox_file.index.match(row.get("vendor_name"), row.get("pin_no"))
+        if not vendor_no:
+            vendor_no, reason = job_index(jobs).match(row.get("vendor_name"), row.get("pin_no"))
+        if vendor_no and vendor_no.startswith("queued job "):
+            return {"status": "failed", "stage": stage, "error": f"same {'PIN No.' if reason == 'pin' else 'name'} as {vendor_no}"}
+        if vendor_no:
+            return {"status": "done", "stage": stage, "result": vendor_no, "existing": True, "matched_on": reason}
+    return stage, row
+
+def run(inbox=INBOX_DIR, workers=WORKERS, headless=None, max_in_flight=MAX_IN_FLIGHT, once=False):
+    """Watch the inbox and feed its job files to warm workers, at most max_in_flight jobs at a time."""
+    email, password = os.getenv("EMAIL"), os.getenv("PASSWORD")
+    if not email or not password:
+        raise SystemExit("EMAIL and PASSWORD must be set in .env.")
+    for name in ("processing", "done", "failed"):
+        os.makedirs(folder(inbox, name), exist_ok=True)
+
+    jobs = JobQueue(run_job, workers, headless, warm=(email, password))
+    files, stopping = [], False
+    print(f"Watching {os.path.abspath(inbox)} with {workers} workers, up to {max_in_flight} jobs in flight. Ctrl+C to stop.")
+    try:
+        while True:
+            try:
+                if not stopping:
+                    pick_up(files, inbox)
+
+                # Feed rows, oldest file first, until the pool is full; the rest wait on disk
+                in_flight = sum(len(inbox_file.outstanding) for inbox_file in files)
+                for inbox_file in files:
+                    while not stopping and not inbox_file.submitted_all and in_flight < max_in_flight:
+                        number, row, error = next(inbox_file.rows, (None, None, None))
+                        if number is None:
+                            inbox_file.submitted_all = True
+                        elif number in inbox_file.finished:
+                            continue
+                        elif error:
+                            inbox_file.write(number, status="failed", error=error)
+                        else:
+                            prepared = prepare(inbox_file, row, jobs)
+                            if isinstance(prepared, dict):
+                                inbox_file.write(number, **prepared)
+                            else:
+                                job_id = jobs.submit(email, password, stage=prepared[0], args=prepared[1])
+                                inbox_file.outstanding[job_id] = number
+                                in_flight += 1
+
+                # Write the results of finished jobs and close files whose rows are all done
+                finished = {job["id"]: job for job in jobs.snapshot() if job["status"] in ("done", "failed")}
+                for inbox_file in files:
+                    for job_id in [job_id for job_id in inbox_file.outstanding if job_id in finished]:
+                        job = finished[job_id]
+                        if job["stage"] == "vendor" and job["status"] == "done" and job.get("result"):
+                            for open_file in files:
+                                if open_file.index is not None:
+                                    open_file.index.add(job["result"], job["args"].get("vendor_name"), job["args"].get("pin_no"))
+                        inbox_file.write(inbox_file.outstanding.pop(job_id), stage=job["stage"], status=job["status"],
+                                         result=job.get("result"), error=job["error"], error_kind=job.get("error_kind"),
+                                         retries=job.get("retries"),
+                                         seconds=round(job["finished_at"] - job["started_at"], 2))
+                        jobs.forget(job_id)
+                for inbox_file in [inbox_file for inbox_file in files if inbox_file.submitted_all and not inbox_file.outstanding]:
+                    inbox_file.close(inbox)
+                    files.remove(inbox_file)
+
+                if stopping and not any(inbox_file.outstanding for inbox_file in files):
+                    break
+                if once and not files:
+                    break
+                # Wake on the next finished job, or poll the inbox again
+                with jobs.changed:
+                    jobs.changed.wait(POLL_SECONDS)
+            except KeyboardInterrupt:
+                if stopping:
+                    raise
+                stopping = True
+                print("Stopping: finishing the jobs in flight (Ctrl+C again to quit now). Unread rows stay in processing/.")
+    finally:
+        jobs.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch an inbox directory for vendor, RFQ and approval job files and run them on warm browsers.")
+    parser.add_argument("--inbox", default=INBOX_DIR, help="Inbox directory (default: inbox)")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT, help="Jobs queued or running at once")
+    parser.add_argument("--once", action="store_true", help="Process the files already in the inbox, then exit")
+    parser.add_argument("--headed", action="store_true", help="Show the browser windows")
+    args = parser.parse_args()
+
+    run(args.inbox, args.workers, False if args.headed else None, max(1, args.max_in_flight), args.once)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,641 @@
+import re
+import json
+import time
+import base64
+import secrets
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlparse
+
+# Stand-in for the BC160 web client. It serves the same ARIA roles, labels and
+# iframe structure the workflow scripts target, with a configurable server delay.
+
+LIST_PAGES = {"27": "vendor", "50152": "rfq", "9307": "po", "9311": "return"}
+CARD_PAGES = {"vendor": "26", "rfq": "50153", "po": "50", "return": "6640"}
+NUMBER_FORMATS = {"vendor": ("V{:05d}", 20000), "rfq": ("RFQ{:06d}", 10000), "po": ("PO{:06d}", 30000), "return": ("PRO{:06d}", 40000)}
+
+# Static weight the real client loads on every page, so resource blocking can be measured
+ASSET_IMAGES = 8
+ASSETS_HTML = "".join(f'<img src="/assets/image-{n}.png" alt="" width="16" height="16">' for n in range(ASSET_IMAGES))
+FONTS_CSS = "@font-face { font-family: 'Segoe UI Mock'; src: url('/assets/segoe.woff2'); } body { font-family: 'Segoe UI Mock', sans-serif; }"
+
+# Menu actions and the stage they move a document to
+ACTION_STAGES = {
+    "send_to_procurement": "sent_to_procurement",
+    "complete_action": "actioned",
+    "send_approval_request": "approval_requested",
+    "copy_lines": "lines_copied",
+    "post": "posted",
+}
+
+# OData web services (entity set -> kind) and the Status BC shows for each workflow stage
+ODATA_SETS = {"Vendor_Card": "vendor", "Purchase_Requisition_Card": "rfq", "Purchase_Order": "po", "Purchase_Return_Order": "return"}
+ODATA_STATUS = {
+    "sent_to_procurement": "Pending Procurement",
+    "actioned": "Actioned",
+    "approval_requested": "Pending Approval",
+    "posted": "Posted",
+}
+ODATA_PAGE_SIZE = 100
+
+LOGIN_HTML = """<!DOCTYPE html>
+<html><head><title>Sign in to your account</title></head>
+<body>
+<div id="step-email">
+  <input type="email" placeholder="someone@example.com">
+  <button id="next">Next</button>
+</div>
+<div id="step-password" hidden>
+  <input type="password" placeholder="Password">
+  <button id="sign-in">Sign in</button>
+</div>
+<div id="step-stay" hidden>
+  <p>Stay signed in?</p>
+  <button id="stay-no">No</button>
+  <button id="stay-yes">Yes</button>
+</div>
+<script>
+const show = (id) => document.querySelectorAll("body > div").forEach((d) => d.hidden = d.id !== id);
+document.getElementById("next").onclick = () => show("step-password");
+document.getElementById("sign-in").onclick = () => show("step-stay");
+const finish = () => { document.cookie = "bcauth=__TOKEN__; path=/"; location.href = "/BC160/"; };
+document.getElementById("stay-no").onclick = finish;
+document.getElementById("stay-yes").onclick = finish;
+</script>
+</body></html>
+"""
+
+SHELL_HTML = """<!DOCTYPE html>
+<html><head><title>Dynamics 365 Business Central</title></head>
+<body style="margin:0">
+<iframe title="Main Content" src="/BC160/frame?__QUERY__" style="width:100%;height:98vh;border:0"></iframe>
+</body></html>
+"""
+
+FRAME_HTML = """<!DOCTYPE html>
+<html><head><title>Main Content</title>
+<link rel="stylesheet" href="/assets/fonts.css">
+<script async src="/telemetry/track.js"></script>
+<style>
+  .spinner { position: fixed; top: 0; right: 0; padding: 4px; background: #ffd; }
+  [role=dialog] { border: 1px solid #888; padding: 8px; margin: 8px; }
+</style></head>
+<body>
+<div id="busy" class="spinner" aria-busy="true" style="display:none">Working on it...</div>
+<div id="app"></div>
+<div id="dialog"></div>
+<div id="assets" aria-hidden="true">__ASSETS__</div>
+<script>
+const params = new URLSearchParams(location.search);
+const LIST_PAGES = __LIST_PAGES__;
+const CARD_PAGES = __CARD_PAGES__;
+const app = document.getElementById("app");
+const dialog = document.getElementById("dialog");
+const busy = document.getElementById("busy");
+let pending = 0;
+
+async function api(path, body) {
+  pending++;
+  busy.style.display = "block";
+  try {
+    const options = body === undefined ? {} : {method: "POST", headers: {"Content-Type": "application/json"}, body: JSON.stringify(body)};
+    const response = await fetch(path, options);
+    return await response.json();
+  } finally {
+    pending--;
+    if (!pending) busy.style.display = "none";
+  }
+}
+
+function esc(value) {
+  return String(value ?? "").replace(/[&<>"]/g, (c) => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]));
+}
+
+function field(record, name) {
+  return (record.fields || {})[name] || "";
+}
+
+function labelled(name, record) {
+  return `${name}, ${field(record, name) || "(Blank)"}`;
+}
+
+async function renderList(kind) {
+  app.innerHTML = `
+    <div role="menubar">
+      <button role="menuitem" id="new">New</button>
+      <span role="button" id="search-toggle">Search</span>
+      <input id="search" placeholder="Search" hidden>
+    </div>
+    <div role="grid" id="rows"></div>`;
+  const search = document.getElementById("search");
+  document.getElementById("new").onclick = async () => openCard(await api("/api/new", {kind}));
+  document.getElementById("search-toggle").onclick = () => { search.hidden = false; search.focus(); };
+  search.oninput = () => loadRows(kind, search.value);
+  await loadRows(kind, "");
+}
+
+async function loadRows(kind, query) {
+  const data = await api(`/api/list?kind=${kind}&search=${encodeURIComponent(query)}`);
+  const rows = document.getElementById("rows");
+  rows.innerHTML = data.records.map((r) =>
+    `<div role="row"><button aria-label="No., ${esc(r.number)}" data-number="${esc(r.number)}">${esc(r.number)}</button> <span>${esc(r.stage)}</span></div>`
+  ).join("");
+  rows.querySelectorAll("button[data-number]").forEach((b) => b.onclick = async () => openCard(await api(`/api/record?number=${b.dataset.number}`)));
+}
+
+function openCard(record) {
+  // BC puts the card's bookmark in the address bar, which makes it deep-linkable
+  parent.history.replaceState(null, "", `/BC160/?company=KENYA&page=${CARD_PAGES[record.kind]}&bookmark=${encodeURIComponent(record.bookmark)}&dc=0`);
+  dialog.innerHTML = "";
+  ({vendor: renderVendorCard, rfq: renderRfqCard, po: renderPoCard, return: renderReturnCard})[record.kind](record);
+  app.querySelectorAll("[data-label]").forEach((el) => el.addEventListener("change", () => commit(record, el)));
+  app.querySelectorAll("[data-menu]").forEach((el) => el.onclick = () => {
+    const menu = document.getElementById(el.dataset.menu);
+    menu.hidden = !menu.hidden;
+  });
+}
+
+async function commit(record, el) {
+  const name = el.dataset.label;
+  const value = el.value;
+  const row = el.closest("tr[data-line]");
+  await api("/api/field", {number: record.number, field: name, value, line: row ? Number(row.dataset.line) : undefined});
+  // The label only reflects the value once the server has accepted it
+  if (!el.dataset.fixedLabel) el.setAttribute("aria-label", `${name}, ${value || "(Blank)"}`);
+  // A validated item No. on the blank row turns it into a line and adds a new blank row below
+  if (row && name === "No." && value && !row.nextElementSibling) {
+    row.insertAdjacentHTML("afterend", lineRow(Number(row.dataset.line) + 1, {}));
+    row.nextElementSibling.querySelectorAll("[data-label]").forEach((cell) => cell.addEventListener("change", () => commit(record, cell)));
+  }
+}
+
+function header(title, record) {
+  return `<div role="heading" aria-level="2" class="title---card">${title} | ${esc(record.number)} ${esc(field(record, "Name") || field(record, "Description"))}</div>`;
+}
+
+function renderVendorCard(record) {
+  app.innerHTML = `
+    ${header("Vendor Card", record)}
+    <div role="menubar"><button role="menuitem">Edit</button></div>
+    <section>
+      <button aria-label="General, Show more">Show more</button>
+      <button aria-label="Toggle FactBox">FactBox</button>
+      <select aria-label="Description, Vendor LOCAL" data-label="Description" data-fixed-label="1"><option>LOCAL</option></select>
+      <input type="text" aria-label="${esc(labelled("Name", record))}" data-label="Name">
+      <button>Registration</button>
+      <input type="text" aria-label="${esc(labelled("PIN No.", record))}" data-label="PIN No.">
+    </section>`;
+}
+
+function renderRfqCard(record) {
+  app.innerHTML = `
+    ${header("Purchase Requisition", record)}
+    <div role="menubar">
+      <button role="menuitem" data-menu="menu-process">Process</button>
+      <div role="menu" id="menu-process" hidden>
+        <button role="menuitem" id="send-procurement">Send to Procurement</button>
+        <button role="menuitem" id="complete-action">Complete Action</button>
+      </div>
+      <button role="menuitem" data-menu="menu-approval">Request Approval</button>
+      <div role="menu" id="menu-approval" hidden>
+        <button role="menuitem" id="send-approval">Send Approval Request</button>
+      </div>
+      <button id="doc-links" aria-label="Doc. Links File Drop">Doc. Links</button>
+      <div role="menu" id="menu-links" hidden>
+        <div role="menuitem" id="upload"><div>Upload</div></div>
+      </div>
+    </div>
+    <section>
+      <button aria-label="General, Show more">Show more</button>
+      <button aria-label="Toggle FactBox">FactBox</button>
+      <select aria-label="${esc(labelled("Requisition Type", record))}" data-label="Requisition Type">
+        <option value=""></option><option value="1">Purchase</option>
+      </select>
+      <input type="text" aria-label="${esc(labelled("Description", record))}" data-label="Description">
+    </section>
+    <table role="grid" id="lines">
+      ${[...(record.lines || []), {}].map((line, index) => lineRow(index, line)).join("")}
+    </table>`;
+
+  const action = (name) => api("/api/action", {number: record.number, action: name});
+  document.getElementById("send-procurement").onclick = () => confirm("Do you want to send the requisition to procurement?", () => action("send_to_procurement"));
+  document.getElementById("complete-action").onclick = () => confirm("Do you want to complete the action?", () => action("complete_action"));
+  document.getElementById("send-approval").onclick = () => approvalDialog(() => action("send_approval_request"));
+  document.getElementById("doc-links").onclick = () => { const m = document.getElementById("menu-links"); m.hidden = !m.hidden; };
+  document.getElementById("upload").onclick = () => uploadDialog(record);
+}
+
+function lineRow(index, line) {
+  // Committed values show in the aria labels; BC keeps one blank row under the entered lines
+  const label = (name, key) => `${name}, ${esc(line[key] || "(Blank)")}`;
+  const value = (key) => esc(line[key] || "");
+  const option = (key, option) => `<option value="${option}"${line[key] === option ? " selected" : ""}>`;
+  return `
+      <tr aria-label="  Location Code, ${esc(line["Location Code"] || "22010")} 0 0." data-line="${index}">
+        <td><input type="text" aria-label="Location Code, ${esc(line["Location Code"] || "22010")}" data-label="Location Code" data-fixed-label="1" value="${esc(line["Location Code"] || "22010")}"></td>
+        <td><select aria-label="${label("Type", "Type")}" data-label="Type">${option("Type", "")}</option>${option("Type", "20")}Item</option></select></td>
+        <td><input type="text" role="combobox" aria-label="${label("No.", "No.")}" data-label="No." value="${value("No.")}"></td>
+        <td><input type="text" aria-label="Comments, (Blank)" data-label="Comments"></td>
+        <td><input type="text" aria-label="Quantity," data-label="Quantity" data-fixed-label="1" value="${value("Quantity")}"></td>
+        <td><select aria-label="Source Doc Type," data-label="Source Doc Type" data-fixed-label="1">${option("Source Doc Type", "")}</option>${option("Source Doc Type", "4")}Job</option></select></td>
+        <td><input type="text" role="combobox" aria-label="${label("Source No.", "Source No.")}" data-label="Source No." value="${value("Source No.")}"></td>
+        <td><input type="text" aria-label="Source Line No.," data-label="Source Line No." data-fixed-label="1" value="${value("Source Line No.")}"></td>
+      </tr>`;
+}
+
+function postingMenu() {
+  return `
+      <button role="menuitem" data-menu="menu-posting">Posting</button>
+      <div role="menu" id="menu-posting" hidden><button role="menuitem" id="post">Post...</button></div>`;
+}
+
+function renderPoCard(record) {
+  app.innerHTML = `
+    ${header("Purchase Order", record)}
+    <div role="menubar">${postingMenu()}</div>
+    <section>
+      <input type="text" aria-label="${esc(labelled("Requisition No.", record))}" value="${esc(field(record, "Requisition No."))}" readonly>
+      <input type="text" aria-label="${esc(`Status, ${record.stage}`)}" value="${esc(record.stage)}" readonly>
+    </section>`;
+  document.getElementById("post").onclick = () =>
+    optionsDialog(["Receive", "Invoice", "Receive and Invoice"], (option) => api("/api/action", {number: record.number, action: "post", option}));
+}
+
+function renderReturnCard(record) {
+  app.innerHTML = `
+    ${header("Purchase Return Order", record)}
+    <div role="menubar">
+      <button role="menuitem" data-menu="menu-prepare">Prepare</button>
+      <div role="menu" id="menu-prepare" hidden>
+        <button role="menuitem" id="get-lines">Get Posted Document Lines to Reverse</button>
+      </div>
+      ${postingMenu()}
+    </div>
+    <section>
+      <input type="text" role="combobox" aria-label="${esc(labelled("Vendor No.", record))}" data-label="Vendor No." value="${esc(field(record, "Vendor No."))}">
+    </section>`;
+  document.getElementById("get-lines").onclick = () => reverseLinesDialog(record);
+  document.getElementById("post").onclick = () =>
+    optionsDialog(["Ship"], (option) => api("/api/action", {number: record.number, action: "post", option}));
+}
+
+function optionsDialog(options, onOk) {
+  dialog.innerHTML = `
+    <div role="dialog" aria-label="Post">
+      ${options.map((option, index) => `<label><input type="radio" name="option" value="${esc(option)}"${index ? "" : " checked"}>${esc(option)}</label>`).join("")}
+      <button id="ok">OK</button><button id="cancel">Cancel</button>
+    </div>`;
+  document.getElementById("ok").onclick = async () => {
+    const option = dialog.querySelector("input[name=option]:checked").value;
+    dialog.innerHTML = "";
+    await onOk(option);
+  };
+  document.getElementById("cancel").onclick = () => { dialog.innerHTML = ""; };
+}
+
+function reverseLinesDialog(record) {
+  dialog.innerHTML = `
+    <div role="dialog" aria-label="Posted Purchase Document Lines">
+      <input placeholder="Search" id="order-search">
+      <div role="grid" id="posted-lines"></div>
+      <button id="ok">OK</button>
+    </div>`;
+  const search = document.getElementById("order-search");
+  search.oninput = async () => {
+    const data = await api(`/api/list?kind=po&search=${encodeURIComponent(search.value)}`);
+    document.getElementById("posted-lines").innerHTML = data.records.filter((r) => r.stage === "posted").map((r) =>
+      `<div role="row"><input type="checkbox" aria-label="Select, ${esc(r.number)}" value="${esc(r.number)}"> ${esc(r.number)}</div>`
+    ).join("");
+  };
+  document.getElementById("ok").onclick = async () => {
+    const orders = [...dialog.querySelectorAll("input[type=checkbox]:checked")].map((box) => box.value);
+    dialog.innerHTML = "";
+    await api("/api/action", {number: record.number, action: "copy_lines", orders});
+  };
+}
+
+function confirm(text, onYes) {
+  dialog.innerHTML = `<div role="dialog"><p>${esc(text)}</p><button id="yes">Yes</button><button id="no">No</button></div>`;
+  document.getElementById("yes").onclick = async () => { dialog.innerHTML = ""; await onYes(); };
+  document.getElementById("no").onclick = () => { dialog.innerHTML = ""; };
+}
+
+function approvalDialog(onOk) {
+  dialog.innerHTML = `
+    <div role="dialog">
+      <input type="text" aria-label="Approver, (Blank)" id="approver" readonly>
+      <button aria-label="Look up value" id="lookup">...</button>
+      <div id="lookup-list" hidden><div role="option" aria-label="User ID, ICTTEST" id="user">ICTTEST</div></div>
+      <button id="ok">OK</button>
+    </div>`;
+  document.getElementById("lookup").onclick = () => document.getElementById("lookup-list").hidden = false;
+  document.getElementById("user").onclick = () => { document.getElementById("approver").value = "ICTTEST"; document.getElementById("lookup-list").hidden = true; };
+  document.getElementById("ok").onclick = async () => { dialog.innerHTML = ""; await onOk(); };
+}
+
+function uploadDialog(record) {
+  // Modal: hides the card while a file is being picked, like the BC file drop dialog
+  app.hidden = true;
+  dialog.innerHTML = `
+    <div role="dialog" aria-label="Upload">
+      <input type="text" placeholder="File name" id="file-name">
+      <input type="file" id="file">
+    </div>`;
+  document.getElementById("file").onchange = async (event) => {
+    const file = event.target.files[0];
+    document.getElementById("file-name").value = file.name;
+    await api("/api/upload", {number: record.number, name: file.name, size: file.size});
+    dialog.innerHTML = "";
+    app.hidden = false;
+  };
+}
+
+async function start() {
+  const page = params.get("page");
+  if (LIST_PAGES[page]) return renderList(LIST_PAGES[page]);
+  if (params.get("bookmark")) {
+    const record = await api(`/api/record?bookmark=${encodeURIComponent(params.get("bookmark"))}`);
+    if (!record.error) return openCard(record);
+  }
+  app.innerHTML = `<div role="heading" aria-level="1">Role Center</div>`;
+}
+start();
+</script>
+</body></html>
+"""
+
+class MockState:
+    """In-memory BC documents shared by every request handler."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = {}
+        self.counters = {kind: start for kind, (_, start) in NUMBER_FORMATS.items()}
+        self.token = secrets.token_hex(8)
+
+    def new_record(self, kind):
+        with self.lock:
+            self.counters[kind] += 1
+            number = NUMBER_FORMATS[kind][0].format(self.counters[kind])
+            record = {
+                "kind": kind,
+                "number": number,
+                "stage": "created",
+                "fields": {},
+                "lines": [],
+                "bookmark": base64.urlsafe_b64encode(number.encode()).decode(),
+                "created_at": time.time(),
+            }
+            self.records[number] = record
+            return dict(record)
+
+    def find(self, number=None, bookmark=None):
+        with self.lock:
+            if bookmark:
+                number = base64.urlsafe_b64decode(bookmark.encode()).decode()
+            record = self.records.get(number)
+            return dict(record) if record else None
+
+    def update(self, number, **changes):
+        with self.lock:
+            record = self.records[number]
+            for key, value in changes.items():
+                if key == "fields":
+                    record["fields"].update(value)
+                else:
+                    record[key] = value
+            return dict(record)
+
+    def update_line(self, number, index, field, value):
+        with self.lock:
+            lines = self.records[number]["lines"]
+            while len(lines) <= index:
+                lines.append({})
+            lines[index][field] = value
+            return dict(self.records[number])
+
+    def create_order(self, rfq_number):
+        """Raise the purchase order BC creates once an RFQ's approval request goes through."""
+        order = self.new_record("po")
+        return self.update(order["number"], fields={"Requisition No.": rfq_number})
+
+    def odata(self, kind):
+        """Return every record of a kind as OData entities: No, Status and the fields with OData names."""
+        with self.lock:
+            records = [dict(r, fields=dict(r["fields"])) for r in self.records.values() if r["kind"] == kind]
+        entities = []
+        for r in sorted(records, key=lambda r: r["number"]):
+            entity = {"No": r["number"], "Status": ODATA_STATUS.get(r["stage"], "Open")}
+            entity.update({odata_name(name): value for name, value in r["fields"].items()})
+            entities.append(entity)
+        return entities
+
+    def search(self, kind, query, limit=50):
+        # Like the BC list search, match the number or any field value
+        query = query.upper()
+        with self.lock:
+            matches = [
+                r for r in self.records.values()
+                if r["kind"] == kind and (query in r["number"] or any(query in str(value).upper() for value in r["fields"].values()))
+            ]
+        return sorted(matches, key=lambda r: r["number"], reverse=True)[:limit]
+
+def odata_name(field):
+    """Return the OData property name BC publishes for a page field, e.g. "PIN No." -> "PIN_No"."""
+    return re.sub(r"\W+", "_", field).strip("_")
+
+def odata_matches(entity, expression):
+    """Evaluate the subset of $filter the workflow sends: Field eq 'value' clauses joined by and/or, with parentheses."""
+    expression = expression.strip()
+    for operator in (" and ", " or "):
+        depth, parts, start = 0, [], 0
+        for index, char in enumerate(expression):
+            depth += {"(": 1, ")": -1}.get(char, 0)
+            if depth == 0 and expression.startswith(operator, index):
+                parts.append(expression[start:index])
+                start = index + len(operator)
+        if parts:
+            parts.append(expression[start:])
+            results = [odata_matches(entity, part) for part in parts]
+            return all(results) if operator == " and " else any(results)
+    if expression.startswith("(") and expression.endswith(")"):
+        return odata_matches(entity, expression[1:-1])
+    match = re.fullmatch(r"(\w+) eq '((?:[^']|'')*)'", expression)
+    if not match:
+        raise ValueError(f"Unsupported filter: {expression}")
+    return str(entity.get(match.group(1), "")) == match.group(2).replace("''", "'")
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Serve the login flow, the BC shell and frame pages, and the JSON calls the frame makes."""
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def delay(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def send_body(self, body, content_type="text/html", status=200, headers=None):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_bytes(self, data, content_type="application/octet-stream"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, data, status=200):
+        self.send_body(json.dumps(data), "application/json", status)
+
+    def redirect(self, location):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def authenticated(self):
+        cookies = dict(part.strip().split("=", 1) for part in self.headers.get("Cookie", "").split(";") if "=" in part)
+        return cookies.get("bcauth") == self.server.state.token
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        state = self.server.state
+
+        if url.path == "/login":
+            return self.send_body(LOGIN_HTML.replace("__TOKEN__", state.token))
+        if url.path.startswith("/BC160/ODataV4/"):
+            return self.odata(url, query)
+        if url.path in ("/BC160", "/BC160/"):
+            self.delay()
+            if not self.authenticated():
+                return self.redirect("/login")
+            return self.send_body(SHELL_HTML.replace("__QUERY__", url.query))
+        if url.path == "/BC160/frame":
+            self.delay()
+            if not self.authenticated():
+                return self.send_body("Unauthorized", status=401)
+            body = FRAME_HTML.replace("__LIST_PAGES__", json.dumps(LIST_PAGES)).replace("__CARD_PAGES__", json.dumps(CARD_PAGES))
+            return self.send_body(body.replace("__ASSETS__", ASSETS_HTML))
+        if url.path == "/assets/fonts.css":
+            return self.send_body(FONTS_CSS, "text/css")
+        if url.path.startswith("/assets/") or url.path.startswith("/telemetry/"):
+            self.delay()
+            return self.send_bytes(b"\0" * self.server.asset_size)
+        if url.path.startswith("/api/"):
+            if not self.authenticated():
+                return self.send_json({"error": "unauthorized"}, 401)
+            self.delay()
+            if url.path == "/api/list":
+                records = state.search(query.get("kind", ["rfq"])[0], query.get("search", [""])[0])
+                return self.send_json({"records": records})
+            if url.path == "/api/record":
+                record = state.find(query.get("number", [None])[0], query.get("bookmark", [None])[0])
+                return self.send_json(record or {"error": "not found"}, 200 if record else 404)
+        self.send_body("Not found", status=404)
+
+    def odata(self, url, query):
+        """Serve an OData v4 entity set query with $filter, $select, $top and server-side paging."""
+        self.delay()
+        if not self.authenticated():
+            return self.send_json({"error": {"code": "Unauthorized", "message": "Sign in first."}}, 401)
+        kind = ODATA_SETS.get(unquote(url.path).rsplit("/", 1)[-1])
+        if kind is None:
+            return self.send_json({"error": {"code": "BadRequest_NotFound", "message": "Unknown entity set."}}, 404)
+        try:
+            entities = [e for e in self.server.state.odata(kind) if odata_matches(e, query["$filter"][0])] if "$filter" in query else self.server.state.odata(kind)
+        except ValueError as e:
+            return self.send_json({"error": {"code": "BadRequest", "message": str(e)}}, 400)
+        if "$top" in query:
+            entities = entities[:int(query["$top"][0])]
+        skip = int(query.get("$skiptoken", ["0"])[0])
+        page = entities[skip:skip + ODATA_PAGE_SIZE]
+        if "$select" in query:
+            fields = query["$select"][0].split(",")
+            page = [{field: e.get(field) for field in fields} for e in page]
+        body = {"value": page}
+        if skip + ODATA_PAGE_SIZE < len(entities):
+            params = {key: values[0] for key, values in query.items()}
+            params["$skiptoken"] = skip + ODATA_PAGE_SIZE
+            body["@odata.nextLink"] = f"http://{self.headers['Host']}{url.path}?{urlencode(params, quote_via=quote)}"
+        return self.send_json(body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        state = self.server.state
+        if not self.authenticated():
+            return self.send_json({"error": "unauthorized"}, 401)
+        self.delay()
+        body = self.read_json()
+
+        if url.path == "/api/new":
+            return self.send_json(state.new_record(body["kind"]))
+        if url.path == "/api/field":
+            if body.get("line") is not None:
+                return self.send_json(state.update_line(body["number"], body["line"], body["field"], body["value"]))
+            return self.send_json(state.update(body["number"], fields={body["field"]: body["value"]}))
+        if url.path == "/api/upload":
+            return self.send_json(state.update(body["number"], fields={"Attachment": body["name"]}))
+        if url.path == "/api/action":
+            stage = ACTION_STAGES.get(body["action"])
+            if stage is None:
+                return self.send_json({"error": "unknown action"}, 400)
+            if body["action"] == "send_approval_request":
+                state.create_order(body["number"])
+            fields = {}
+            if body.get("option"):
+                fields["Posting Option"] = body["option"]
+            if body.get("orders"):
+                fields["Reversed Orders"] = ",".join(body["orders"])
+            return self.send_json(state.update(body["number"], stage=stage, fields=fields))
+        self.send_json({"error": "not found"}, 404)
+
+def start_server(port=8765, latency=0.0, verbose=False, asset_kb=100):
+    """Start the mock in a background thread and return the server."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockHandler)
+    server.daemon_threads = True
+    server.state = MockState()
+    server.latency = latency
+    server.verbose = verbose
+    server.asset_size = asset_kb * 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def env_for(server):
+    """Return the environment variables that point the workflow scripts at a running mock."""
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return {"BC_URL": f"{base}/BC160/", "BC_LOGIN_URL": f"{base}/login"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the BC160 web client.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Server delay per request, in milliseconds")
+    parser.add_argument("--asset-kb", type=int, default=100, help="Size of each image/font/telemetry asset")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency / 1000, args.verbose, args.asset_kb)
+    for key, value in env_for(server).items():
+        print(f"{key}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import json
+import argparse
+import importlib
+from dotenv import load_dotenv
+from playwright.sync_api import sync_playwright
+
+import create_vendor
+import request_RFQ
+import action_RFQ
+import approve_rfq
+from bc_evidence import record_failure
+from bc_retry import begin, classify, spent
+from bc_lines import load_lines
+from bc_session import launch_browser, open_session
+
+rfq_to_po = importlib.import_module("RFQ-to-PO")  # File name is not a valid identifier
+
+load_dotenv()  # Load environment variables from .env file
+
+def load_inputs(filename="inputs.json"):
+    """Load user inputs from the JSON file."""
+    if os.path.exists(filename):
+        with open(filename, "r") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                print("Error reading inputs JSON file.")
+    return {}
+
+def run_pipeline(email, password, vendor_name, pin_no, lines=None, description=None, quotation=None):
+    """Run every workflow stage from vendor creation to PO in one browser session and one login."""
+    results = {}
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        page = None
+
+        try:
+            # Login once (or reuse the cached session) and use the page for every stage
+            context, page = open_session(browser, email, password)
+
+            # Each stage is its own transaction with its own retry budget
+            begin()
+            vendor_no = create_vendor.run_stage(page, vendor_name, pin_no)
+            if not vendor_no:
+                print("Vendor number not found. Stopping pipeline.")
+                return results
+            results["vendor_no"] = vendor_no
+
+            begin()
+            RFQ_no = request_RFQ.run_stage(page, vendor_no, lines=lines, description=description)
+            if not RFQ_no:
+                print("RFQ number not found. Stopping pipeline.")
+                return results
+            results["RFQ_no"] = RFQ_no
+
+            begin()
+            action_RFQ.run_stage(page, RFQ_no, quotation)
+            begin()
+            approve_rfq.run_stage(page, RFQ_no)
+            begin()
+            rfq_to_po.run_stage(page, RFQ_no)
+
+            print(f"Pipeline completed successfully: {results}")
+
+        except Exception as e:
+            error_screenshot = record_failure(page) if page else None
+            print(f"An error occurred ({classify(e)}, after {spent()} retries): {str(e)}. Screenshot saved at {error_screenshot}.")
+
+        finally:
+            browser.close()
+
+    return results
+
+def main():
+    inputs = load_inputs()
+    parser = argparse.ArgumentParser(description="Run the vendor to purchase order workflow in a single browser session.")
+    parser.add_argument("--email", default=inputs.get("email") or os.getenv("EMAIL"))
+    parser.add_argument("--password", default=inputs.get("password") or os.getenv("PASSWORD"))
+    parser.add_argument("--vendor-name", default=inputs.get("vendor_name"))
+    parser.add_argument("--pin-no", default=inputs.get("pin_no"))
+    parser.add_argument("--lines", default=inputs.get("lines_file"), help="CSV, JSON or JSONL file with the RFQ lines")
+    parser.add_argument("--quotation", default=inputs.get("quotation"), help="Quotation file to attach to the RFQ")
+    args = parser.parse_args()
+
+    if not all([args.email, args.password, args.vendor_name, args.pin_no]):
+        parser.error("email, password, vendor name and PIN No. are required (flags or inputs.json).")
+
+    if args.quotation and not os.path.isfile(args.quotation):
+        parser.error(f"quotation file {args.quotation} does not exist.")
+
+    try:
+        description, lines = load_lines(args.lines) if args.lines else (None, None)
+    except (OSError, ValueError) as e:
+        parser.error(f"could not read the RFQ lines: {str(e)}")
+    run_pipeline(args.email.strip(), args.password.strip(), args.vendor_name, args.pin_no, lines, description, args.quotation)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import re
+import os
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+from playwright.sync_api import Page
+import bc_api
+import bc_store
+from bc_accounts import load_accounts
+from bc_evidence import take_screenshot
+from bc_pool import run_pool
+from bc_trace import bind, percentile, step, unbind
+from bc_links import open_document, open_list
+from bc_session import PO_LIST_URL, main_frame
+from bc_wait import timeout_for, wait_for_dialog, wait_until_idle
+
+load_dotenv()  # Load environment variables from .env file
+
+PO_PATTERN = os.getenv("BC_PO_PATTERN", r"PO\d+")
+POSTING_OPTIONS = ["Receive", "Invoice", "Receive and Invoice"]
+
+def find_po(page: Page, RFQ_no):
+    """Look up the purchase order raised for an RFQ on the purchase order list and record it."""
+    for record in bc_store.children(RFQ_no):
+        if record["kind"] == "po":
+            return record["number"]
+
+    PO_no = bc_api.find_order(bc_api.for_page(page), RFQ_no) if bc_api.USE_API else None
+    if PO_no:
+        bc_store.record("po", PO_no, "created", parent=RFQ_no)
+        return PO_no
+
+    frame = main_frame(page)
+    with step("post_po.find", RFQ_no=RFQ_no) as event:
+        open_list(page, frame, PO_LIST_URL)
+        frame.get_by_text("Search").click()
+        frame.get_by_placeholder("Search").fill(RFQ_no)
+
+        # The list search matches the order's Requisition No., so the first order row is the one for this RFQ
+        order = frame.get_by_role("button", name=re.compile(rf"^No\., {PO_PATTERN}$")).first
+        order.wait_for(state="visible", timeout=timeout_for("page"))
+        PO_no = event["PO_no"] = order.get_attribute("aria-label").split(", ", 1)[1]
+
+    bc_store.record("po", PO_no, "created", parent=RFQ_no)
+    return PO_no
+
+def run_stage(page: Page, PO_no, option="Receive"):
+    """Post a purchase order with the given posting option on an already logged-in page."""
+    bind(PO_no=PO_no)
+    with step("post_po.open"):
+        frame = open_document(page, PO_no, kind="po")
+
+    with step("post_po.post", option=option):
+        frame.get_by_role("menuitem", name="Posting").click()
+        frame.get_by_role("menuitem", name="Post...").click()
+        frame.get_by_role("radio", name=option, exact=True).check()
+        wait_for_dialog(frame, "OK").click()
+        wait_until_idle(frame)
+
+    take_screenshot(page, f"PO_posted_{PO_no}")
+    print(f"Purchase order posted ({option}): {PO_no}")
+    bc_store.record("po", PO_no, "posted", posting_option=option)
+    unbind("PO_no")
+    return PO_no
+
+def post_job(page, number, option="Receive"):
+    """Post one order, given its PO number or the RFQ it was raised from, and time it."""
+    started = time.perf_counter()
+    record = bc_store.get(number)
+    if record and record["kind"] == "rfq":
+        PO_no = find_po(page, number)
+    elif (record and record["kind"] == "po") or re.fullmatch(PO_PATTERN, number):
+        PO_no = number
+    else:
+        # Anything else would be recorded as a PO and opened by search, matching whatever the list finds
+        raise ValueError(f"{number} is neither an RFQ in the store nor a PO number ({PO_PATTERN}).")
+
+    if bc_store.reached(PO_no, "posted"):
+        return {"PO_no": PO_no, "skipped": True, "seconds": 0.0}
+    if not bc_store.get(PO_no):
+        bc_store.record("po", PO_no, "created")
+    try:
+        run_stage(page, PO_no, option)
+    except Exception as e:
+        # Keep the order pending so the next run picks it up again
+        bc_store.annotate(PO_no, last_error=str(e)[:500])
+        raise
+    return {"PO_no": PO_no, "skipped": False, "seconds": round(time.perf_counter() - started, 2)}
+
+def pending_orders(limit=None):
+    """Return the orders to post, oldest first: recorded POs not posted yet, then RFQs whose PO is not recorded yet."""
+    numbers = [record["number"] for record in reversed(bc_store.pending("po", before="posted"))]
+    for record in reversed(bc_store.at_stage("rfq", "po_requested")):
+        if not any(child["kind"] == "po" for child in bc_store.children(record["number"])):
+            numbers.append(record["number"])
+    return numbers[:limit] if limit else numbers
+
+def print_report(numbers, results):
+    """Print each document's outcome and time, then the batch totals."""
+    for number, result in zip(numbers, results):
+        if result["status"] != "ok":
+            print(f"{number}: failed ({result['error']})")
+        elif result["skipped"]:
+            print(f"{number}: {result['PO_no']} already posted, skipped")
+        else:
+            print(f"{number}: {result['PO_no']} posted in {result['seconds']} s")
+
+    seconds = [result["seconds"] for result in results if result["status"] == "ok" and not result["skipped"]]
+    failed = sum(1 for result in results if result["status"] != "ok")
+    print(f"{len(seconds)} posted, {len(numbers) - len(seconds) - failed} skipped, {failed} failed.")
+    if seconds:
+        print(f"Per order: p50 {percentile(seconds, 50):.2f} s, p95 {percentile(seconds, 95):.2f} s, max {max(seconds):.2f} s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Post purchase orders in bulk, many per browser session.")
+    parser.add_argument("numbers", nargs="*", help="PO numbers, or RFQ numbers whose purchase order should be posted")
+    parser.add_argument("--pending", action="store_true", help="Also post every order in the store that is not posted yet")
+    parser.add_argument("--limit", type=int, help="Only post this many orders")
+    parser.add_argument("--option", default="Receive", choices=POSTING_OPTIONS, help="Posting option (default: Receive)")
+    parser.add_argument("--workers", type=int, default=1, help="Browser contexts per account (default: one session)")
+    parser.add_argument("--accounts", help="JSON file with the service accounts to spread orders over (default: accounts.json, else .env)")
+    parser.add_argument("--output", help="Write one JSON line per order with its result and timing")
+    parser.add_argument("--dry-run", action="store_true", help="List the orders without posting them")
+    parser.add_argument("--headed", action="store_true", help="Show the browser windows")
+    args = parser.parse_args()
+
+    numbers = list(args.numbers)
+    if args.pending:
+        numbers += [number for number in pending_orders() if number not in numbers]
+    numbers = numbers[:args.limit] if args.limit else numbers
+    if not numbers:
+        print("No orders to post.")
+        return
+
+    print(f"{len(numbers)} orders to post: {', '.join(numbers)}")
+    if args.dry_run:
+        return
+
+    try:
+        accounts = load_accounts(args.accounts, max_concurrency=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = run_pool(numbers, lambda page, number: post_job(page, number, args.option),
+                       headless=False if args.headed else None, accounts=accounts)
+    print_report(numbers, results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for number, result in zip(numbers, results):
+                f.write(json.dumps({"number": number, **result}) + "\n")
+        print(f"Results saved to {args.output}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import re
+import os
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+from playwright.sync_api import Page
+import bc_api
+import bc_store
+from bc_accounts import load_accounts
+from bc_evidence import take_screenshot
+from bc_pool import run_pool
+from bc_trace import bind, percentile, step, unbind
+from bc_links import open_document, open_list, remember
+from bc_session import RETURN_LIST_URL, main_frame
+from bc_wait import timeout_for, wait_for_committed, wait_for_dialog, wait_for_header, wait_until_idle
+
+load_dotenv()  # Load environment variables from .env file
+
+RETURN_PATTERN = os.getenv("BC_RETURN_PATTERN", r"PRO\d+")
+
+def vendor_for(PO_no):
+    """Return the vendor a purchase order was raised for, following PO -> RFQ -> vendor in the store."""
+    record = bc_store.get(PO_no)
+    if record and record["data"].get("vendor_no"):
+        return record["data"]["vendor_no"]
+    rfq = bc_store.get(record["parent"]) if record and record["parent"] else None
+    if rfq and rfq["parent"]:
+        return rfq["parent"]
+    raise ValueError(f"No vendor recorded for {PO_no}; pass it with --vendor.")
+
+def create_header(page: Page, frame, PO_no, vendor_no):
+    """Open a new purchase return order for the vendor and return its number."""
+    with step("return.navigate"):
+        open_list(page, frame, RETURN_LIST_URL)
+
+    with step("return.new") as event:
+        frame.get_by_role("menuitem", name="New").click()
+        text_content = wait_for_header(frame, RETURN_PATTERN)
+        match = re.search(RETURN_PATTERN, text_content)
+        return_no = event["return_no"] = match.group(0) if match else None
+    if not return_no:
+        raise RuntimeError("Return order number not found.")
+
+    bind(return_no=return_no)
+    remember(page, return_no)
+    bc_store.record("return", return_no, "created", parent=PO_no, vendor_no=vendor_no)
+    return return_no
+
+def enter_vendor(frame, vendor_no):
+    """Fill the Vendor No. on the open return and wait until BC has accepted it."""
+    with step("return.vendor"):
+        vendor_field = frame.get_by_role("combobox", name=re.compile(r"^Vendor No\.,"))
+        vendor_field.fill(vendor_no)
+        vendor_field.press("Tab")
+        wait_for_committed(frame, "Vendor No.", vendor_no)
+
+def copy_lines(frame, PO_no):
+    """Pull the posted receipt lines of the purchase order into the return with Get Posted Document Lines to Reverse."""
+    with step("return.copy_lines", PO_no=PO_no):
+        frame.get_by_role("menuitem", name="Prepare").click()
+        frame.get_by_role("menuitem", name="Get Posted Document Lines to Reverse").click()
+
+        lines = frame.get_by_role("dialog")
+        lines.get_by_placeholder("Search").fill(PO_no)
+        select = lines.get_by_label(f"Select, {PO_no}")
+        select.wait_for(state="visible", timeout=timeout_for("page"))
+        select.check()
+        wait_for_dialog(frame, "OK").click()
+        wait_until_idle(frame)
+
+def post_return(frame):
+    """Post the return order, shipping the goods back to the vendor."""
+    with step("return.post"):
+        frame.get_by_role("menuitem", name="Posting").click()
+        frame.get_by_role("menuitem", name="Post...").click()
+        frame.get_by_role("radio", name="Ship", exact=True).check()
+        wait_for_dialog(frame, "OK").click()
+        wait_until_idle(frame)
+
+def run_stage(page: Page, PO_no, vendor_no=None, return_no=None):
+    """Create, fill and post a purchase return for a posted PO on an already logged-in page and return its number.
+
+    Pass the return_no of a partly created return to resume it after its last checkpoint.
+    """
+    frame = main_frame(page)
+    bind(PO_no=PO_no)
+    if return_no:
+        print(f"Resuming {return_no} after its last checkpoint.")
+        bind(return_no=return_no)
+        vendor_no = vendor_no or (bc_store.get(return_no) or {}).get("data", {}).get("vendor_no") or vendor_for(PO_no)
+        with step("return.open"):
+            frame = open_document(page, return_no, kind="return")
+    else:
+        vendor_no = vendor_no or vendor_for(PO_no)
+        return_no = create_header(page, frame, PO_no, vendor_no)
+
+    # A return whose vendor was not accepted is still at "created"; entering the vendor again is harmless
+    if not bc_store.reached(return_no, "vendor_entered"):
+        enter_vendor(frame, vendor_no)
+        bc_store.record("return", return_no, "vendor_entered", vendor_no=vendor_no)
+
+    if not bc_store.reached(return_no, "lines_copied"):
+        copy_lines(frame, PO_no)
+        bc_store.record("return", return_no, "lines_copied")
+
+    if not bc_store.reached(return_no, "posted"):
+        post_return(frame)
+        bc_store.record("return", return_no, "posted")
+
+    take_screenshot(page, f"Return_posted_{return_no}")
+    print(f"Purchase return posted: {return_no} for {PO_no}")
+    unbind("PO_no", "return_no")
+    return return_no
+
+def check_posted(page, PO_no, posted=False):
+    """Raise unless the PO is posted: recorded by post-PO.py, shown as posted by BC (hybrid mode), or vouched for with posted=True.
+
+    An order posted outside these scripts is recorded as posted, with its vendor when BC gives one.
+    """
+    if bc_store.reached(PO_no, "posted"):
+        return
+    document = bc_api.posted_order(bc_api.for_page(page), PO_no) if bc_api.USE_API else None
+    if document is None and not posted:
+        raise ValueError(f"{PO_no} is not recorded as posted; post it with post-PO.py first, "
+                         "or pass --posted if it was posted in BC (BC_USE_API=1 checks BC itself).")
+    vendor = {"vendor_no": document["Buy_from_Vendor_No"]} if document and document.get("Buy_from_Vendor_No") else {}
+    bc_store.record("po", PO_no, "posted", **vendor)
+
+def return_job(page, PO_no, vendor_no=None, posted=False):
+    """Return one posted order, resuming a return already started for it, and time it."""
+    started = time.perf_counter()
+    returns = [record for record in bc_store.children(PO_no) if record["kind"] == "return"]
+    if any(record["stage"] == "posted" for record in returns):
+        return {"return_no": returns[-1]["number"], "skipped": True, "seconds": 0.0}
+    check_posted(page, PO_no, posted)
+
+    return_no = run_stage(page, PO_no, vendor_no, returns[-1]["number"] if returns else None)
+    return {"return_no": return_no, "skipped": False, "seconds": round(time.perf_counter() - started, 2)}
+
+def pending_returns():
+    """Return the POs of returns started but not posted yet, oldest first."""
+    return [record["parent"] for record in reversed(bc_store.pending("return", before="posted")) if record["parent"]]
+
+def load_numbers(filename):
+    """Read PO numbers from a file, one per line (a CSV's first column also works)."""
+    with open(filename, "r") as f:
+        numbers = [line.split(",")[0].strip() for line in f if line.strip()]
+    return [number for number in numbers if re.fullmatch(r"[A-Za-z0-9-]+", number)]
+
+def print_report(numbers, results):
+    """Print each document's outcome and time, then the batch totals."""
+    for number, result in zip(numbers, results):
+        if result["status"] != "ok":
+            print(f"{number}: failed ({result['error']})")
+        elif result["skipped"]:
+            print(f"{number}: already returned as {result['return_no']}, skipped")
+        else:
+            print(f"{number}: returned as {result['return_no']} in {result['seconds']} s")
+
+    seconds = [result["seconds"] for result in results if result["status"] == "ok" and not result["skipped"]]
+    failed = sum(1 for result in results if result["status"] != "ok")
+    print(f"{len(seconds)} returned, {len(numbers) - len(seconds) - failed} skipped, {failed} failed.")
+    if seconds:
+        print(f"Per return: p50 {percentile(seconds, 50):.2f} s, p95 {percentile(seconds, 95):.2f} s, max {max(seconds):.2f} s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and post purchase returns for posted orders, many per browser session.")
+    parser.add_argument("numbers", nargs="*", help="Posted PO numbers to return")
+    parser.add_argument("--file", help="File with one PO number per line, e.g. the month-end return list")
+    parser.add_argument("--pending", action="store_true", help="Also finish every return in the store that is not posted yet")
+    parser.add_argument("--vendor", help="Vendor No. for every return (default: the vendor recorded for each PO)")
+    parser.add_argument("--posted", action="store_true", help="The orders were posted in BC outside these scripts; return them anyway")
+    parser.add_argument("--workers", type=int, default=1, help="Browser contexts per account (default: one session)")
+    parser.add_argument("--accounts", help="JSON file with the service accounts to spread returns over (default: accounts.json, else .env)")
+    parser.add_argument("--output", help="Write one JSON line per order with its result and timing")
+    parser.add_argument("--dry-run", action="store_true", help="List the orders without returning them")
+    parser.add_argument("--headed", action="store_true", help="Show the browser windows")
+    args = parser.parse_args()
+
+    numbers = list(args.numbers) + (load_numbers(args.file) if args.file else [])
+    if args.pending:
+        numbers += pending_returns()
+    numbers = list(dict.fromkeys(numbers))
+    if not numbers:
+        print("No orders to return.")
+        return
+
+    print(f"{len(numbers)} orders to return: {', '.join(numbers)}")
+    if args.dry_run:
+        return
+
+    try:
+        accounts = load_accounts(args.accounts, max_concurrency=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # A retried return resumes from its checkpoints instead of creating a second one
+    results = run_pool(numbers, lambda page, PO_no: return_job(page, PO_no, args.vendor, args.posted),
+                       headless=False if args.headed else None, accounts=accounts)
+    print_report(numbers, results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for number, result in zip(numbers, results):
+                f.write(json.dumps({"number": number, **result}) + "\n")
+        print(f"Results saved to {args.output}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from dotenv import load_dotenv
+
+import mock_bc
+import benchmark
+from benchmark import DEFAULT_STAGES
+
+load_dotenv()  # Load environment variables from .env file
+
+# Fixed inputs, so a replayed run sends the same requests as the recorded one
+VENDOR_NAME = "Regression vendor"
+
+# A replayed stage fails as slow when it takes longer than SLOWDOWN x its baseline plus SLOWDOWN_GRACE seconds
+SLOWDOWN = float(os.getenv("BC_REGRESSION_SLOWDOWN", "2.0"))
+SLOWDOWN_GRACE = float(os.getenv("BC_REGRESSION_GRACE", "0.5"))
+
+# Replayed responses are instant, so a selector that no longer matches should fail in seconds, not minutes
+REPLAY_TIMEOUTS = {"BC_TIMEOUT_PAGE": "5000", "BC_TIMEOUT_HEADER": "3000", "BC_TIMEOUT_COMMIT": "3000",
+                   "BC_TIMEOUT_IDLE": "3000", "BC_TIMEOUT_DIALOG": "3000"}
+
+def manifest_path(directory):
+    return os.path.join(directory, "manifest.json")
+
+def load_manifest(directory):
+    """Return the manifest of the recorded fixtures, or exit when nothing has been recorded."""
+    try:
+        with open(manifest_path(directory), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        sys.exit(f"No fixtures in {directory}. Record them first: python regression.py record")
+
+def save_manifest(directory, manifest):
+    with open(manifest_path(directory), "w") as f:
+        json.dump(manifest, f, indent=4)
+
+def open_stage_page(context):
+    """Open BC in a stage's context and check it is signed in (from the cached session or the fixture)."""
+    from bc_session import BC_URL, is_logged_in
+
+    page = context.new_page()
+    page.goto(BC_URL)
+    if not is_logged_in(page):
+        raise RuntimeError("BC did not open signed in.")
+    return page
+
+def record(stages, names, directory, headless=True):
+    """Run each stage once against BC in its own context and save its traffic as a HAR fixture."""
+    from playwright.sync_api import sync_playwright
+    import bc_har
+    from bc_evidence import record_failure
+    from bc_session import BC_URL, configure_context, launch_browser, load_cached_session, open_session
+
+    email, password = os.environ["EMAIL"], os.environ["PASSWORD"]
+    manifest = {"bc_url": BC_URL, "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"), "stages": []}
+    ctx = {}
+    with sync_playwright() as p:
+        browser = launch_browser(p, headless)
+        try:
+            # Sign in outside the recording, so neither the password nor the sign-in pages end up in a fixture
+            context, _ = open_session(browser, email, password)
+            context.close()
+
+            for name in names:
+                context = configure_context(browser.new_context(
+                    storage_state=load_cached_session(email), **bc_har.record_options(name, BC_URL, directory)))
+                page = None
+                try:
+                    page = open_stage_page(context)
+                    started = time.perf_counter()
+                    stages[name](page, ctx)
+                    seconds = time.perf_counter() - started
+                except Exception as e:
+                    screenshot = record_failure(page, f"record_{name}") if page else None
+                    sys.exit(f"Recording stopped: {name} failed ({str(e)}). Screenshot saved at {screenshot}.")
+                finally:
+                    context.close()  # Writes the HAR file
+
+                requests = bc_har.sanitize(bc_har.har_path(name, directory))
+                manifest["stages"].append({"name": name, "seconds": round(seconds, 2), "requests": requests})
+                print(f"Recorded {name}: {requests} requests in {seconds:.1f} s")
+        finally:
+            browser.close()
+
+    manifest["documents"] = ctx
+    save_manifest(directory, manifest)
+    print(f"Fixtures saved to {directory}. Run python regression.py replay --save-baseline to set the timing baseline.")
+
+def replay(stages, manifest, headless=True):
+    """Run the recorded stages against their fixtures, offline, and return one result per stage."""
+    from playwright.sync_api import sync_playwright
+    import bc_har
+    from bc_evidence import record_failure
+    from bc_session import configure_context, launch_browser
+
+    directory, baseline = manifest["directory"], manifest.get("replay_seconds", {})
+    results, ctx = [], {}
+    with sync_playwright() as p:
+        browser = launch_browser(p, headless)
+        try:
+            for stage in manifest["stages"]:
+                name = stage["name"]
+                replayer = bc_har.HarReplay(bc_har.har_path(name, directory))
+                context = configure_context(browser.new_context())
+                replayer.install(context)
+                page, result = None, {"name": name}
+                try:
+                    page = open_stage_page(context)
+                    started = time.perf_counter()
+                    stages[name](page, ctx)
+                    result["seconds"] = round(time.perf_counter() - started, 2)
+                    limit = baseline[name] * SLOWDOWN + SLOWDOWN_GRACE if name in baseline else None
+                    result["status"] = "slow" if limit and result["seconds"] > limit else "ok"
+                except Exception as e:
+                    result.update(status="failed", error=str(e).splitlines()[0],
+                                  screenshot=record_failure(page, f"replay_{name}") if page else None)
+                finally:
+                    context.close()
+                result["unrecorded_requests"] = replayer.misses
+                results.append(result)
+                if result["status"] == "failed":
+                    break  # Later stages need this stage's documents
+        finally:
+            browser.close()
+    return results
+
+def print_report(results, manifest):
+    baseline = manifest.get("replay_seconds", {})
+    for result in results:
+        line = f"{result['name']:<8} {result['status']:<7}"
+        if "seconds" in result:
+            line += f" {result['seconds']:>6.2f} s" + (f" (baseline {baseline[result['name']]:.2f} s)" if result["name"] in baseline else "")
+        if result.get("error"):
+            line += f" {result['error']}"
+        print(line)
+        for request in result["unrecorded_requests"][:5]:
+            print(f"         not in the fixture: {request}")
+    skipped = len(manifest["stages"]) - len(results)
+    if skipped:
+        print(f"{skipped} later stage(s) not run.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Record each workflow stage's BC traffic as HAR fixtures, and replay them offline as a regression run.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Run the stages against BC (or --mock) and save their traffic")
+    record_parser.add_argument("--stages", default=",".join(DEFAULT_STAGES), help="Comma-separated stages to record")
+    record_parser.add_argument("--mock", action="store_true", help="Record against a local mock_bc.py instead of BC_URL")
+    record_parser.add_argument("--port", type=int, default=8765)
+    replay_parser = subparsers.add_parser("replay", help="Run the recorded stages offline against the fixtures")
+    replay_parser.add_argument("--save-baseline", action="store_true", help="Save this run's stage times as the timing baseline")
+    replay_parser.add_argument("--output", help="Write the results as JSON to this file")
+    for subparser in (record_parser, replay_parser):
+        subparser.add_argument("--fixtures", default=os.getenv("BC_HAR_DIR", os.path.join("fixtures", "har")), help="Fixture directory")
+        subparser.add_argument("--headed", action="store_true")
+    args = parser.parse_args()
+
+    directory = os.path.abspath(args.fixtures)
+    output = os.path.abspath(args.output) if getattr(args, "output", None) else None
+    workdir = tempfile.mkdtemp(prefix="bc-regression-")
+
+    if args.command == "record":
+        server = mock_bc.start_server(args.port) if args.mock else None
+        try:
+            if server:
+                benchmark.configure(server, workdir)
+            else:
+                benchmark.use_workdir(workdir)
+            record(benchmark.load_stages(VENDOR_NAME), args.stages.split(","), directory, not args.headed)
+        finally:
+            if server:
+                server.shutdown()
+        return
+
+    # Replay against the address the fixtures were recorded from; no request leaves the browser
+    manifest = load_manifest(directory)
+    os.environ["BC_URL"] = manifest["bc_url"]
+    for name, value in REPLAY_TIMEOUTS.items():
+        os.environ.setdefault(name, value)
+    benchmark.use_workdir(workdir)
+    started = time.perf_counter()
+    results = replay(benchmark.load_stages(VENDOR_NAME), dict(manifest, directory=directory), not args.headed)
+    print_report(results, manifest)
+    print(f"Replayed {len(results)} stage(s) in {time.perf_counter() - started:.1f} s.")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.save_baseline and all(result["status"] != "failed" for result in results):
+        manifest["replay_seconds"] = {result["name"]: result["seconds"] for result in results}
+        save_manifest(directory, manifest)
+        print("Timing baseline saved.")
+    sys.exit(0 if all(result["status"] == "ok" for result in results) and len(results) == len(manifest["stages"]) else 1)
+
+if __name__ == "__main__":
+    main()
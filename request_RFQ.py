@@ -1,63 +1,31 @@
 import re
 import os
-import time
 import json
+import argparse
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright, Page
+from playwright.sync_api import sync_playwright, expect, Page
+import bc_daemon
+import bc_store
+from bc_evidence import record_failure, take_screenshot
+from bc_lines import DEFAULT_DESCRIPTION, DEFAULT_LINES, LINE_FIELDS, LINE_LABELS, line_cell, load_lines
+from bc_retry import TransientError, begin, classify, retry, spent
+from bc_selectors import (
+    RFQ_NO_PATTERN, NEW, PROCESS, SHOW_MORE, TOGGLE_FACTBOX, CONFIRM, REQUISITION_TYPE, REQUISITION_TYPE_RFQ,
+    NEW_DESCRIPTION, DESCRIPTION, LINE_ROW, SEND_TO_PROCUREMENT
+)
+from bc_trace import bind, step, unbind
+from bc_links import open_document, open_list, remember
+from bc_session import RFQ_LIST_URL, launch_browser, main_frame, open_session
+from bc_wait import timeout_for, wait_for_committed, wait_for_dialog, wait_for_header, wait_until_idle
 
 load_dotenv()  # Load environment variables from .env file
 
-def take_screenshot(page: Page, step_name: str) -> str:
-    """Take a screenshot and save it with a specified step name."""
-    screenshot_dir = "screenshots"
-    os.makedirs(screenshot_dir, exist_ok=True)
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    screenshot_path = os.path.join(screenshot_dir, f"{step_name}_{timestamp}.png")
-    page.screenshot(path=screenshot_path)
-    print(f"Screenshot taken: {screenshot_path}")
-    return screenshot_path
-
 def save_inputs(data, filename="inputs.json"):
     """Save user inputs into a JSON file."""
     with open(filename, "w") as f:
         json.dump(data, f, indent=4)
     print(f"User inputs saved to {filename}.")
 
-def save_extracted_data(new_data, filename="extracted_data.json"):
-    """Save extracted data into a JSON file, updating without erasing previous entries."""
-    if os.path.exists(filename):
-        # Load existing data if the file exists
-        with open(filename, "r") as f:
-            try:
-                data = json.load(f)
-                # Ensure the data is a list
-                if not isinstance(data, list):
-                    data = [data]  # Convert dictionary or single entry to a list
-            except json.JSONDecodeError:
-                data = []
-    else:
-        data = []
-    
-    # Append the new data
-    data.append(new_data)
-
-    # Save the updated data
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=4)
-    print(f"Extracted data updated in {filename}.")
-
-def get_latest_entry(filename="extracted_data.json"):
-    """Retrieve the latest entry from the JSON file."""
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            try:
-                data = json.load(f)
-                if isinstance(data, list) and data:
-                    return data[-1]  # Return the last entry
-            except json.JSONDecodeError:
-                print("Error reading JSON file. Returning None.")
-    return None  # Return None if the file doesn't exist or is empty
-
 def load_inputs(filename="inputs.json"):
     """Load user inputs from the JSON file."""
     if os.path.exists(filename):
@@ -68,128 +36,214 @@ def load_inputs(filename="inputs.json"):
                 print("Error reading inputs JSON file.")
     return None  # Return None if the file doesn't exist or is empty
 
-def load_extracted_data(filename="extracted_data.json"):
-    """Load extracted data from the JSON file."""
-    return get_latest_entry(filename)
+def create_header(page: Page, frame, vendor_no=None, lines=None, description=DEFAULT_DESCRIPTION):
+    """Open a new RFQ card, fill the header and return the RFQ number shown in its heading."""
+    # Navigate to RFQ creation
+    with step("rfq.navigate"):
+        open_list(page, frame, RFQ_LIST_URL)
+
+    with step("rfq.new"):
+        frame.get_by_role("menuitem", name=NEW).click()
+        frame.get_by_label(REQUISITION_TYPE).select_option(REQUISITION_TYPE_RFQ)
+        wait_until_idle(frame)
+
+        frame.get_by_label(SHOW_MORE).click()
+        frame.get_by_role("button", name=TOGGLE_FACTBOX).click()
+        wait_until_idle(frame)
+
+    with step("rfq.header") as event:
+        frame.get_by_role("textbox", name=NEW_DESCRIPTION).click()
+
+        # Wait for the header to show the new RFQ number
+        text_content = wait_for_header(frame, RFQ_NO_PATTERN)
+        print(f"Text content of the header: {text_content}")
+
+        # Use regex to find the pattern "RFQ" followed by digits (e.g., RFQ007686)
+        match = re.search(RFQ_NO_PATTERN, text_content)
+        event["RFQ_no"] = match.group(0) if match else None
+
+    if match:
+        RFQ_no = match.group(0)  # Extract the RFQ number (e.g., RFQ007686)
+        print(f"Extracted RFQ number: {RFQ_no}")
+        bind(RFQ_no=RFQ_no)
+        remember(page, RFQ_no)
+
+        # Record the RFQ number in the transaction store, linked to its vendor, with the lines to enter
+        bc_store.record("rfq", RFQ_no, "created", parent=vendor_no, lines=lines or DEFAULT_LINES, description=description, lines_done=0)
+        print(f"RFQ number extracted and saved: {RFQ_no}")
+    else:
+        print("RFQ number not found.")
+        RFQ_no = None
+    return RFQ_no
+
+def enter_line(frame, row, line):
+    """Fill one line row, committing each value with Tab instead of clicking away and sleeping."""
+    location = line_cell(row, "location_code")
+    if location.count() and location.input_value() != line["location_code"]:
+        location.fill(line["location_code"])
+        location.press("Tab")
+
+    line_cell(row, "type").select_option(line["type"])
+    wait_until_idle(frame)
+
+    # The item No. is validated by the server, which fills in the line's defaults
+    line_cell(row, "no").fill(line["no"])
+    line_cell(row, "no").press("Tab")
+    wait_for_committed(row, "No.", line["no"])
+    wait_until_idle(frame)
+
+    line_cell(row, "quantity").fill(line["quantity"])
+    line_cell(row, "quantity").press("Tab")
+    if line["source_doc_type"]:
+        line_cell(row, "source_doc_type").select_option(line["source_doc_type"])
+    for field in ("source_no", "source_line_no"):
+        if line[field]:
+            line_cell(row, field).fill(line[field])
+            line_cell(row, field).press("Tab")
+    wait_until_idle(frame)
+
+def check_line(row, line, number):
+    """Raise if a row does not show every value of its line once BC has processed it."""
+    for field in LINE_FIELDS:
+        cell = line_cell(row, field)
+        if not line[field] or (field == "location_code" and not cell.count()):
+            continue
+        try:
+            expect(cell).to_have_value(line[field], timeout=timeout_for("commit"))
+        except AssertionError:
+            # A lost commit is worth entering again; a rejected value also shows a BC error dialog
+            raise TransientError(f"Line {number} was not committed: {LINE_LABELS[field]} is '{cell.input_value()}', expected '{line[field]}'.")
+
+def enter_lines(frame, lines=None, RFQ_no=None, description=DEFAULT_DESCRIPTION, done=0):
+    """Fill the RFQ description and its lines, checking each row before moving to the next.
+
+    Lines before `done` are taken as already entered, so a resumed RFQ continues where it stopped.
+    """
+    lines = lines or DEFAULT_LINES
+    with step("rfq.description"):
+        description_box = frame.get_by_role("textbox", name=DESCRIPTION)
+        if description_box.input_value() != description:
+            description_box.fill(description)
+            description_box.press("Tab")
+            wait_until_idle(frame)
+
+    # BC keeps one blank row under the entered lines; each line is filled into it and a new one appears
+    rows = frame.get_by_role("row", name=LINE_ROW)
+    # Count only once the grid has rendered its trailing blank row, or the count comes up short
+    rows.last.wait_for(state="visible", timeout=timeout_for("page"))
+    first_row = rows.count() - 1 - done
+    for number, line in enumerate(lines[done:], start=done + 1):
+        with step("rfq.line", line=number, item=line["no"]):
+            row = rows.nth(first_row + number - 1)
+            row.wait_for(state="attached", timeout=timeout_for("commit"))
+
+            def enter():
+                enter_line(frame, row, line)
+                check_line(row, line, number)
+            # Filling a row again is harmless, so a slow or conflicting commit only repeats this line
+            retry("rfq.line", enter, scope=frame)
+        if RFQ_no:
+            bc_store.annotate(RFQ_no, lines_done=number)
+        print(f"Line {number}/{len(lines)} entered: {line['no']} x {line['quantity']}")
+
+def send_to_procurement(page: Page, frame):
+    """Send the open RFQ to procurement and confirm."""
+    with step("rfq.send_to_procurement"):
+        frame.get_by_role("menuitem", name=PROCESS).click()
+        frame.get_by_role("menuitem", name=SEND_TO_PROCUREMENT).click()
+        confirm = wait_for_dialog(frame, CONFIRM)
+
+        take_screenshot(page, "RFQ_created")
+        confirm.click()
+        wait_until_idle(frame)
+
+def run_stage(page: Page, vendor_no=None, RFQ_no=None, lines=None, description=None):
+    """Create and send an RFQ to procurement on an already logged-in page and return its RFQ number.
+
+    lines is a list of line specs (see bc_lines); without it the RFQ gets the default single line.
+    Pass the RFQ_no of a partly created RFQ to resume it after its last checkpoint instead of creating a new one.
+    """
+    frame = main_frame(page)
+    bind(vendor_no=vendor_no)
+    done = 0
+    if RFQ_no:
+        print(f"Resuming {RFQ_no} after its last checkpoint.")
+        bind(RFQ_no=RFQ_no)
+        data = (bc_store.get(RFQ_no) or {}).get("data", {})
+        lines = lines or data.get("lines")
+        description = description or data.get("description")
+        done = data.get("lines_done", 0)
+        with step("rfq.open"):
+            frame = open_document(page, RFQ_no)
+    else:
+        RFQ_no = create_header(page, frame, vendor_no, lines, description or DEFAULT_DESCRIPTION)
+
+    if not bc_store.reached(RFQ_no, "lines_entered"):
+        enter_lines(frame, lines, RFQ_no, description or DEFAULT_DESCRIPTION, done)
+        if RFQ_no:
+            bc_store.record("rfq", RFQ_no, "lines_entered")
+
+    if not bc_store.reached(RFQ_no, "sent_to_procurement"):
+        send_to_procurement(page, frame)
+        if RFQ_no:
+            bc_store.record("rfq", RFQ_no, "sent_to_procurement")
+
+    print("RFQ created successfully!")
+    unbind("vendor_no", "RFQ_no")
+    return RFQ_no
 
-def submit_form():
-    """Automate the vendor creation process and handle potential errors."""
-    # Load user inputs and extracted data
+def submit_form(lines_file=None):
+    """Automate the RFQ creation process and handle potential errors."""
+    # Load user inputs and the latest vendor from the transaction store
     inputs = load_inputs()
-    extracted_data = load_extracted_data()
+    vendor = bc_store.latest("vendor")
 
-    if not inputs or not extracted_data:
-        print("Missing required data from inputs or extracted_data.")
+    if not inputs:
+        print("Missing required data from inputs.")
         return
 
     email = inputs["email"]
     password = inputs["password"]
-    vendor_no = extracted_data.get("vendor_no")
 
-    if not vendor_no:
-        print("Vendor number not found in extracted data.")
+    if not vendor:
+        print("Vendor number not found in the transaction store.")
         return
+    vendor_no = vendor["number"]
+
+    # Read and check the line spec before opening the browser
+    description, lines = None, None
+    lines_file = lines_file or inputs.get("lines_file")
+    if lines_file:
+        try:
+            description, lines = load_lines(lines_file)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Could not read the RFQ lines: {str(e)}")
+        print(f"Loaded {len(lines)} RFQ lines from {lines_file}.")
+
+    # Hand the job to the warm browser daemon when one is running
+    reply = bc_daemon.run_or_none("rfq", email=email, password=password, vendor_no=vendor_no, lines=lines, description=description)
+    if reply is not None:
+        return reply.get("result")
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        page = browser.new_page()
+        browser = launch_browser(p)
+        page = None
 
         try:
-            # Login to the platform
-            page.goto("https://login.microsoftonline.com/dayliffCloud.onmicrosoft.com/wsfed?wa=wsignin1.0&wtrealm=https%3a%2f%2fdayliffCloud.onmicrosoft.com%2fbusinesscentral&wreply=https%3a%2f%2fbctest.dayliff.com%2fBC160%2fSignIn%3fReturnUrl%3d%252fBC160%252f")
-            page.get_by_placeholder("someone@example.com").fill(email)
-            page.get_by_role("button", name="Next").click()
-            page.get_by_placeholder("Password").fill(password)
-            page.get_by_role("button", name="Sign in").click()
-            page.get_by_role("button", name="No").click()
-            page.goto("https://bctest.dayliff.com/BC160/")
-
-            # Navigate to vendor creation
-            frame = page.frame_locator("iframe[title='Main Content']").first
-            page.goto("https://bctest.dayliff.com/BC160/?company=KENYA&bookmark=29%3busMAAAJ7%2f1AAUgAwADAAMAAyADUAMwA3&page=50152&dc=0")
-            time.sleep(5)
-
-            frame.get_by_role("menuitem", name="New").click()
-            time.sleep(5)
-            frame.get_by_label("Requisition Type, (Blank)").select_option("1")
-            time.sleep(5)
-
-            frame.get_by_label("General, Show more").click()
-            frame.get_by_role("button", name="Toggle FactBox").click()
-            time.sleep(5)
-
-            frame.get_by_role("textbox", name="Description, (Blank)").click()
-
-            header = frame.locator("div[role='heading'][class*='title---'][aria-level='2']").first
-
-            # Wait for up to 10 seconds for the header to appear
-            header.wait_for(timeout=10000)
-
-            # Extract the text content of the header
-            text_content = header.text_content()
-            print(f"Text content of the header: {text_content}")
-
-            # Use regex to find the pattern "RFQ" followed by digits (e.g., RFQ007686)
-            match = re.search(r"RFQ\d+", text_content)
-    
-            if match:
-                RFQ_no = match.group(0)  # Extract the RFQ number (e.g., RFQ007686)
-                print(f"Extracted RFQ number: {RFQ_no}")
-        
-                # Save the RFQ number to JSON with the key "RFQ_no"
-                extracted_data = {"RFQ_no": RFQ_no}
-                save_extracted_data(extracted_data)
-                print(f"RFQ number extracted and saved: {RFQ_no}")
-            else:
-                print("RFQ number not found.")
-                RFQ_no = None
-
-            frame.get_by_role("textbox", name="Description, (Blank)").click()
-            frame.get_by_role("textbox", name="Description, (Blank)").fill("testing rfq proceess\n")
-            time.sleep(2)
-
-            frame.get_by_role("row", name="  Location Code, 22010 0 0.").get_by_label("Type, (Blank)", exact=True).click()
-            frame.get_by_role("row", name="  Location Code, 22010 0 0.").get_by_label("Type, (Blank)", exact=True).select_option("20")
-            time.sleep(2)
-
-            frame.get_by_role("combobox", name="No., (Blank)", exact=True).click()
-            frame.get_by_role("combobox", name="No., (Blank)", exact=True).fill("20928")
-            time.sleep(2)
-
-
-
-            frame.get_by_label("Comments, (Blank)").click()
-            time.sleep(2)
-
-            frame.get_by_label("Quantity,", exact=True).fill("1")
-            frame.get_by_label("Quantity,", exact=True).press("Enter")
-            time.sleep(2)
-            frame.get_by_label("Source Doc Type,", exact=True).select_option("4")
-
-            frame.get_by_role("combobox", name="Source No., (Blank)").click()
-            frame.get_by_role("combobox", name="Source No., (Blank)").fill("J066872")
-            frame.get_by_label("Comments, (Blank)").click()
-
-            frame.get_by_label("Source Line No.,", exact=True).click()
-            frame.get_by_label("Source Line No.,", exact=True).fill("1010")
-            time.sleep(2)
-
-            frame.get_by_role("menuitem", name="Process").click()
-            frame.get_by_role("menuitem", name="Send to Procurement").click()
-            time.sleep(5)
-
-            take_screenshot(page, "RFQ_created")
-            frame.get_by_role("button", name="Yes").click()
-            time.sleep(5)
-            
-            print("RFQ created successfully!")
+            # Login to the platform, reusing the cached session when possible
+            begin()
+            context, page = open_session(browser, email, password)
+            return run_stage(page, vendor_no, lines=lines, description=description)
 
         except Exception as e:
-            error_screenshot = take_screenshot(page, "Error")
-            print(f"An error occurred: {str(e)}. Screenshot saved at {error_screenshot}.")
+            error_screenshot = record_failure(page) if page else None
+            print(f"An error occurred ({classify(e)}, after {spent()} retries): {str(e)}. Screenshot saved at {error_screenshot}.")
+            print("Resume partly created documents with: python resume.py --all")
 
         finally:
             browser.close()
 
 if __name__ == "__main__":
-    submit_form()
+    parser = argparse.ArgumentParser(description="Create an RFQ for the latest vendor and send it to procurement.")
+    parser.add_argument("--lines", help="CSV, JSON or JSONL line spec (defaults to inputs.json 'lines_file', else one default line)")
+    submit_form(parser.parse_args().lines)
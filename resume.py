@@ -0,0 +1,101 @@
+import os
+import argparse
+import importlib
+from dotenv import load_dotenv
+from playwright.sync_api import sync_playwright
+
+import bc_store
+import create_vendor
+import request_RFQ
+import action_RFQ
+import approve_rfq
+import purchase_return
+from bc_evidence import record_failure
+from bc_retry import begin
+from bc_session import launch_browser, open_session
+
+rfq_to_po = importlib.import_module("RFQ-to-PO")  # File name is not a valid identifier
+
+load_dotenv()  # Load environment variables from .env file
+
+# Stages after procurement, each finished by one script
+LATER_STAGES = [
+    ("actioned", action_RFQ),
+    ("approval_requested", approve_rfq),
+    ("po_requested", rfq_to_po),
+]
+
+def incomplete_documents():
+    """Return vendors, RFQs and purchase returns whose creation stopped part-way, oldest first."""
+    records = (
+        bc_store.pending("vendor", before="registered")
+        + bc_store.pending("rfq", before="sent_to_procurement")
+        + bc_store.pending("return", before="posted")
+    )
+    return [record["number"] for record in sorted(records, key=lambda record: record["id"])]
+
+def resume_document(page, number, through="sent_to_procurement"):
+    """Continue a vendor, RFQ or purchase return from its last checkpoint, for RFQs up to and including the `through` stage."""
+    record = bc_store.get(number)
+    if record is None:
+        raise KeyError(f"{number} is not in the transaction store.")
+
+    if record["kind"] == "vendor":
+        data = record["data"]
+        if not data.get("vendor_name") or not data.get("pin_no"):
+            raise ValueError(f"{number} has no recorded vendor name or PIN No. to resume with.")
+        create_vendor.run_stage(page, data["vendor_name"], data["pin_no"], vendor_no=number)
+        return
+
+    if record["kind"] == "return":
+        purchase_return.run_stage(page, record["parent"], return_no=number)
+        return
+
+    if not bc_store.reached(number, "sent_to_procurement"):
+        request_RFQ.run_stage(page, record["parent"], RFQ_no=number)
+
+    stages = bc_store.STAGES["rfq"]
+    for stage, module in LATER_STAGES:
+        if stages.index(stage) > stages.index(through):
+            break
+        if not bc_store.reached(number, stage):
+            module.run_stage(page, number)
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume vendors and RFQs from their last completed checkpoint.")
+    parser.add_argument("numbers", nargs="*", help="Vendor or RFQ numbers to resume")
+    parser.add_argument("--all", action="store_true", help="Resume every vendor and RFQ whose creation stopped part-way")
+    parser.add_argument("--through", default="sent_to_procurement", choices=bc_store.STAGES["rfq"][2:],
+                        help="Last RFQ stage to run (default: finish creating the RFQ)")
+    args = parser.parse_args()
+
+    numbers = list(args.numbers)
+    if args.all:
+        numbers += [number for number in incomplete_documents() if number not in numbers]
+    if not numbers:
+        print("Nothing to resume.")
+        return
+
+    email, password = os.getenv("EMAIL"), os.getenv("PASSWORD")
+    if not email or not password:
+        parser.error("EMAIL and PASSWORD must be set in .env.")
+
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        try:
+            context, page = open_session(browser, email, password)
+            for number in numbers:
+                record = bc_store.get(number)
+                print(f"Resuming {number} from checkpoint '{record['stage'] if record else 'unknown'}'.")
+                try:
+                    begin()
+                    resume_document(page, number, args.through)
+                    print(f"{number} is now at '{bc_store.get(number)['stage']}'.")
+                except Exception as e:
+                    error_screenshot = record_failure(page)
+                    print(f"Could not resume {number}: {str(e)}. Screenshot saved at {error_screenshot}.")
+        finally:
+            browser.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import ast
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Sync module -> the async_engine.py functions that mirror it
+MIRRORS = {
+    "bc_session.py": ["login", "open_session"],
+    "bc_links.py": ["open_by_search"],
+    "create_vendor.py": ["create_vendor"],
+    "request_RFQ.py": ["create_rfq"],
+    "action_RFQ.py": ["upload_quotation", "action_rfq"],
+    "approve_rfq.py": ["approve_rfq"],
+    "RFQ-to-PO.py": ["rfq_to_po"],
+}
+
+# Steps of resuming a partly created document, which only the sync scripts do
+SYNC_ONLY_STEPS = {"vendor.open", "rfq.open"}
+
+LOCATORS = {"get_by_role", "get_by_label", "get_by_placeholder", "get_by_text"}
+
+def parse(filename):
+    return ast.parse((ROOT / filename).read_text(), filename)
+
+def selector_names():
+    return {target.id for node in parse("bc_selectors.py").body if isinstance(node, ast.Assign)
+            for target in node.targets if isinstance(target, ast.Name)}
+
+def async_functions(names):
+    tree = parse("async_engine.py")
+    return [node for node in tree.body if isinstance(node, ast.AsyncFunctionDef) and node.name in names]
+
+def step_names(tree):
+    return {node.args[0].value for node in ast.walk(tree)
+            if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "step"
+            and node.args and isinstance(node.args[0], ast.Constant)}
+
+def selectors_used(trees):
+    names = selector_names()
+    return {node.id for tree in trees for node in ast.walk(tree) if isinstance(node, ast.Name) and node.id in names}
+
+def literal_selectors(tree):
+    """Return the element names written out as strings instead of taken from bc_selectors."""
+    found = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and getattr(node.func, "attr", None) in LOCATORS):
+            continue
+        # get_by_role takes the role first and the element name as name=; the others take the name first
+        values = [keyword.value for keyword in node.keywords if keyword.arg == "name"]
+        if node.func.attr != "get_by_role":
+            values += node.args[:1]
+        found += [ast.unparse(value) for value in values if isinstance(value, (ast.Constant, ast.JoinedStr))]
+    return found
+
+def test_both_engines_run_the_same_steps():
+    for filename, functions in MIRRORS.items():
+        mirrored = async_functions(functions)
+        assert step_names(parse(filename)) - SYNC_ONLY_STEPS == set().union(*map(step_names, mirrored)), filename
+
+def test_both_engines_use_the_same_selectors():
+    for filename, functions in MIRRORS.items():
+        mirrored = async_functions(functions)
+        assert len(mirrored) == len(functions), f"async_engine.py is missing one of {functions}"
+        assert selectors_used([parse(filename)]) == selectors_used(mirrored), filename
+
+def test_selectors_come_from_bc_selectors():
+    for filename in [*MIRRORS, "async_engine.py"]:
+        assert literal_selectors(parse(filename)) == [], filename